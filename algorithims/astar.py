@@ -1,22 +1,35 @@
 import numpy as np
 
+from algorithims.tour import TourMetric, plan_tour
+
 class AStarPathfinder:
-    def __init__(self):
-        pass
+    def __init__(self, method="auto", time_budget=None):
+        self.method = method
+        self.time_budget = time_budget
 
     def heuristic(self, a, b):
         """Calculate Euclidean distance between two points."""
         return np.linalg.norm(np.array(a) - np.array(b))
 
-    def find_path(self, start, goals):
-        """Find the shortest path covering all goals using A*."""
-        path = [start]
-        remaining_goals = goals[:]
-        while remaining_goals:
-            current = path[-1]
-            distances = [(self.heuristic(current, goal), goal) for goal in remaining_goals]
-            distances.sort()
-            _, next_goal = distances[0]
-            path.append(next_goal)
-            remaining_goals.remove(next_goal)
-        return path
\ No newline at end of file
+    def find_path(self, start, goals, method=None, time_budget=None, cost_matrix=None):
+        """Find the shortest path covering all goals.
+
+        `method` selects the tour engine (see `algorithims.tour.plan_tour`): exact
+        Held-Karp for a few goals, nearest neighbour with 2-opt/Or-opt otherwise.
+        `cost_matrix` gives the travel costs between the start (row 0) and the goals,
+        e.g. from `NavigationGrid.cost_matrix`; straight lines are used without it.
+        """
+        goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+        order = self.plan(start, goals, method, time_budget, cost_matrix)
+        return [tuple(start)] + [tuple(goal) for goal in goals[order].tolist()]
+
+    def plan(self, start, goals, method=None, time_budget=None, cost_matrix=None):
+        """Return the order in which to visit `goals`, as indices into `goals`."""
+        goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+        points = np.vstack((np.asarray(start, dtype=float).reshape(1, 3), goals))
+        route = plan_tour(
+            TourMetric(points, matrix=cost_matrix),
+            method or self.method,
+            self.time_budget if time_budget is None else time_budget,
+        )
+        return np.asarray(route[1:], dtype=np.intp) - 1
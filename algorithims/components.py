@@ -0,0 +1,270 @@
+import logging
+import os
+
+from algorithims.csp_state import CSPState
+
+logger = logging.getLogger(__name__)
+
+
+def connected_components(ids, adjacency_list):
+    """Split surfaces into connected components of the (symmetric) adjacency graph.
+
+    Returns lists of row indices, each in input order, ordered by their first row.
+    """
+    index = {surface_id: i for i, surface_id in enumerate(ids)}
+    parent = list(range(len(ids)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, surface_id in enumerate(ids):
+        for neighbour_id in adjacency_list[surface_id]:
+            root_i, root_j = find(i), find(index[neighbour_id])
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    components = {}
+    for i in range(len(ids)):
+        components.setdefault(find(i), []).append(i)
+    return list(components.values())
+
+
+class ComponentSolver:
+    """Solve each connected component of the adjacency graph independently.
+
+    Components share nothing but the global paint budgets and `min_colors`, so they
+    are solved in parallel on a process pool against a share of every budget
+    proportional to their area, each starting from a different color so the union
+    of colors is spread out. The results are then reconciled:
+
+    1. components are kept in order while their paint still fits the global
+       budgets; the others are re-solved one by one against the paint left over,
+       trying the colors with the most paint left first;
+    2. if fewer than `min_colors` colors are used overall, a color shared between
+       components is relabelled to an unused one inside a single component (a color
+       permutation never breaks adjacency), or else the largest component is
+       re-solved to use `min_colors` colors on its own;
+    3. if either step fails the whole problem is handed to the monolithic search,
+       unless a complete search (anything but "local_search") cannot color a
+       component even with every budget to itself, in which case the problem is
+       infeasible.
+
+    The assigner's progress callback is called from the component searches, or
+    every `poll_interval` seconds while they run on the pool, so raising
+    `SearchCancelled` from it stops the pool as well.
+    """
+
+    def __init__(self, assigner, workers=None, min_parallel_size=500, poll_interval=0.1):
+        self.assigner = assigner
+        self.workers = workers or os.cpu_count() or 1
+        # Below this many surfaces the pool costs more than it saves
+        self.min_parallel_size = min_parallel_size
+        self.poll_interval = poll_interval
+        self.stats = {}
+
+    def color_assign(self, surfaces, adjacency_list=None):
+        """Same contract as `CSPColorAssigner.color_assign`."""
+        assigner = self.assigner
+        if adjacency_list is None:
+            adjacency_list = assigner._calculate_adjacency_list(surfaces)
+        ids, areas = assigner._surface_columns(surfaces)
+        components = connected_components(ids, adjacency_list)
+        self.stats = {"components": len(components), "nodes": 0, "fallback": False}
+        if len(components) <= 1:
+            return self._monolithic(ids, areas, adjacency_list)
+        if assigner._trivially_infeasible(
+                CSPState(ids, areas, adjacency_list, assigner.colors, assigner.paint_availability)):
+            logger.info("Failed to find a valid color assignment.")
+            return None, None
+
+        colors = assigner.colors
+        capacity = {color: assigner.paint_availability.get(color, float('inf')) for color in colors}
+        total_area = sum(areas)
+        problems = [self._subproblem(component, ids, areas, adjacency_list) for component in components]
+
+        # Solve every component against its proportional share of the budgets, with
+        # room for one more surface so shares are not lost to rounding
+        jobs = []
+        for number, (component_ids, component_areas, component_adjacency) in enumerate(problems):
+            share = sum(component_areas) / total_area if total_area else 0.0
+            slack = max(component_areas)
+            budgets = {color: (capacity[color] * share if share else 0.0) + slack for color in colors}
+            shift = number % len(colors) if colors else 0
+            jobs.append((assigner.derive(colors[shift:] + colors[:shift], budgets, 1),
+                         component_ids, component_areas, component_adjacency))
+        results = self._run(jobs)
+
+        # Keep the components that fit in what is left of the global budgets
+        assignment = {}
+        usage = {color: 0 for color in colors}
+        failed = []
+        for number, (component_assignment, _) in enumerate(results):
+            if component_assignment is None or not self._fits(usage, capacity, component_assignment, problems[number]):
+                failed.append(number)
+            else:
+                self._add_usage(usage, component_assignment, problems[number])
+                assignment.update(component_assignment)
+
+        # Re-solve the rest one by one, preferring the colors with the most paint left
+        for number in sorted(failed, key=lambda n: -sum(problems[n][1])):
+            residual = {color: capacity[color] - usage[color] for color in colors}
+            by_residual = sorted(colors, key=lambda color: -residual[color])
+            component_assignment = self._solve_one(assigner.derive(by_residual, residual, 1), problems[number])
+            if component_assignment is None:
+                complete = assigner.search != "local_search"
+                if complete and self._solve_one(assigner.derive(colors, capacity, 1), problems[number]) is None:
+                    logger.info("Failed to find a valid color assignment.")
+                    return None, None
+                return self._fall_back(ids, areas, adjacency_list)
+            self._add_usage(usage, component_assignment, problems[number])
+            assignment.update(component_assignment)
+
+        if not self._reach_min_colors(assignment, usage, capacity, problems):
+            if not self._widen_largest(assignment, usage, capacity, problems):
+                return self._fall_back(ids, areas, adjacency_list)
+        return assignment, usage
+
+    def _monolithic(self, ids, areas, adjacency_list):
+        result = self.assigner.assign_colors(ids, areas, adjacency_list)
+        self.stats["nodes"] += self.assigner.stats["nodes"]
+        return result
+
+    def _fall_back(self, ids, areas, adjacency_list):
+        self.stats["fallback"] = True
+        return self._monolithic(ids, areas, adjacency_list)
+
+    def _solve_one(self, assigner, problem):
+        component_assignment, _ = assigner.assign_colors(*problem)
+        self.stats["nodes"] += assigner.stats["nodes"]
+        return component_assignment
+
+    def _run(self, jobs):
+        """Solve the jobs, on a process pool when there is more than one worker."""
+        numbered = list(enumerate(jobs))
+        if self.workers <= 1 or sum(len(job[1]) for job in jobs) < self.min_parallel_size:
+            solved = _solve_batch(numbered)
+        else:
+            # Imported here: the pool machinery costs more to import than most solves take
+            import multiprocessing
+            for assigner, *_ in jobs:
+                assigner.progress = None  # callbacks stay in this process; polled below
+            batches = self._batches(numbered)
+            progress = self.assigner.progress
+            with multiprocessing.Pool(min(self.workers, len(batches))) as pool:
+                pending = pool.map_async(_solve_batch, batches)
+                while not pending.ready():
+                    pending.wait(self.poll_interval)
+                    if progress is not None and not pending.ready():
+                        progress(self.stats)  # may raise SearchCancelled; leaving the block kills the pool
+                solved = [item for batch in pending.get() for item in batch]
+        results = [None] * len(jobs)
+        for number, result in solved:
+            results[number] = result
+        self.stats["nodes"] += sum(nodes for _, nodes in results)
+        return results
+
+    def _batches(self, numbered):
+        """Group jobs into a few batches of similar total size to limit pickling overhead."""
+        batch_count = min(len(numbered), self.workers * 4)
+        batches = [[] for _ in range(batch_count)]
+        sizes = [0] * batch_count
+        for item in sorted(numbered, key=lambda item: -len(item[1][1])):
+            smallest = sizes.index(min(sizes))
+            batches[smallest].append(item)
+            sizes[smallest] += len(item[1][1])
+        return batches
+
+    @staticmethod
+    def _subproblem(component, ids, areas, adjacency_list):
+        component_ids = [ids[i] for i in component]
+        component_areas = [areas[i] for i in component]
+        component_adjacency = {surface_id: adjacency_list[surface_id] for surface_id in component_ids}
+        return component_ids, component_areas, component_adjacency
+
+    @staticmethod
+    def _fits(usage, capacity, component_assignment, problem):
+        extra = {}
+        for surface_id, area in zip(problem[0], problem[1]):
+            color = component_assignment[surface_id]
+            extra[color] = extra.get(color, 0) + area
+        return all(usage[color] + amount <= capacity[color] for color, amount in extra.items())
+
+    @staticmethod
+    def _add_usage(usage, component_assignment, problem):
+        for surface_id, area in zip(problem[0], problem[1]):
+            usage[component_assignment[surface_id]] += area
+
+    def _reach_min_colors(self, assignment, usage, capacity, problems):
+        """Relabel colors inside single components until `min_colors` colors are used."""
+        min_colors = self.assigner.min_colors
+        component_usage = []
+        for component_ids, component_areas, _ in problems:
+            used = {}
+            for surface_id, area in zip(component_ids, component_areas):
+                used[assignment[surface_id]] = used.get(assignment[surface_id], 0) + area
+            component_usage.append(used)
+
+        while sum(1 for color in usage if self._count(component_usage, color)) < min_colors:
+            unused = [color for color in usage if not self._count(component_usage, color)]
+            move = None
+            for new_color in unused:
+                for number, used in enumerate(component_usage):
+                    for old_color, amount in used.items():
+                        if self._count(component_usage, old_color) > 1 and amount <= capacity[new_color] - usage[new_color]:
+                            move = (number, old_color, new_color)
+                            break
+                    if move:
+                        break
+                if move:
+                    break
+            if move is None:
+                return False
+            number, old_color, new_color = move
+            for surface_id in problems[number][0]:
+                if assignment[surface_id] == old_color:
+                    assignment[surface_id] = new_color
+            amount = component_usage[number].pop(old_color)
+            component_usage[number][new_color] = amount
+            usage[old_color] -= amount
+            usage[new_color] += amount
+        return True
+
+    def _widen_largest(self, assignment, usage, capacity, problems):
+        """Re-solve the largest component so that it alone uses `min_colors` colors."""
+        min_colors = self.assigner.min_colors
+        number = max(range(len(problems)), key=lambda n: len(problems[n][0]))
+        component_ids, component_areas, _ = problems[number]
+        if len(component_ids) < min_colors:
+            return False
+        residual = dict(capacity)
+        for surface_id, area in zip(component_ids, component_areas):
+            usage[assignment[surface_id]] -= area
+        for color in usage:
+            residual[color] -= usage[color]
+        component_assignment = self._solve_one(
+            self.assigner.derive(self.assigner.colors, residual, min_colors), problems[number]
+        )
+        if component_assignment is None:
+            for surface_id, area in zip(component_ids, component_areas):
+                usage[assignment[surface_id]] += area
+            return False
+        assignment.update(component_assignment)
+        self._add_usage(usage, component_assignment, problems[number])
+        return True
+
+    @staticmethod
+    def _count(component_usage, color):
+        """Number of components painting with `color`."""
+        return sum(1 for used in component_usage if color in used)
+
+
+def _solve_batch(batch):
+    """Solve a batch of numbered components; runs in a worker process."""
+    results = []
+    for number, (assigner, component_ids, component_areas, component_adjacency) in batch:
+        component_assignment, _ = assigner.assign_colors(component_ids, component_areas, component_adjacency)
+        results.append((number, (component_assignment, assigner.stats["nodes"])))
+    return results
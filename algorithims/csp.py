@@ -1,58 +1,534 @@
+import logging
+
+from algorithims.csp_state import CSPState
+from algorithims.local_search import MinConflictsSearch
+from algorithims.nogoods import NogoodStore
+from algorithims.objectives import make_objective
+from algorithims.spatial_index import SurfaceSpatialIndex
+from algorithims.surface_table import SurfaceTable, UNKNOWN, normalize_orientation
+
+logger = logging.getLogger(__name__)
+
+
+class _SearchStopped(Exception):
+    """Raised inside a search to abandon it once a node limit is reached."""
+
+
+class SearchCancelled(Exception):
+    """Raised by a progress callback to abandon the search it was called from."""
+
+
 class CSPColorAssigner:
-    def __init__(self, colors, paint_availability, adjacency_constraint, min_colors):
+    SEARCH_STRATEGIES = ("backtracking", "propagation", "backjumping", "local_search")
+
+    def __init__(self, colors, paint_availability, adjacency_constraint, min_colors,
+                 search="backtracking", use_ac3=True, max_nogoods=10000, progress=None,
+                 progress_interval=10000, seed=0, max_steps=None):
+        if search not in self.SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy '{search}'. Expected one of {self.SEARCH_STRATEGIES}.")
         self.colors = colors
         self.paint_availability = paint_availability
         self.adjacency_constraint = adjacency_constraint
         self.min_colors = min_colors
+        self.search = search
+        self.use_ac3 = use_ac3
+        self.max_nogoods = max_nogoods
+        # Called with `self.stats` every `progress_interval` nodes and whenever
+        # `optimize` improves its best solution; raising `SearchCancelled` stops the search
+        self.progress = progress
+        self.progress_interval = progress_interval
+        # Random seed and move budget of the "local_search" strategy
+        self.seed = seed
+        self.max_steps = max_steps
+        self.stats = {"nodes": 0, "backtracks": 0, "prunings": 0}
 
-    def color_assign(self, surfaces):
-        """Assign colors to walls while satisfying adjacency and minimum color constraints."""
-        paint_usage = {color: 0 for color in self.colors}
-        color_assignment = {}
+    def color_assign(self, surfaces, adjacency_list=None):
+        """Assign colors to walls while satisfying adjacency and minimum color constraints.
 
-        # Dynamically compute adjacency list
-        adjacency_list = self._calculate_adjacency_list(surfaces)
-        print("Adjacency List:", adjacency_list)  # Debugging: Verify adjacency list
+        `self.search` selects the strategy: "backtracking" visits surfaces in input
+        order, "propagation" uses MRV/degree ordering with forward checking,
+        "backjumping" uses conflict-directed backjumping with nogood learning and
+        "local_search" runs min-conflicts with tabu and restarts (see
+        `algorithims.local_search`), which is fast on large buildings but cannot
+        prove that no coloring exists. The nodes explored (moves, for local search),
+        backtracks and prunings (colors rejected by a constraint) are left in
+        `self.stats`.
+        """
+        if adjacency_list is None:
+            # Dynamically compute adjacency list
+            adjacency_list = self._calculate_adjacency_list(surfaces)
+            logger.debug("Adjacency list: %s", adjacency_list)
+        ids, areas = self._surface_columns(surfaces)
+        return self.assign_colors(ids, areas, adjacency_list)
 
-        def backtrack(index):
-            if index == len(surfaces):
-                # Ensure at least the required number of colors are used
-                if len(set(color_assignment.values())) < self.min_colors:
-                    return False
-                return True
+    def assign_colors(self, ids, areas, adjacency_list):
+        """Solve for surfaces given as id and area columns plus a precomputed adjacency list."""
+        self.stats = {"nodes": 0, "backtracks": 0, "prunings": 0}
+        state = CSPState(ids, areas, adjacency_list, self.colors, self.paint_availability)
+        if self._trivially_infeasible(state):
+            solved = False
+        elif self.search == "propagation":
+            solved = self._propagation_search(state)
+        elif self.search == "backjumping":
+            solved = self._backjumping_search(state)
+        elif self.search == "local_search":
+            solved = MinConflictsSearch(self.seed, self.max_steps).solve(
+                state, self.min_colors, self.stats, self.progress, self.progress_interval)
+        else:
+            solved = self._backtracking_search(state)
 
-            surface = surfaces[index]
-            surface_id = surface["id"]
-            surface_area = surface["height"] * surface["width"]
+        if not solved:
+            logger.info("Failed to find a valid color assignment.")
+            return None, None
+        return state.to_solution()
 
-            for color in self.colors:
-                # Check paint availability
-                if paint_usage[color] + surface_area > self.paint_availability.get(color, float('inf')):
-                    continue
+    def derive(self, colors=None, paint_availability=None, min_colors=None, **settings):
+        """Return an assigner with the same search settings and some constraints replaced.
 
-                # Check adjacency constraints
-                if all(color_assignment.get(neighbor) != color for neighbor in adjacency_list[surface_id]):
-                    # Assign the color
-                    color_assignment[surface_id] = color
-                    paint_usage[color] += surface_area
+        Keyword arguments (`search`, `seed`, `progress`, ...) replace search settings as well.
+        """
+        options = dict(search=self.search, use_ac3=self.use_ac3, max_nogoods=self.max_nogoods,
+                       progress=self.progress, progress_interval=self.progress_interval,
+                       seed=self.seed, max_steps=self.max_steps)
+        options.update(settings)
+        return CSPColorAssigner(
+            self.colors if colors is None else colors,
+            self.paint_availability if paint_availability is None else paint_availability,
+            self.adjacency_constraint,
+            self.min_colors if min_colors is None else min_colors,
+            **options,
+        )
 
-                    if backtrack(index + 1):
-                        return True
+    def iter_solutions(self, surfaces, k=None, unique=False, adjacency_list=None):
+        """Yield valid `(color_assignment, paint_usage)` pairs one at a time.
 
-                    # Backtrack
-                    paint_usage[color] -= surface_area
-                    del color_assignment[surface_id]
+        Solutions are produced lazily by the propagation search (adjacency treated as
+        symmetric), whatever `self.search` is, so nothing but the search state is
+        kept between them. With `unique=True` colorings that only differ by renaming
+        colors are reported once: the search runs over partitions of the surfaces
+        into color classes and each partition is given the colors by matching the
+        largest classes to the largest paint budgets. `k` caps the number yielded.
+        """
+        if adjacency_list is None:
+            adjacency_list = self._calculate_adjacency_list(surfaces)
+        ids, areas = self._surface_columns(surfaces)
+        self.stats = {"nodes": 0, "backtracks": 0, "prunings": 0}
+        state = CSPState(ids, areas, adjacency_list, self.colors, self.paint_availability)
+        if self._trivially_infeasible(state):
+            return
+        solutions = self._partition_solutions(state) if unique else self._propagation_solutions(state)
+        for found, solved in enumerate(solutions):
+            if k is not None and found >= k:
+                return
+            yield solved.to_solution()
 
-            return False
+    def optimize(self, surfaces, objective, adjacency_list=None, node_limit=None):
+        """Find the valid assignment minimizing `objective` by branch-and-bound.
 
-        if backtrack(0):
-            return color_assignment, paint_usage
-        else:
-            print("Failed to find a valid color assignment.")
+        `objective` is one of `algorithims.objectives` (or its name / spec dict). The
+        propagation search runs with colors tried cheapest first; every solution
+        found becomes the incumbent and any partial assignment whose admissible lower
+        bound cannot beat it is pruned. Returns `(color_assignment, paint_usage)` of
+        the best solution, or `(None, None)`. `self.stats` reports its "cost", the
+        "lower_bound" proven and whether it is "optimal"; with `node_limit` the search
+        may stop early with the best solution found so far.
+        """
+        objective = make_objective(objective)
+        if adjacency_list is None:
+            adjacency_list = self._calculate_adjacency_list(surfaces)
+        ids, areas = self._surface_columns(surfaces)
+        self.stats = {"nodes": 0, "backtracks": 0, "prunings": 0, "solutions": 0}
+        state = CSPState(ids, areas, adjacency_list, self.colors, self.paint_availability)
+        if self._trivially_infeasible(state):
+            logger.info("Failed to find a valid color assignment.")
             return None, None
+        objective.bind(state)
+        root_bound = objective.bound(state)
+        best = {"cost": float("inf"), "solution": (None, None)}
+
+        def prune(state):
+            if node_limit is not None and self.stats["nodes"] >= node_limit:
+                raise _SearchStopped
+            return objective.bound(state) >= best["cost"] - 1e-9
+
+        def choose(state, var, untried):
+            options = [color for color in range(state.color_count) if untried >> color & 1]
+            return min(options, key=lambda color: objective.rank(state, var, color))
+
+        stopped = False
+        try:
+            for solved in self._propagation_solutions(state, prune, choose):
+                cost = objective.value(solved)
+                if cost < best["cost"]:
+                    best["cost"] = cost
+                    best["solution"] = solved.to_solution()
+                    self.stats["solutions"] += 1
+                    self.stats["cost"] = cost
+                    if self.progress is not None:
+                        self.progress(self.stats)
+        except _SearchStopped:
+            stopped = True
+
+        found = best["solution"][0] is not None
+        self.stats["cost"] = best["cost"] if found else None
+        self.stats["optimal"] = found and not stopped
+        self.stats["lower_bound"] = best["cost"] if self.stats["optimal"] else root_bound
+        if not found:
+            logger.info("Failed to find a valid color assignment.")
+        return best["solution"]
+
+    def _partition_solutions(self, state):
+        """Yield one coloring per partition of the surfaces into valid color classes.
+
+        Surfaces are visited by decreasing degree; each one joins an existing class or
+        opens the next one, so every partition is generated exactly once. Budgets only
+        constrain which color a whole class can take, and a class of area `a` fits any
+        color with at least `a` paint left, so classes can be given colors exactly
+        when, sorted by decreasing area, each fits the budget of the same rank.
+        """
+        stats = self.stats
+        count, color_count = state.count, state.color_count
+        neighbours, areas = state.neighbours, state.areas
+        by_capacity = sorted(range(color_count), key=lambda color: -state.capacity[color])
+        capacities = [state.capacity[color] for color in by_capacity]
+        order = sorted(range(count), key=lambda var: (-len(neighbours[var]), -areas[var]))
+        class_of = [-1] * count
+        class_areas = []
+        class_sizes = []
+        next_class = [0] * (count + 1)
+        depth = 0
+
+        def fits(class_areas):
+            return all(area <= capacity for area, capacity in zip(sorted(class_areas, reverse=True), capacities))
+
+        while depth >= 0:
+            if depth == count:
+                if len(class_areas) >= self.min_colors:
+                    # Largest class gets the largest budget
+                    ranked = sorted(range(len(class_areas)), key=lambda c: -class_areas[c])
+                    color_of = {c: by_capacity[rank] for rank, c in enumerate(ranked)}
+                    for var in range(count):
+                        state.assign(var, color_of[class_of[var]])
+                    yield state
+                    for var in range(count):
+                        state.unassign(var)
+                depth -= 1
+                continue
+
+            var = order[depth]
+            if class_of[var] != -1:
+                # Undo the previous choice for this surface
+                previous = class_of[var]
+                class_of[var] = -1
+                class_areas[previous] -= areas[var]
+                class_sizes[previous] -= 1
+                if not class_sizes[previous]:
+                    # Only the newest class can empty: its opener is the deepest of its members
+                    class_areas.pop()
+                    class_sizes.pop()
+                stats["backtracks"] += 1
+
+            choice = next_class[depth]
+            taken = {class_of[neighbour] for neighbour in neighbours[var]}
+            opened = len(class_areas)
+            while choice <= min(opened, color_count - 1):
+                if choice not in taken:
+                    trial = class_areas + [0] if choice == opened else list(class_areas)
+                    trial[choice] += areas[var]
+                    if fits(trial) and len(trial) + count - depth - 1 >= self.min_colors:
+                        break
+                choice += 1
+            if choice > min(opened, color_count - 1):
+                next_class[depth] = 0
+                depth -= 1
+                continue
+
+            if choice == opened:
+                class_areas.append(0)
+                class_sizes.append(0)
+            class_areas[choice] += areas[var]
+            class_sizes[choice] += 1
+            class_of[var] = choice
+            stats["nodes"] += 1
+            next_class[depth] = choice + 1
+            depth += 1
+
+    def _trivially_infeasible(self, state):
+        """Cheap checks that rule out any assignment before searching."""
+        if self.min_colors > min(state.color_count, state.count):
+            return True
+        if any(not domain for domain in state.domains):
+            return True  # a surface no color has enough paint for
+        return sum(state.areas) > sum(state.capacity)
+
+    def _backtracking_search(self, state):
+        """Chronological backtracking in input order, trying colors in list order.
+
+        Adjacency is checked against the already-assigned neighbours each surface lists.
+        The state is updated inline rather than through `CSPState.assign` to keep the
+        per-node cost down.
+        """
+        count, color_count = state.count, state.color_count
+        assignment, usage, color_counts = state.assignment, state.usage, state.color_counts
+        areas, capacity, out_neighbours = state.areas, state.capacity, state.out_neighbours
+        next_color = [0] * (count + 1)
+        depth = 0
+        used_colors = 0
+        nodes = backtracks = prunings = reported = 0
+        progress, interval = self.progress, self.progress_interval
+        next_report = interval if progress is not None else -1
+        solved = False
+
+        while True:
+            color = color_count
+            if depth == count:
+                # Ensure at least the required number of colors are used
+                if used_colors >= self.min_colors:
+                    solved = True
+                    break
+            else:
+                area = areas[depth]
+                neighbours = out_neighbours[depth]
+                color = next_color[depth]
+                while color < color_count:
+                    # Check paint availability, then adjacency constraints
+                    if usage[color] + area <= capacity[color]:
+                        for neighbour in neighbours:
+                            if assignment[neighbour] == color:
+                                break
+                        else:
+                            break
+                    color += 1
+                prunings += color - next_color[depth]
+
+            if color < color_count:
+                # Assign the color and descend
+                assignment[depth] = color
+                usage[color] += area
+                if not color_counts[color]:
+                    used_colors += 1
+                color_counts[color] += 1
+                nodes += 1
+                next_color[depth] = color + 1
+                depth += 1
+                next_color[depth] = 0
+                if nodes == next_report:
+                    self.stats["nodes"] += nodes - reported
+                    reported = nodes
+                    next_report += interval
+                    progress(self.stats)
+            else:
+                # Backtrack
+                depth -= 1
+                if depth < 0:
+                    break
+                color = assignment[depth]
+                assignment[depth] = -1
+                usage[color] -= areas[depth]
+                color_counts[color] -= 1
+                if not color_counts[color]:
+                    used_colors -= 1
+                backtracks += 1
+
+        state.used_colors = used_colors
+        state.assigned = depth
+        self.stats["nodes"] += nodes - reported
+        self.stats["backtracks"] += backtracks
+        self.stats["prunings"] += prunings
+        return solved
+
+    def _propagation_search(self, state):
+        """Backtracking with MRV/degree ordering, forward checking and optional AC-3.
+
+        Adjacency is treated as symmetric: two surfaces must differ if either one
+        lists the other as a neighbour.
+        """
+        return next(self._propagation_solutions(state), None) is not None
+
+    def _propagation_solutions(self, state, prune=None, choose=None):
+        """Yield every complete assignment the propagation search reaches, in order.
+
+        The state holds the solution while the caller handles it; resuming the
+        generator backtracks from it to look for the next one. `prune(state)` can cut
+        a partial assignment after propagation, and `choose(state, var, untried)`
+        picks the next color from a bitmask instead of the lowest one.
+        """
+        stats = self.stats
+        progress, interval = self.progress, self.progress_interval
+        if any(not domain for domain in state.domains):
+            return
+        if self.use_ac3 and not state.ac3():
+            return
+        if state.count < self.min_colors:
+            return
+        if state.count == 0:
+            yield state
+            return
+
+        var = state.select_variable()
+        # Each frame holds the surface, its untried colors and the trail mark to undo to
+        stack = [[var, state.domains[var], state.mark()]]
+        while stack:
+            frame = stack[-1]
+            var, untried, mark = frame
+            if state.assignment[var] != -1:
+                # Coming back from a failed (or already reported) assignment of this surface
+                state.unassign(var)
+                state.undo(mark)
+                stats["backtracks"] += 1
+            if not untried:
+                stack.pop()
+                continue
+
+            if choose is None:
+                color = (untried & -untried).bit_length() - 1
+            else:
+                color = choose(state, var, untried)
+            frame[1] = untried & ~(1 << color)
+            stats["nodes"] += 1
+            if progress is not None and not stats["nodes"] % interval:
+                progress(stats)
+            state.assign(var, color)
+
+            if (not state.forward_check(var, color)
+                    or state.used_colors + state.count - state.assigned < self.min_colors
+                    or (prune is not None and prune(state))):
+                stats["prunings"] += 1
+                continue
+            next_var = state.select_variable()
+            if next_var == -1:
+                yield state
+                continue
+            stack.append([next_var, state.domains[next_var], state.mark()])
+
+    def _backjumping_search(self, state):
+        """Conflict-directed backjumping with a bounded nogood store.
+
+        Surfaces are visited by decreasing degree, then area. Every rejected color is
+        explained by the earlier assignments that caused it: the neighbour holding the
+        color, the surfaces using up its paint budget, or a recorded nogood. When a
+        surface runs out of colors the search jumps straight back to the latest
+        surface in that explanation, and the explanation is stored as a nogood so the
+        same combination is never explored again.
+        """
+        stats = self.stats
+        stats.update(backjumps=0, nogoods=0, nogood_prunings=0, peak_nogoods=0)
+        count, color_count = state.count, state.color_count
+        assignment, usage, color_counts = state.assignment, state.usage, state.color_counts
+        areas, capacity, neighbours = state.areas, state.capacity, state.neighbours
+        store = NogoodStore(max_nogoods=self.max_nogoods)
+        progress, interval = self.progress, self.progress_interval
+
+        order = sorted(range(count), key=lambda var: (-len(neighbours[var]), -areas[var]))
+        depth_of = [-1] * count
+        members = [[] for _ in range(color_count)]  # depths painted with each color, in order
+        conflicts = [set() for _ in range(count)]
+        causes = [set() for _ in range(count)]
+        next_color = [0] * count
+        depth = 0
+
+        def explain(var, color, depth):
+            """Return the depths and cause that forbid `var = color`, or None if it is allowed."""
+            culprit = -1
+            for neighbour in neighbours[var]:
+                if assignment[neighbour] == color and (culprit == -1 or depth_of[neighbour] < culprit):
+                    culprit = depth_of[neighbour]
+            if culprit != -1:
+                return {culprit}, "adjacency"
+            if usage[color] + areas[var] > capacity[color]:
+                # The shallowest surfaces that already exhaust the budget on their own
+                excess = areas[var] - capacity[color]
+                culprits = set()
+                for member in members[color]:
+                    culprits.add(member)
+                    excess += areas[order[member]]
+                    if excess > 0:
+                        break
+                return culprits, f"paint:{self.colors[color]}"
+            nogood = store.violated(var, color, assignment)
+            if nogood is not None:
+                stats["nogood_prunings"] += 1
+                return {depth_of[other] for other, _ in nogood if other != var}, "nogood"
+            used_after = state.used_colors + (0 if color_counts[color] else 1)
+            if used_after + count - depth - 1 < self.min_colors:
+                return set(range(depth)), "min_colors"
+            return None
+
+        try:
+            while depth < count:
+                var = order[depth]
+                color = next_color[depth]
+                while color < color_count:
+                    conflict = explain(var, color, depth)
+                    if conflict is None:
+                        break
+                    conflicts[depth].update(conflict[0])
+                    causes[depth].add(conflict[1])
+                    color += 1
+                stats["prunings"] += color - next_color[depth]
+
+                if color < color_count:
+                    state.assign(var, color)
+                    depth_of[var] = depth
+                    members[color].append(depth)
+                    stats["nodes"] += 1
+                    if progress is not None and not stats["nodes"] % interval:
+                        progress(stats)
+                    next_color[depth] = color + 1
+                    depth += 1
+                    if depth < count:
+                        next_color[depth] = 0
+                        conflicts[depth] = set()
+                        causes[depth] = set()
+                    continue
+
+                # Dead end: every color of this surface is explained by earlier assignments
+                conflict = conflicts[depth]
+                if not conflict:
+                    return False
+                if store.add([(order[culprit], assignment[order[culprit]]) for culprit in conflict], causes[depth]):
+                    stats["nogoods"] += 1
+                target = max(conflict)
+                conflicts[target].update(culprit for culprit in conflict if culprit != target)
+                causes[target].update(causes[depth])
+                for undone in range(depth - 1, target - 1, -1):
+                    undone_var = order[undone]
+                    members[assignment[undone_var]].pop()
+                    state.unassign(undone_var)
+                    depth_of[undone_var] = -1
+                stats["backtracks"] += 1
+                stats["backjumps"] += depth - 1 - target
+                depth = target
+            return True
+        finally:
+            stats["peak_nogoods"] = store.peak
 
     def _calculate_adjacency_list(self, surfaces):
-        """Dynamically calculate adjacency list based on surface corners."""
+        """Dynamically calculate adjacency list based on surface corners.
+
+        Surfaces are hashed by corner and edge line so only pairs that can touch are
+        compared; the result is identical to `_calculate_adjacency_list_bruteforce`.
+        """
+        corners = self._surface_corners(surfaces)
+        index = SurfaceSpatialIndex()
+        for i, surface_corners in enumerate(corners):
+            index.add(i, surface_corners)
+
+        neighbours = [[] for _ in surfaces]
+        for i, j in index.candidate_pairs():
+            if self._corners_adjacent(corners[i], corners[j]):
+                neighbours[i].append(j)
+            if self._corners_adjacent(corners[j], corners[i]):
+                neighbours[j].append(i)
+
+        ids, _ = self._surface_columns(surfaces)
+        adjacency_list = {surface_id: [] for surface_id in ids}
+        for i, surface_id in enumerate(ids):
+            adjacency_list[surface_id].extend(ids[j] for j in sorted(neighbours[i]))
+        return adjacency_list
+
+    def _calculate_adjacency_list_bruteforce(self, surfaces):
+        """Reference O(n^2) adjacency computation comparing every pair of surfaces."""
         adjacency_list = {surface["id"]: [] for surface in surfaces}
         for i, surface1 in enumerate(surfaces):
             for j, surface2 in enumerate(surfaces):
@@ -62,9 +538,12 @@ class CSPColorAssigner:
 
     def _are_adjacent(self, surface1, surface2):
         """Determine if two surfaces are adjacent based on their corner coordinates."""
-        corners1 = self.compute_surface_corners(surface1)
-        corners2 = self.compute_surface_corners(surface2)
+        return self._corners_adjacent(
+            self.compute_surface_corners(surface1), self.compute_surface_corners(surface2)
+        )
 
+    def _corners_adjacent(self, corners1, corners2):
+        """Determine if two surfaces, given by their corners, are adjacent."""
         # Check if any of the corners overlap or share a boundary
         for corner1 in corners1:
             for corner2 in corners2:
@@ -73,12 +552,28 @@ class CSPColorAssigner:
 
         # Check for shared edges (for surfaces that don't overlap completely)
         # Compare x or y coordinates of the corners for shared boundaries
-        for i in range(4):
-            for j in range(4):
+        for i in range(len(corners1)):
+            for j in range(len(corners2)):
                 if self._is_edge_shared(corners1[i], corners1[(i+1)%4], corners2[j], corners2[(j+1)%4]):
                     return True  # Shared edge
         return False
 
+    def _surface_columns(self, surfaces):
+        """Return the ids and areas of the surfaces as plain lists."""
+        if isinstance(surfaces, SurfaceTable):
+            return surfaces.ids.tolist(), surfaces.area.tolist()
+        return [surface["id"] for surface in surfaces], [surface["height"] * surface["width"] for surface in surfaces]
+
+    def _surface_corners(self, surfaces):
+        """Return the corners of every surface as used by the adjacency test."""
+        if isinstance(surfaces, SurfaceTable):
+            known = surfaces.orientation != UNKNOWN
+            return [
+                [tuple(corner) for corner in corners] if is_known else []
+                for corners, is_known in zip(surfaces.adjacency_corners.tolist(), known.tolist())
+            ]
+        return [self.compute_surface_corners(surface) for surface in surfaces]
+
     def _is_edge_shared(self, corner1, corner2, corner3, corner4):
         """Check if two edges (formed by corner pairs) share a boundary."""
         return (
@@ -95,22 +590,23 @@ class CSPColorAssigner:
         x, y, z = surface["position"]
         height = surface["height"]
         width = surface["width"]
-        
-        if surface["orientation"] == "Vertical-x":
+        orientation = normalize_orientation(surface["orientation"])
+
+        if orientation == "Vertical-x":
             return [
                 (x, y, z),
                 (x + width, y, z),
                 (x + width, y + height, z),
                 (x, y + height, z)
             ]
-        elif surface["orientation"] == "Vertical-y":
+        elif orientation == "Vertical-y":
             return [
                 (x, y, z),
                 (x, y + width, z),
                 (x, y + width, z + height),
                 (x, y, z + height)
             ]
-        elif surface["orientation"] == "horizontal":
+        elif orientation == "horizontal":
             return [
                 (x, y, z),
                 (x + width, y, z),
@@ -119,37 +615,38 @@ class CSPColorAssigner:
             ]
         return []
 
-# Sample input
-sample_data = {
-    "surfaces": [
-        {"id": 1, "height": 3, "width": 6, "position": [0, 0, 0], "orientation": "Vertical-x"},
-        {"id": 2, "height": 3, "width": 6, "position": [0, 6, 0], "orientation": "Vertical-x"},
-        {"id": 3, "height": 3, "width": 6, "position": [6, 0, 0], "orientation": "Vertical-y"},
-        {"id": 4, "height": 3, "width": 6, "position": [0, 0, 0], "orientation": "Vertical-y"}
-    ],
-    "colors": ["Red", "Yellow", "Blue", "White", "Black"],
-    "time_per_meter": 2.0,
-    "max_time": 30000.0,
-    "paint_availability": {
-        "White": 150,
-        "Yellow": 2000,
-        "Blue": 150,
-        "Black": 1005,
-        "Red": 1000
-    },
-    "adjacency_constraint": True,
-    "min_colors": 2,
-    "start_position": [0, 0, 0]
-}
-
-# Create the CSPColorAssigner instance
-assigner = CSPColorAssigner(
-    colors=sample_data["colors"],
-    paint_availability=sample_data["paint_availability"],
-    adjacency_constraint=sample_data["adjacency_constraint"],
-    min_colors=sample_data["min_colors"]
-)
-
-# Compute adjacency list and color assignment
-adjacency_list = assigner._calculate_adjacency_list(sample_data["surfaces"])
-print("Adjacency List:", adjacency_list)
+if __name__ == "__main__":
+    # Sample input
+    sample_data = {
+        "surfaces": [
+            {"id": 1, "height": 3, "width": 6, "position": [0, 0, 0], "orientation": "Vertical-x"},
+            {"id": 2, "height": 3, "width": 6, "position": [0, 6, 0], "orientation": "Vertical-x"},
+            {"id": 3, "height": 3, "width": 6, "position": [6, 0, 0], "orientation": "Vertical-y"},
+            {"id": 4, "height": 3, "width": 6, "position": [0, 0, 0], "orientation": "Vertical-y"}
+        ],
+        "colors": ["Red", "Yellow", "Blue", "White", "Black"],
+        "time_per_meter": 2.0,
+        "max_time": 30000.0,
+        "paint_availability": {
+            "White": 150,
+            "Yellow": 2000,
+            "Blue": 150,
+            "Black": 1005,
+            "Red": 1000
+        },
+        "adjacency_constraint": True,
+        "min_colors": 2,
+        "start_position": [0, 0, 0]
+    }
+
+    # Create the CSPColorAssigner instance
+    assigner = CSPColorAssigner(
+        colors=sample_data["colors"],
+        paint_availability=sample_data["paint_availability"],
+        adjacency_constraint=sample_data["adjacency_constraint"],
+        min_colors=sample_data["min_colors"]
+    )
+
+    # Compute adjacency list and color assignment
+    adjacency_list = assigner._calculate_adjacency_list(sample_data["surfaces"])
+    print("Adjacency List:", adjacency_list)
@@ -0,0 +1,174 @@
+from array import array
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count("1")
+
+
+class CSPState:
+    """Dense integer encoding of a coloring problem and the solver state on top of it.
+
+    Surfaces are remapped to indices `0..n-1` and colors to bit positions `0..k-1`.
+    Each surface keeps a bitmask domain, neighbour lists are integer arrays and paint
+    usage is a fixed-size list indexed by color. Domain reductions are recorded on a
+    trail so a search can undo everything done since a `mark()` in one call.
+    """
+
+    def __init__(self, ids, areas, adjacency_list, colors, paint_availability):
+        self.ids = list(ids)
+        self.colors = list(colors)
+        self.count = len(self.ids)
+        self.color_count = len(self.colors)
+        self.full_mask = (1 << self.color_count) - 1
+        self.areas = list(areas)
+        self.capacity = [paint_availability.get(color, float('inf')) for color in self.colors]
+
+        index = {surface_id: i for i, surface_id in enumerate(self.ids)}
+        # Neighbours exactly as listed in the adjacency list (used by the chronological search)
+        self.out_neighbours = [
+            array("i", [index[neighbour_id] for neighbour_id in adjacency_list[surface_id]])
+            for surface_id in self.ids
+        ]
+        # Symmetric neighbours: two surfaces must differ if either one lists the other
+        symmetric = [set() for _ in range(self.count)]
+        for i, neighbours in enumerate(self.out_neighbours):
+            for j in neighbours:
+                if i != j:
+                    symmetric[i].add(j)
+                    symmetric[j].add(i)
+        self.neighbours = [array("i", sorted(neighbours)) for neighbours in symmetric]
+        # Surfaces by decreasing area, for pruning colors whose remaining paint runs short
+        self.by_area = sorted(range(self.count), key=lambda i: -self.areas[i])
+
+        self.assignment = [-1] * self.count
+        self.usage = [0] * self.color_count
+        self.color_counts = [0] * self.color_count
+        self.used_colors = 0
+        self.assigned = 0
+        self.domains = [self.affordable_mask(i) for i in range(self.count)]
+        self.trail = []
+
+    def affordable_mask(self, var):
+        """Colors with enough paint left for surface `var`."""
+        mask = 0
+        area = self.areas[var]
+        for color in range(self.color_count):
+            if self.usage[color] + area <= self.capacity[color]:
+                mask |= 1 << color
+        return mask
+
+    def assign(self, var, color):
+        self.assignment[var] = color
+        self.usage[color] += self.areas[var]
+        if not self.color_counts[color]:
+            self.used_colors += 1
+        self.color_counts[color] += 1
+        self.assigned += 1
+
+    def unassign(self, var):
+        color = self.assignment[var]
+        self.assignment[var] = -1
+        self.usage[color] -= self.areas[var]
+        self.color_counts[color] -= 1
+        if not self.color_counts[color]:
+            self.used_colors -= 1
+        self.assigned -= 1
+
+    def prune(self, var, mask):
+        """Remove the colors in `mask` from the domain of `var`; return the new domain."""
+        domain = self.domains[var]
+        if domain & mask:
+            self.trail.append((var, domain))
+            domain &= ~mask
+            self.domains[var] = domain
+        return domain
+
+    def mark(self):
+        return len(self.trail)
+
+    def undo(self, mark):
+        """Restore every domain pruned since `mark`."""
+        trail = self.trail
+        domains = self.domains
+        while len(trail) > mark:
+            var, domain = trail.pop()
+            domains[var] = domain
+
+    def forward_check(self, var, color):
+        """Prune `color` from unassigned neighbours and from surfaces it can no longer paint.
+
+        Returns False as soon as a domain is wiped out.
+        """
+        bit = 1 << color
+        assignment = self.assignment
+        domains = self.domains
+        for neighbour in self.neighbours[var]:
+            if assignment[neighbour] == -1 and domains[neighbour] & bit:
+                if not self.prune(neighbour, bit):
+                    return False
+        remaining = self.capacity[color] - self.usage[color]
+        areas = self.areas
+        for other in self.by_area:
+            if areas[other] <= remaining:
+                break
+            if assignment[other] == -1 and domains[other] & bit:
+                if not self.prune(other, bit):
+                    return False
+        return True
+
+    def select_variable(self):
+        """Pick the unassigned surface with the fewest colors left, ties broken by degree.
+
+        Returns -1 once every surface is assigned.
+        """
+        assignment = self.assignment
+        domains = self.domains
+        best_size = None
+        tied = []
+        for var in range(self.count):
+            if assignment[var] == -1:
+                size = popcount(domains[var])
+                if best_size is None or size < best_size:
+                    best_size = size
+                    tied = [var]
+                elif size == best_size:
+                    tied.append(var)
+        if not tied:
+            return -1
+        if len(tied) == 1:
+            return tied[0]
+        best, best_degree = -1, -1
+        for var in tied:
+            degree = 0
+            for neighbour in self.neighbours[var]:
+                if assignment[neighbour] == -1:
+                    degree += 1
+            if degree > best_degree:
+                best, best_degree = var, degree
+        return best
+
+    def ac3(self):
+        """Make every adjacency arc consistent; return False if a domain empties."""
+        domains = self.domains
+        queue = [(i, j) for i in range(self.count) for j in self.neighbours[i]]
+        while queue:
+            i, j = queue.pop()
+            # A value of i only loses its support when j is forced to that same value
+            forced = domains[j]
+            if forced and not forced & (forced - 1) and domains[i] & forced:
+                if not self.prune(i, forced):
+                    return False
+                queue.extend((k, i) for k in self.neighbours[i] if k != j)
+        return True
+
+    def to_solution(self):
+        """Convert the current full assignment back to `(color_assignment, paint_usage)` dicts."""
+        color_assignment = {}
+        paint_usage = {color: 0 for color in self.colors}
+        for var, color in enumerate(self.assignment):
+            color_name = self.colors[color]
+            color_assignment[self.ids[var]] = color_name
+            paint_usage[color_name] += self.areas[var]
+        return color_assignment, paint_usage
@@ -0,0 +1,84 @@
+import heapq
+import os
+
+import numpy as np
+
+from algorithims.spatial_index import PointKDTree
+
+
+class FleetPlanner:
+    """Share the surfaces between several robots and plan a tour for each.
+
+    Surfaces are claimed one at a time: the robot whose estimated finishing time
+    (painting time plus straight-line travel along what it claimed) is lowest takes
+    the surface closest to its last one. The clusters stay compact and their
+    estimated times balanced. Each robot's tour is then planned by `pathfinder`,
+    on a process pool when there are several robots and enough surfaces, so every
+    tour gets the whole time budget.
+    """
+
+    def __init__(self, pathfinder, time_model, workers=None, min_parallel_size=500):
+        self.pathfinder = pathfinder
+        self.time_model = time_model
+        self.workers = workers or os.cpu_count() or 1
+        # Below this many surfaces the pool costs more than it saves
+        self.min_parallel_size = min_parallel_size
+
+    def partition(self, starts, positions, areas):
+        """Row indices of the surfaces each robot paints, in the order they were claimed."""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        areas = np.asarray(areas, dtype=float)
+        clusters = [[] for _ in starts]
+        if not len(positions) or not len(starts):
+            return [np.asarray(cluster, dtype=np.intp) for cluster in clusters]
+        painting = (areas * self.time_model.time_per_meter).tolist()
+        coordinates = positions.tolist()
+        tree = PointKDTree(positions)
+        current = [list(map(float, start)) for start in starts]
+        queue = [(0.0, robot) for robot in range(len(starts))]
+        while len(tree):
+            load, robot = heapq.heappop(queue)
+            cluster = clusters[robot]
+            row = tree.nearest(current[robot], cluster[-1] if cluster else None)
+            tree.remove(row)
+            travel = float(np.linalg.norm(np.subtract(coordinates[row], current[robot])))
+            cluster.append(row)
+            current[robot] = coordinates[row]
+            heapq.heappush(queue, (load + painting[row] + travel / self.time_model.robot_speed, robot))
+        return [np.asarray(cluster, dtype=np.intp) for cluster in clusters]
+
+    def plan(self, starts, positions, areas, cost_matrices=None):
+        """Each robot's surfaces as row indices in visiting order.
+
+        `cost_matrices` optionally gives, per robot, an (n + 1, n + 1) travel cost
+        matrix over its start (row 0) and all surfaces, as `plan_route` takes one.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        clusters = self.partition(starts, positions, areas)
+        parallel = (self.workers > 1 and len(starts) > 1 and len(positions) >= self.min_parallel_size)
+        budget = self.pathfinder.time_budget
+        if budget is not None and not parallel:
+            budget /= max(1, len(starts))  # the tours are planned one after another
+        jobs = []
+        for robot, (start, rows) in enumerate(zip(starts, clusters)):
+            matrix = None
+            if cost_matrices is not None:
+                route = np.concatenate(([0], rows + 1))
+                matrix = cost_matrices[robot][np.ix_(route, route)]
+            jobs.append((self.pathfinder, start, positions[rows], budget, matrix))
+        if parallel:
+            # Imported here: the pool machinery costs more to import than most plans take
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                orders = list(pool.map(_plan_tour, jobs))
+        else:
+            orders = [_plan_tour(job) for job in jobs]
+        return [rows[order] for rows, order in zip(clusters, orders)]
+
+
+def _plan_tour(job):
+    """Order one robot's goals; runs in a worker process."""
+    pathfinder, start, goals, budget, matrix = job
+    if not len(goals):
+        return np.zeros(0, dtype=np.intp)
+    return pathfinder.plan(start, goals, time_budget=budget, cost_matrix=matrix)
@@ -0,0 +1,257 @@
+import heapq
+import random
+
+
+class MinConflictsSearch:
+    """Min-conflicts local search with a tabu list and random restarts.
+
+    Every surface gets a color from the start, greedily by decreasing degree; the
+    search then repeatedly moves a surface involved in a violation to the color that
+    lowers the penalty most, where the penalty is
+
+    - one per pair of adjacent surfaces sharing a color,
+    - the paint used beyond each color's budget, in units of the mean surface area,
+    - one per color missing to reach `min_colors`.
+
+    Each step samples `sample` surfaces in violation and makes the best move among
+    them. Moving a surface back to a color it just left is tabu for about
+    `tabu_tenure` steps (unless that reaches a new best penalty), and with
+    probability `noise` a random move is made instead. For every surface the number
+    of neighbours holding each color is kept up to date, so a move is evaluated in
+    O(1) and applied in O(degree). After `stall_steps` steps without a new best
+    penalty the search restarts from a fresh greedy assignment.
+
+    The search is reproducible for a given `seed`. It can only find colorings, not
+    prove there is none: running out of `max_steps` returns False either way.
+    """
+
+    def __init__(self, seed=0, max_steps=None, stall_steps=None, tabu_tenure=10, noise=0.02, sample=8):
+        self.seed = seed
+        self.max_steps = max_steps
+        self.stall_steps = stall_steps
+        self.tabu_tenure = tabu_tenure
+        self.noise = noise
+        self.sample = sample
+
+    def solve(self, state, min_colors, stats, progress=None, interval=10000):
+        """Assign every surface of `state` (a fresh `CSPState`); return True if the result is valid.
+
+        Moves and restarts are added to `stats` (moves also count as nodes) with the
+        lowest penalty reached; `progress(stats)` is called every `interval` moves.
+        """
+        count, color_count = state.count, state.color_count
+        stats.update(moves=0, restarts=0, best_penalty=None)
+        if count == 0 or color_count == 0:
+            return count == 0 and min_colors <= 0
+        rng = random.Random(self.seed)
+        neighbours, areas, capacity = state.neighbours, state.areas, state.capacity
+        unit = (sum(areas) / count) or 1.0
+        max_steps = self.max_steps if self.max_steps is not None else 100 * count + 100000
+        stall_steps = self.stall_steps if self.stall_steps is not None else 10 * count + 10000
+        tenure, noise, sample = self.tabu_tenure, self.noise, self.sample
+
+        nodes = stats["nodes"]
+        steps = 0
+        next_report = interval if progress is not None else -1
+        while True:
+            assignment, usage, color_counts, holding = self._greedy(state, rng, unit, min_colors)
+            # holding[var * color_count + color]: neighbours of var with that color
+            conflicted, position = [], [-1] * count
+            edges = 0
+            for var in range(count):
+                clashes = holding[var * color_count + assignment[var]]
+                if clashes:
+                    edges += clashes
+                    position[var] = len(conflicted)
+                    conflicted.append(var)
+            edges //= 2
+            members = [[] for _ in range(color_count)]
+            member_position = [0] * count
+            for var, color in enumerate(assignment):
+                member_position[var] = len(members[color])
+                members[color].append(var)
+            used = sum(1 for color in range(color_count) if color_counts[color])
+            overrun = sum(max(0.0, usage[color] - capacity[color]) for color in range(color_count))
+
+            penalty = edges + overrun / unit + max(0, min_colors - used)
+            best, last_improvement = penalty, steps
+            tabu = [0] * (count * color_count)
+
+            while color_count > 1 and steps < max_steps and steps - last_improvement < stall_steps:
+                excess = [usage[color] - capacity[color] for color in range(color_count)]
+                overdrawn = [color for color in range(color_count) if excess[color] > 1e-9]
+                if not conflicted and not overdrawn and used >= min_colors:
+                    break
+
+                # Surfaces to consider: in a conflict, in an overdrawn color or, while
+                # colors are missing, in a color shared with others
+                pool = []
+                shared = None
+                for _ in range(sample):
+                    if conflicted and (not overdrawn or rng.random() < 0.5):
+                        pool.append(conflicted[rng.randrange(len(conflicted))])
+                    else:
+                        if overdrawn:
+                            color = overdrawn[rng.randrange(len(overdrawn))]
+                        else:
+                            if shared is None:
+                                shared = [color for color in range(color_count) if color_counts[color] > 1]
+                            color = shared[rng.randrange(len(shared))]
+                        pool.append(members[color][rng.randrange(len(members[color]))])
+
+                if rng.random() < noise:
+                    var = pool[rng.randrange(len(pool))]
+                    color = rng.randrange(color_count - 1)
+                    color += color >= assignment[var]
+                else:
+                    var = color = -1
+                    best_delta = None
+                    shortfall = max(0, min_colors - used)
+                    for candidate in pool:
+                        current = assignment[candidate]
+                        area = areas[candidate]
+                        row = candidate * color_count
+                        # Penalty change of taking the surface off its color
+                        leave = -holding[row + current]
+                        if excess[current] > 0:
+                            leave -= (excess[current] - max(0.0, excess[current] - area)) / unit
+                        missing = min_colors - used + (1 if color_counts[current] == 1 else 0)
+                        if missing > 0:
+                            leave += missing - shortfall
+                        for option in range(color_count):
+                            if option == current:
+                                continue
+                            delta = leave + holding[row + option]
+                            if excess[option] + area > 0:
+                                delta += (excess[option] + area - max(0.0, excess[option])) / unit
+                            if missing > 0 and not color_counts[option]:
+                                delta -= 1
+                            if tabu[row + option] > steps and penalty + delta >= best - 1e-9:
+                                continue
+                            if best_delta is None or delta < best_delta - 1e-9 or (
+                                    delta <= best_delta + 1e-9 and rng.random() < 0.5):
+                                var, color, best_delta = candidate, option, delta
+                    if var == -1:
+                        # Every move is tabu: take a random one
+                        var = pool[rng.randrange(len(pool))]
+                        color = rng.randrange(color_count - 1)
+                        color += color >= assignment[var]
+
+                # Apply the move
+                current = assignment[var]
+                area = areas[var]
+                row = var * color_count
+                edges += holding[row + color] - holding[row + current]
+                for neighbour in neighbours[var]:
+                    base = neighbour * color_count
+                    holding[base + current] -= 1
+                    holding[base + color] += 1
+                    neighbour_color = assignment[neighbour]
+                    if neighbour_color == current and not holding[base + current]:
+                        self._discard(conflicted, position, neighbour)
+                    elif neighbour_color == color and position[neighbour] == -1:
+                        position[neighbour] = len(conflicted)
+                        conflicted.append(neighbour)
+                if holding[row + color] and position[var] == -1:
+                    position[var] = len(conflicted)
+                    conflicted.append(var)
+                elif not holding[row + color] and position[var] != -1:
+                    self._discard(conflicted, position, var)
+
+                self._discard(members[current], member_position, var)
+                member_position[var] = len(members[color])
+                members[color].append(var)
+                overrun -= max(0.0, usage[current] - capacity[current]) + max(0.0, usage[color] - capacity[color])
+                usage[current] -= area
+                usage[color] += area
+                overrun += max(0.0, usage[current] - capacity[current]) + max(0.0, usage[color] - capacity[color])
+                color_counts[current] -= 1
+                color_counts[color] += 1
+                used += (1 if color_counts[color] == 1 else 0) - (0 if color_counts[current] else 1)
+                assignment[var] = color
+                tabu[row + current] = steps + tenure + rng.randrange(tenure + 1) + (6 * len(conflicted)) // 10
+
+                penalty = edges + overrun / unit + max(0, min_colors - used)
+                steps += 1
+                if penalty < best - 1e-9:
+                    best, last_improvement = penalty, steps
+                if steps == next_report:
+                    stats.update(nodes=nodes + steps, moves=steps, best_penalty=best)
+                    next_report += interval
+                    progress(stats)
+
+            stats.update(nodes=nodes + steps, moves=steps)
+            if stats["best_penalty"] is None or best < stats["best_penalty"]:
+                stats["best_penalty"] = best
+            if not conflicted and used >= min_colors and all(
+                    usage[color] <= capacity[color] + 1e-9 for color in range(color_count)):
+                break
+            if steps >= max_steps or color_count < 2:
+                return False
+            stats["restarts"] += 1
+
+        state.assignment[:] = assignment
+        state.usage[:] = usage
+        state.color_counts[:] = color_counts
+        state.used_colors = used
+        state.assigned = count
+        return True
+
+    @staticmethod
+    def _greedy(state, rng, unit, min_colors):
+        """Color surfaces in DSATUR order, each with its cheapest color.
+
+        The next surface is the one whose neighbours already hold the most distinct
+        colors (then the highest degree, then at random). Colors are tried first fit
+        in a shuffled palette, so each restart starts elsewhere. Returns the
+        assignment, paint usage, color counts and the neighbour color table.
+        """
+        count, color_count = state.count, state.color_count
+        neighbours, areas, capacity = state.neighbours, state.areas, state.capacity
+        assignment = [-1] * count
+        usage = [0.0] * color_count
+        color_counts = [0] * color_count
+        holding = [0] * (count * color_count)
+        saturation = [0] * count
+        used = 0
+        palette = list(range(color_count))
+        rng.shuffle(palette)
+        ties = [rng.random() for _ in range(count)]
+        heap = [(0, -len(neighbours[var]), ties[var], var) for var in range(count)]
+        heapq.heapify(heap)
+        while heap:
+            negative, _, _, var = heapq.heappop(heap)
+            if assignment[var] != -1 or -negative != saturation[var]:
+                continue  # already colored, or an outdated entry
+            area = areas[var]
+            row = var * color_count
+            best = color = None
+            for option in palette:
+                value = holding[row + option] + max(0.0, usage[option] + area - max(usage[option], capacity[option])) / unit
+                if used < min_colors and not color_counts[option]:
+                    value -= 0.5  # open the colors min_colors asks for early
+                if best is None or value < best - 1e-9:
+                    best, color = value, option
+            assignment[var] = color
+            usage[color] += area
+            if not color_counts[color]:
+                used += 1
+            color_counts[color] += 1
+            for neighbour in neighbours[var]:
+                index = neighbour * color_count + color
+                holding[index] += 1
+                if holding[index] == 1 and assignment[neighbour] == -1:
+                    saturation[neighbour] += 1
+                    heapq.heappush(heap, (-saturation[neighbour], -len(neighbours[neighbour]), ties[neighbour],
+                                          neighbour))
+        return assignment, usage, color_counts, holding
+
+    @staticmethod
+    def _discard(bag, position, item):
+        """Remove `item` from a list used as an unordered bag, in O(1)."""
+        index = position[item]
+        last = bag.pop()
+        if last != item:
+            bag[index] = last
+            position[last] = index
+        position[item] = -1
@@ -0,0 +1,355 @@
+import heapq
+import math
+import numpy as np
+
+from algorithims.surface_table import SurfaceTable, VERTICAL_X, VERTICAL_Y, HORIZONTAL
+
+SQRT2 = math.sqrt(2.0)
+# Grid steps for 8-connected A*: (row offset, column offset, cost in cells)
+MOVES = [(0, 1, 1.0), (0, -1, 1.0), (1, 0, 1.0), (-1, 0, 1.0),
+         (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2)]
+
+
+class NavigationGrid:
+    """Occupancy grid of the floor plan, used to measure travel around walls.
+
+    Vertical walls are projected onto the x-y plane and rasterized into blocked cells;
+    a vertical surface lying inside a longer collinear wall is a door and opens that
+    stretch again. Every surface is reached from an approach cell: the free cell
+    nearest to the middle of its footprint, preferring cells the robot can reach
+    from the start position.
+
+    Travel costs between approach cells are any-angle shortest paths. Shortest paths
+    around axis-aligned walls only bend next to obstacle corners, so the grid is
+    reduced to a visibility graph over those corner cells (line of sight is checked
+    on the grid) and solved once for all pairs; the cost between two approach cells
+    is then the straight line if they see each other, otherwise the best path via
+    the corners they see. Costs are cached per pair of cells. `route` runs A*
+    directly on the grid for a single pair.
+    """
+
+    def __init__(self, surfaces, resolution=0.5, margin=2.0):
+        self.surfaces = surfaces if isinstance(surfaces, SurfaceTable) else SurfaceTable.from_records(surfaces)
+        self.resolution = resolution
+        walls, doors = self._wall_segments(self.surfaces)
+        self.anchors = self._anchors(self.surfaces)
+
+        points = np.vstack([walls[:, :2], walls[:, 2:], self.anchors]) if len(walls) else self.anchors
+        low = np.floor(points.min(axis=0) - margin) if len(points) else np.zeros(2)
+        high = np.ceil(points.max(axis=0) + margin) if len(points) else np.ones(2)
+        self.origin = low
+        self.shape = (int(math.ceil((high[1] - low[1]) / resolution)) + 1,
+                      int(math.ceil((high[0] - low[0]) / resolution)) + 1)
+
+        self.blocked = np.zeros(self.shape, dtype=bool)
+        for segment in walls:
+            self.blocked[self._segment_cells(segment, inclusive=True)] = True
+        for segment in doors:
+            self.blocked[self._segment_cells(segment, inclusive=False)] = False
+        self.free = ~self.blocked
+        # Summed area table of blocked cells, padded with a leading row and column of zeros
+        self._blocked_sum = np.pad(self.blocked.cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0)))
+
+        self._reachable = {}      # start cell -> bool grid of cells reachable from it
+        self._corners = None      # (K, 2) corner cells of the visibility graph
+        self._corner_costs = None  # (K, K) all-pairs costs between corners
+        self._sight = {}          # cell -> (K,) straight-line costs to visible corners
+        self._via = {}            # cell -> (K,) best costs to reach every corner
+        self._ids = {}            # cell -> row of the cost table
+        self._table = np.full((0, 0), np.nan)  # pairwise costs in grid cells, NaN if not computed
+        self.stats = {"searches": 0, "cached": 0, "unreachable": 0}
+
+    # ----- Geometry -----
+
+    @staticmethod
+    def _wall_segments(table):
+        """Split vertical surfaces into wall and door segments `(x0, y0, x1, y1)` in plan."""
+        x, y = table.position[:, 0], table.position[:, 1]
+        along_x = table.orientation == VERTICAL_X
+        along_y = table.orientation == VERTICAL_Y
+        segments = np.column_stack([x, y, x + np.where(along_x, table.width, 0.0),
+                                    y + np.where(along_y, table.width, 0.0)])
+        vertical = along_x | along_y
+        segments = segments[vertical]
+        lines = {}
+        for i, (x0, y0, x1, y1) in enumerate(segments):
+            key = ("y", y0, 0) if y0 == y1 else ("x", x0, 1)
+            lines.setdefault(key, []).append(i)
+        door = np.zeros(len(segments), dtype=bool)
+        for (_, _, axis), members in lines.items():
+            for i in members:
+                low, high = segments[i, 1 - axis], segments[i, 3 - axis]
+                door[i] = any(
+                    segments[j, 1 - axis] <= low and high <= segments[j, 3 - axis]
+                    and segments[j, 3 - axis] - segments[j, 1 - axis] > high - low
+                    for j in members if j != i
+                )
+        return segments[~door], segments[door]
+
+    @staticmethod
+    def _anchors(table):
+        """Plan point each surface is painted from: the middle of its footprint."""
+        x, y = table.position[:, 0].copy(), table.position[:, 1].copy()
+        x += np.where((table.orientation == VERTICAL_X) | (table.orientation == HORIZONTAL), table.width / 2, 0.0)
+        y += np.where(table.orientation == VERTICAL_Y, table.width / 2, 0.0)
+        y += np.where(table.orientation == HORIZONTAL, table.height / 2, 0.0)
+        return np.column_stack([x, y])
+
+    def cell(self, point):
+        """Grid cell `(row, column)` containing the plan point `(x, y)`."""
+        column = int((point[0] - self.origin[0]) // self.resolution)
+        row = int((point[1] - self.origin[1]) // self.resolution)
+        return min(max(row, 0), self.shape[0] - 1), min(max(column, 0), self.shape[1] - 1)
+
+    def point(self, cell):
+        """Plan coordinates of the centre of `cell`."""
+        return (float(self.origin[0] + (cell[1] + 0.5) * self.resolution),
+                float(self.origin[1] + (cell[0] + 0.5) * self.resolution))
+
+    def _segment_cells(self, segment, inclusive):
+        """Index expression for the cells covered by an axis-aligned segment.
+
+        Walls cover both end cells so that walls meeting at a corner close it; doors
+        stop short of the cell holding their far end.
+        """
+        x0, y0, x1, y1 = (segment - np.tile(self.origin, 2)) / self.resolution
+        first_row, first_column = int(math.floor(y0)), int(math.floor(x0))
+        if inclusive:
+            last_row, last_column = int(math.floor(y1)), int(math.floor(x1))
+        else:
+            last_row = max(first_row, int(math.ceil(y1)) - 1)
+            last_column = max(first_column, int(math.ceil(x1)) - 1)
+        return slice(first_row, last_row + 1), slice(first_column, last_column + 1)
+
+    # ----- Reachability and approach cells -----
+
+    def reachable(self, start_cell):
+        """Boolean grid of the free cells connected to `start_cell`."""
+        if start_cell not in self._reachable:
+            free = self.free
+            seen = np.zeros(self.shape, dtype=bool)
+            seen[start_cell] = free[start_cell]
+            # Grow the region one step at a time until it stops changing
+            while True:
+                grown = seen.copy()
+                grown[1:] |= seen[:-1]
+                grown[:-1] |= seen[1:]
+                grown[:, 1:] |= seen[:, :-1]
+                grown[:, :-1] |= seen[:, 1:]
+                grown &= free
+                if (grown == seen).all():
+                    break
+                seen = grown
+            self._reachable[start_cell] = seen
+        return self._reachable[start_cell]
+
+    def approach_cells(self, start, radius=4):
+        """Cell each surface is painted from, preferring cells reachable from `start`."""
+        start_cell = self._nearest_free(self.cell(start), self.free, radius) or self.cell(start)
+        reachable = self.reachable(start_cell)
+        cells = []
+        for anchor in self.anchors:
+            cell = self.cell(anchor)
+            cells.append(self._nearest_free(cell, reachable, radius)
+                         or self._nearest_free(cell, self.free, radius) or cell)
+        return start_cell, cells
+
+    def _nearest_free(self, cell, allowed, radius):
+        """Closest cell within `radius` cells of `cell` where `allowed` holds, or None."""
+        row_low, column_low = max(cell[0] - radius, 0), max(cell[1] - radius, 0)
+        window = allowed[row_low:cell[0] + radius + 1, column_low:cell[1] + radius + 1]
+        rows, columns = np.nonzero(window)
+        if not len(rows):
+            return None
+        rows, columns = rows + row_low, columns + column_low
+        best = int(np.argmin((rows - cell[0]) ** 2 + (columns - cell[1]) ** 2))
+        return int(rows[best]), int(columns[best])
+
+    # ----- Travel costs -----
+
+    def cost_matrix(self, start, points=None):
+        """Travel costs between the start and the approach cells of the surfaces.
+
+        Returns an (n + 1, n + 1) matrix in plan units where row/column 0 is `start`
+        and `1..n` are the surfaces in table order. Height differences between the
+        surface positions are added in quadrature. Pairs with no path (a closed room
+        with nobody inside, say) fall back to the straight line.
+        """
+        start_cell, cells = self.approach_cells(start)
+        cells = [start_cell] + cells
+        positions = np.vstack([[start[0], start[1], start[2] if len(start) > 2 else 0.0],
+                               self.surfaces.position]) if points is None else np.asarray(points, dtype=float)
+        plan = self.pair_costs(cells) * self.resolution
+        straight = np.linalg.norm(positions[:, None, :2] - positions[None, :, :2], axis=2)
+        missing = ~np.isfinite(plan)
+        plan[missing] = straight[missing]
+        self.stats["unreachable"] = int(missing.sum() // 2)
+        height = positions[:, None, 2] - positions[None, :, 2]
+        return np.sqrt(plan * plan + height * height)
+
+    def pair_costs(self, cells):
+        """Symmetric matrix of shortest path lengths (in cells) between `cells`."""
+        ids = self._cell_ids(cells)
+        costs = self._table[np.ix_(ids, ids)]
+        firsts, seconds = np.nonzero(np.triu(np.isnan(costs), 1))
+        self.stats["cached"] += len(ids) * (len(ids) - 1) // 2 - len(firsts)
+        if len(firsts):
+            self.stats["searches"] += len(firsts)
+            found = self._costs_between(np.array(cells, dtype=float) + 0.5, cells, firsts, seconds)
+            costs[firsts, seconds] = costs[seconds, firsts] = found
+            self._table[ids[firsts], ids[seconds]] = self._table[ids[seconds], ids[firsts]] = found
+        np.fill_diagonal(costs, 0.0)
+        return costs
+
+    def _cell_ids(self, cells):
+        """Rows of `cells` in the cost table, growing the table for new cells."""
+        ids = np.array([self._ids.setdefault(cell, len(self._ids)) for cell in cells], dtype=np.intp)
+        size = len(self._table)
+        if len(self._ids) > size:
+            grown = np.full((max(len(self._ids), 2 * size), max(len(self._ids), 2 * size)), np.nan)
+            grown[:size, :size] = self._table
+            self._table = grown
+        return ids
+
+    def _costs_between(self, centres, cells, firsts, seconds):
+        corners, _ = self._corner_graph()
+        direct = np.hypot(*(centres[firsts] - centres[seconds]).T)
+        direct[~self._visible(centres[firsts], centres[seconds])] = np.inf
+        if not len(corners):
+            return direct
+        # Best path through the corners: leave the first cell towards any corner and
+        # arrive at the second from a corner it sees (usually only a handful)
+        involved, position = np.unique(np.concatenate([firsts, seconds]), return_inverse=True)
+        reach, sight = self._corner_sight([cells[i] for i in involved])
+        via = np.full((len(involved), len(involved)), np.inf)
+        for column, row in enumerate(sight):
+            seen = np.flatnonzero(np.isfinite(row))
+            if len(seen):
+                via[:, column] = (reach[:, seen] + row[seen]).min(axis=1)
+        return np.minimum(direct, via[position[:len(firsts)], position[len(firsts):]])
+
+    def _corner_graph(self):
+        """Corner cells of the reachable free space and all-pairs costs between them."""
+        if self._corners is None:
+            free = np.pad(self.free, 1, constant_values=True)
+            corner = np.zeros(self.shape, dtype=bool)
+            rows, columns = self.shape
+            centre = free[1:rows + 1, 1:columns + 1]
+            for row_step, column_step in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                diagonal = free[1 + row_step:rows + 1 + row_step, 1 + column_step:columns + 1 + column_step]
+                beside = free[1:rows + 1, 1 + column_step:columns + 1 + column_step]
+                above = free[1 + row_step:rows + 1 + row_step, 1:columns + 1]
+                corner |= centre & ~diagonal & beside & above
+            self._corners = np.argwhere(corner)
+            count = len(self._corners)
+            centres = self._corners + 0.5
+            costs = np.full((count, count), np.inf)
+            np.fill_diagonal(costs, 0.0)
+            firsts, seconds = np.triu_indices(count, 1)
+            if len(firsts):
+                visible = self._visible(centres[firsts], centres[seconds])
+                firsts, seconds = firsts[visible], seconds[visible]
+                lengths = np.hypot(*(centres[firsts] - centres[seconds]).T)
+                costs[firsts, seconds] = costs[seconds, firsts] = lengths
+            for k in range(count):
+                np.minimum(costs, costs[:, k:k + 1] + costs[k:k + 1, :], out=costs)
+            self._corner_costs = costs
+        return self._corners, self._corner_costs
+
+    def _corner_sight(self, cells):
+        """Straight-line and best costs from each of `cells` to every corner.
+
+        Returns two (len(cells), K) arrays; rows are cached per cell.
+        """
+        corners, corner_costs = self._corner_graph()
+        missing = [cell for cell in dict.fromkeys(cells) if cell not in self._sight]
+        if missing:
+            centres = np.array(missing, dtype=float) + 0.5
+            corner_centres = corners + 0.5
+            firsts = np.repeat(np.arange(len(missing)), len(corners))
+            seconds = np.tile(np.arange(len(corners)), len(missing))
+            sight = np.hypot(*(centres[firsts] - corner_centres[seconds]).T)
+            sight[~self._visible(centres[firsts], corner_centres[seconds])] = np.inf
+            sight = sight.reshape(len(missing), len(corners))
+            for cell, row in zip(missing, sight):
+                seen = np.flatnonzero(np.isfinite(row))
+                self._sight[cell] = row
+                self._via[cell] = ((row[seen, None] + corner_costs[seen]).min(axis=0) if len(seen)
+                                   else np.full(len(corners), np.inf))
+        return (np.array([self._via[cell] for cell in cells]),
+                np.array([self._sight[cell] for cell in cells]))
+
+    def _visible(self, starts, ends, block=8):
+        """Line of sight between cell centres, sampled at most half a cell apart.
+
+        Segments whose bounding box holds no blocked cell are visible outright (summed
+        area table). A wall is a solid line of cells, so a segment crossing it always
+        leaves a sample inside; pairs are dropped as soon as a sample hits a blocked
+        cell, so long blocked segments cost little.
+        """
+        low = np.minimum(starts, ends).astype(np.intp)
+        high = np.maximum(starts, ends).astype(np.intp) + 1
+        blocked_cells = self._blocked_sum
+        boxed = (blocked_cells[high[:, 0], high[:, 1]] - blocked_cells[low[:, 0], high[:, 1]]
+                 - blocked_cells[high[:, 0], low[:, 1]] + blocked_cells[low[:, 0], low[:, 1]])
+        visible = np.ones(len(starts), dtype=bool)
+        active = np.flatnonzero(boxed > 0)
+        origin = starts[active]
+        delta = ends[active] - origin
+        # At least one sample, so a segment within one cell does not divide by zero
+        steps = np.maximum(np.ceil(2 * np.abs(delta).max(axis=1)), 1)
+        offsets = np.arange(block)
+        first = 1
+        while len(active):
+            t = np.minimum(first + offsets, steps[:, None]) / steps[:, None]
+            rows = (origin[:, 0:1] + t * delta[:, 0:1]).astype(np.intp)
+            columns = (origin[:, 1:2] + t * delta[:, 1:2]).astype(np.intp)
+            hit = self.blocked[rows, columns].any(axis=1)
+            visible[active[hit]] = False
+            first += block
+            keep = ~hit & (steps > first)
+            active, origin, delta, steps = active[keep], origin[keep], delta[keep], steps[keep]
+        return visible
+
+    def route(self, start, goal):
+        """A* over the grid from plan point `start` to `goal`.
+
+        Moves are 8-connected without cutting blocked corners and the heuristic is the
+        octile distance. Returns the plan points of the cells on the path, or None
+        if `goal` cannot be reached.
+        """
+        source, target = self.cell(start), self.cell(goal)
+        rows, columns = self.shape
+        free = self.free
+        if not free[source] or not free[target]:
+            return None
+
+        def heuristic(cell):
+            row_gap, column_gap = abs(cell[0] - target[0]), abs(cell[1] - target[1])
+            return max(row_gap, column_gap) + (SQRT2 - 1) * min(row_gap, column_gap)
+
+        best = {source: 0.0}
+        parent = {source: None}
+        frontier = [(heuristic(source), 0.0, source)]
+        while frontier:
+            _, cost, cell = heapq.heappop(frontier)
+            if cell == target:
+                path = []
+                while cell is not None:
+                    path.append(self.point(cell))
+                    cell = parent[cell]
+                return path[::-1]
+            if cost > best[cell]:
+                continue
+            for row_step, column_step, step_cost in MOVES:
+                row, column = cell[0] + row_step, cell[1] + column_step
+                if not (0 <= row < rows and 0 <= column < columns) or not free[row, column]:
+                    continue
+                if row_step and column_step and not (free[cell[0], column] and free[row, cell[1]]):
+                    continue
+                next_cost = cost + step_cost
+                if next_cost < best.get((row, column), math.inf):
+                    best[(row, column)] = next_cost
+                    parent[(row, column)] = cell
+                    heapq.heappush(frontier, (next_cost + heuristic((row, column)), next_cost, (row, column)))
+        return None
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+
+class NogoodStore:
+    """Bounded store of learned nogoods.
+
+    A nogood is a set of `(surface, color)` assignments that cannot all hold in a
+    solution, together with the causes (adjacency, a paint budget, min_colors) that
+    led to it. The store is indexed by assignment so a candidate assignment can be
+    checked against every nogood it belongs to; when full, the oldest nogoods are
+    evicted first.
+    """
+
+    def __init__(self, max_nogoods=10000, max_length=12):
+        self.max_nogoods = max_nogoods
+        self.max_length = max_length
+        self._nogoods = OrderedDict()  # key -> (assignments, causes)
+        self._index = {}  # (surface, color) -> set of keys
+        self._next_key = 0
+        self.recorded = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self._nogoods)
+
+    def add(self, assignments, causes):
+        """Record a nogood; return False if it is too long to be worth keeping."""
+        if not assignments or len(assignments) > self.max_length or self.max_nogoods <= 0:
+            return False
+        assignments = frozenset(assignments)
+        key = self._next_key
+        self._next_key += 1
+        self._nogoods[key] = (assignments, frozenset(causes))
+        for assignment in assignments:
+            self._index.setdefault(assignment, set()).add(key)
+        self.recorded += 1
+        while len(self._nogoods) > self.max_nogoods:
+            self._evict()
+        self.peak = max(self.peak, len(self._nogoods))
+        return True
+
+    def violated(self, var, color, assignment):
+        """Return a nogood containing `(var, color)` whose other assignments all hold.
+
+        `assignment` maps every surface index to its current color (-1 if unassigned).
+        """
+        for key in self._index.get((var, color), ()):
+            assignments = self._nogoods[key][0]
+            if all(other == var or assignment[other] == other_color for other, other_color in assignments):
+                return assignments
+        return None
+
+    def _evict(self):
+        key, (assignments, _) = self._nogoods.popitem(last=False)
+        for assignment in assignments:
+            keys = self._index[assignment]
+            keys.discard(key)
+            if not keys:
+                del self._index[assignment]
@@ -0,0 +1,121 @@
+class PaintCost:
+    """Total cost of the paint used, `area * weight` summed over the surfaces.
+
+    `weights` maps color names to a cost per square meter; missing colors cost 1.
+    The bound prices every unassigned surface at the cheapest color left in its
+    domain.
+    """
+
+    name = "paint_cost"
+
+    def __init__(self, weights=None):
+        self.weights = dict(weights or {})
+        self._weights = []
+
+    def bind(self, state):
+        self._weights = [float(self.weights.get(color, 1.0)) for color in state.colors]
+        return self
+
+    def value(self, state):
+        return sum(used * weight for used, weight in zip(state.usage, self._weights))
+
+    def bound(self, state):
+        weights = self._weights
+        total = self.value(state)
+        for var in range(state.count):
+            if state.assignment[var] == -1:
+                domain = state.domains[var]
+                total += state.areas[var] * min(weights[color] for color in _colors(domain))
+        return total
+
+    def rank(self, state, var, color):
+        return self._weights[color]
+
+
+class ColorCount:
+    """Number of distinct colors used.
+
+    The bound adds one color when some unassigned surface cannot take any color
+    already in use.
+    """
+
+    name = "colors"
+
+    def bind(self, state):
+        return self
+
+    def value(self, state):
+        return state.used_colors
+
+    def bound(self, state):
+        used = 0
+        for color, count in enumerate(state.color_counts):
+            if count:
+                used |= 1 << color
+        for var in range(state.count):
+            if state.assignment[var] == -1 and not state.domains[var] & used:
+                return state.used_colors + 1
+        return state.used_colors
+
+    def rank(self, state, var, color):
+        return 0 if state.color_counts[color] else 1
+
+
+class StockBalance:
+    """Largest share of any color's stock used up, to keep leftovers balanced.
+
+    Colors without a limit count as never depleted. The bound also places every
+    unassigned surface on the color its share would grow least.
+    """
+
+    name = "balance"
+
+    def bind(self, state):
+        return self
+
+    def _share(self, state, color, extra=0.0):
+        capacity = state.capacity[color]
+        if capacity == float("inf"):
+            return 0.0
+        if capacity <= 0:
+            return 0.0 if not state.usage[color] + extra else float("inf")
+        return (state.usage[color] + extra) / capacity
+
+    def value(self, state):
+        return max((self._share(state, color) for color in range(state.color_count)), default=0.0)
+
+    def bound(self, state):
+        best = self.value(state)
+        for var in range(state.count):
+            if state.assignment[var] == -1:
+                area = state.areas[var]
+                best = max(best, min(self._share(state, color, area) for color in _colors(state.domains[var])))
+        return best
+
+    def rank(self, state, var, color):
+        return self._share(state, color, state.areas[var])
+
+
+OBJECTIVES = {objective.name: objective for objective in (PaintCost, ColorCount, StockBalance)}
+
+
+def make_objective(spec):
+    """Build an objective from its name or a dict such as `{"type": "paint_cost", "weights": {...}}`."""
+    if spec is None or hasattr(spec, "bound"):
+        return spec
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    options = dict(spec)
+    kind = options.pop("type", None)
+    if kind not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{kind}'. Expected one of {tuple(OBJECTIVES)}.")
+    return OBJECTIVES[kind](**options)
+
+
+def _colors(mask):
+    """Color indices set in a domain bitmask."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
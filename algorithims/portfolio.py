@@ -0,0 +1,200 @@
+import logging
+import multiprocessing
+import os
+import random
+from multiprocessing.connection import wait
+
+from algorithims.csp import SearchCancelled
+
+logger = logging.getLogger(__name__)
+
+VARIABLE_ORDERS = ("input", "degree", "area", "random")
+COLOR_ORDERS = ("input", "paint", "reversed", "random")
+
+# Strategies that differ in search, variable ordering, color ordering and seed.
+# Complete searches come first so that, with fewer workers than configurations,
+# one of them is always running and can prove infeasibility.
+DEFAULT_PORTFOLIO = (
+    {"search": "propagation"},
+    {"search": "local_search", "seed": 0},
+    {"search": "backjumping", "colors": "paint"},
+    {"search": "backtracking", "variables": "degree", "colors": "paint"},
+    {"search": "propagation", "variables": "random", "colors": "random", "seed": 1},
+    {"search": "local_search", "colors": "random", "seed": 1},
+)
+
+
+class PortfolioSolver:
+    """Race differently configured searches on separate processes; the first valid coloring wins.
+
+    Each configuration is a dict with any of
+
+    - "search": a `CSPColorAssigner.SEARCH_STRATEGIES` entry (default: the assigner's),
+    - "variables": surface order given to the search, one of `VARIABLE_ORDERS`
+      ("degree" and "area" put the most constrained or largest surfaces first),
+    - "colors": color order, one of `COLOR_ORDERS` ("paint" tries the colors with
+      the most paint first),
+    - "seed": seed of the "random" orders and of the local search.
+
+    Every configuration runs at once in its own process (at most `workers` of them
+    if given; the operating system shares the cores between the rest), and when
+    one returns a coloring every other process is killed. All of them get the
+    constraints the assigner's own search enforces (see `_enforced_adjacency`), so
+    a complete search (anything but "local_search") that finds no coloring proves
+    there is none and ends the race as well; a local search that gives up only
+    frees its worker for the next configuration.
+    """
+
+    def __init__(self, assigner, configurations=None, workers=None, poll_interval=0.1):
+        self.assigner = assigner
+        self.configurations = list(configurations or DEFAULT_PORTFOLIO)
+        self.workers = workers or len(self.configurations)
+        # Seconds between checks of the assigner's progress callback (for cancellation)
+        self.poll_interval = poll_interval
+        self.stats = {}
+        for configuration in self.configurations:
+            self._check(configuration)
+
+    def color_assign(self, surfaces, adjacency_list=None):
+        """Same contract as `CSPColorAssigner.color_assign`.
+
+        `self.stats` holds the winner's search counters plus "winner" (its
+        configuration) and "started" (the number of configurations launched).
+        """
+        assigner = self.assigner
+        if adjacency_list is None:
+            adjacency_list = assigner._calculate_adjacency_list(surfaces)
+        ids, areas = assigner._surface_columns(surfaces)
+        adjacency_list = self._enforced_adjacency(ids, adjacency_list)
+        self.stats = {"nodes": 0, "winner": None, "started": 0}
+
+        pending = list(reversed(self.configurations))
+        running = {}  # connection -> (process, configuration)
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    configuration = pending.pop()
+                    running.update([self._start(configuration, ids, areas, adjacency_list)])
+                    self.stats["started"] += 1
+
+                ready = wait(list(running), timeout=self.poll_interval)
+                if not ready and assigner.progress is not None:
+                    assigner.progress(self.stats)  # may raise SearchCancelled
+                for connection in ready:
+                    process, configuration = running.pop(connection)
+                    try:
+                        assignment, usage, stats = connection.recv()
+                    except EOFError:
+                        logger.warning("Portfolio search %s exited with code %s.", configuration, process.exitcode)
+                        assignment = usage = stats = None
+                    self._stop(process, connection)
+                    if assignment is not None:
+                        self.stats.update(stats, winner=configuration)
+                        logger.info("Portfolio won by %s.", configuration)
+                        return assignment, usage
+                    if stats is not None and configuration.get("search", assigner.search) != "local_search":
+                        self.stats.update(stats, winner=configuration)
+                        logger.info("Failed to find a valid color assignment (proven by %s).", configuration)
+                        return None, None
+        finally:
+            for connection, (process, _) in running.items():
+                self._stop(process, connection)
+        logger.info("Failed to find a valid color assignment.")
+        return None, None
+
+    def _enforced_adjacency(self, ids, adjacency_list):
+        """The constraints the assigner's own search enforces, listed both ways.
+
+        Chronological backtracking only keeps a surface apart from the neighbours it
+        lists that come before it in input order; the other searches from every
+        neighbour listed either way. Given this list, every configuration enforces
+        the same constraints whatever its search and variable order, so the race
+        finds a coloring exactly when the assigner alone would.
+        """
+        directed = self.assigner.search == "backtracking"
+        position = {surface_id: i for i, surface_id in enumerate(ids)}
+        symmetric = {surface_id: set() for surface_id in ids}
+        for surface_id in ids:
+            for neighbour_id in adjacency_list[surface_id]:
+                if neighbour_id != surface_id and not (directed and position[neighbour_id] > position[surface_id]):
+                    symmetric[surface_id].add(neighbour_id)
+                    symmetric[neighbour_id].add(surface_id)
+        return {surface_id: sorted(neighbours, key=position.get) for surface_id, neighbours in symmetric.items()}
+
+    def _start(self, configuration, ids, areas, adjacency_list):
+        solver = self._configure(configuration)
+        ids, areas = self._order(configuration, ids, areas, adjacency_list)
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_solve, args=(child, solver, ids, areas, adjacency_list, os.getpid()),
+                                          daemon=True)
+        process.start()
+        child.close()
+        return parent, (process, configuration)
+
+    @staticmethod
+    def _stop(process, connection):
+        if process.is_alive():
+            process.kill()
+        process.join()
+        connection.close()
+
+    def _configure(self, configuration):
+        """An assigner with the search, seed and color order of `configuration`."""
+        assigner = self.assigner
+        seed = configuration.get("seed", assigner.seed)
+        colors = list(assigner.colors)
+        order = configuration.get("colors", "input")
+        if order == "paint":
+            colors.sort(key=lambda color: -assigner.paint_availability.get(color, float('inf')))
+        elif order == "reversed":
+            colors.reverse()
+        elif order == "random":
+            random.Random(seed).shuffle(colors)
+        # The callback stays in this process (the child checks its parent instead), so
+        # nothing unpicklable reaches the worker under the spawn start method
+        return assigner.derive(colors, search=configuration.get("search", assigner.search), seed=seed,
+                               progress=None)
+
+    @staticmethod
+    def _order(configuration, ids, areas, adjacency_list):
+        """The id and area columns in the variable order of `configuration`."""
+        order = configuration.get("variables", "input")
+        rows = list(range(len(ids)))
+        if order == "degree":
+            rows.sort(key=lambda row: -len(adjacency_list[ids[row]]))
+        elif order == "area":
+            rows.sort(key=lambda row: -areas[row])
+        elif order == "random":
+            random.Random(configuration.get("seed", 0)).shuffle(rows)
+        else:
+            return ids, areas
+        return [ids[row] for row in rows], [areas[row] for row in rows]
+
+    def _check(self, configuration):
+        unknown = set(configuration) - {"search", "variables", "colors", "seed"}
+        if unknown:
+            raise ValueError(f"Unknown portfolio settings {sorted(unknown)}.")
+        search = configuration.get("search", self.assigner.search)
+        if search not in self.assigner.SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy '{search}'. Expected one of "
+                             f"{self.assigner.SEARCH_STRATEGIES}.")
+        if configuration.get("variables", "input") not in VARIABLE_ORDERS:
+            raise ValueError(f"Unknown variable order '{configuration['variables']}'. Expected one of {VARIABLE_ORDERS}.")
+        if configuration.get("colors", "input") not in COLOR_ORDERS:
+            raise ValueError(f"Unknown color order '{configuration['colors']}'. Expected one of {COLOR_ORDERS}.")
+
+
+def _solve(connection, solver, ids, areas, adjacency_list, parent):
+    """Run one portfolio search and send `(assignment, usage, stats)`; runs in a worker process."""
+    def check_parent(stats):
+        # Give up once the racing process is gone (killed by a batch timeout, say)
+        if os.getppid() != parent:
+            raise SearchCancelled
+
+    solver.progress = check_parent
+    try:
+        assignment, usage = solver.assign_colors(ids, areas, adjacency_list)
+    except SearchCancelled:
+        return
+    connection.send((assignment, usage, solver.stats))
+    connection.close()
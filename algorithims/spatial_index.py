@@ -0,0 +1,265 @@
+from collections import defaultdict
+
+import numpy as np
+
+
+class SurfaceSpatialIndex:
+    """Hash of surface corners and axis-aligned edge lines.
+
+    Two surfaces can only be adjacent if they share a corner or if one of their
+    edges lies on the same constant-x (or constant-y) line as an edge of the other
+    with overlapping extents. The index buckets corners by their exact coordinates
+    and edges by the line they lie on, so only those surfaces are ever compared.
+    """
+
+    def __init__(self):
+        self._corners = defaultdict(set)   # corner -> keys touching it
+        self._lines = {
+            "x": defaultdict(list),  # x -> [(y_min, y_max, key)] for edges of constant x
+            "y": defaultdict(list),  # y -> [(x_min, x_max, key)] for edges of constant y
+        }
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def add(self, key, corners):
+        """Register the corners (and the edges they form) of a surface under `key`."""
+        if key in self._entries:
+            self.remove(key)
+        corners = [tuple(corner) for corner in corners]
+        edges = self._edge_keys(corners)
+        self._entries[key] = (corners, edges)
+        for corner in corners:
+            self._corners[corner].add(key)
+        for axis, line, interval in edges:
+            self._lines[axis][line].append((interval[0], interval[1], key))
+
+    def remove(self, key):
+        """Forget a previously added surface."""
+        corners, edges = self._entries.pop(key)
+        for corner in corners:
+            bucket = self._corners[corner]
+            bucket.discard(key)
+            if not bucket:
+                del self._corners[corner]
+        for axis, line, interval in edges:
+            lines = self._lines[axis]
+            bucket = lines[line]
+            bucket.remove((interval[0], interval[1], key))
+            if not bucket:
+                del lines[line]
+
+    def candidates(self, key):
+        """Return the keys of surfaces that may touch the surface stored under `key`."""
+        corners, edges = self._entries[key]
+        found = set()
+        for corner in corners:
+            found.update(self._corners.get(corner, ()))
+        for axis, line, (low, high) in edges:
+            for other_low, other_high, other in self._lines[axis].get(line, ()):
+                if other_low <= high and low <= other_high:
+                    found.add(other)
+        found.discard(key)
+        return found
+
+    def candidate_pairs(self):
+        """Return every pair `(a, b)` with `a < b` of keys whose surfaces may touch."""
+        pairs = set()
+        for bucket in self._corners.values():
+            if len(bucket) > 1:
+                members = sorted(bucket)
+                for i, first in enumerate(members):
+                    for second in members[i + 1:]:
+                        pairs.add((first, second))
+        for lines in self._lines.values():
+            for bucket in lines.values():
+                self._overlapping_pairs(bucket, pairs)
+        return pairs
+
+    @staticmethod
+    def _overlapping_pairs(bucket, pairs):
+        """Sweep the intervals on one line and collect the keys of overlapping ones."""
+        if len(bucket) < 2:
+            return
+        ordered = sorted(bucket, key=lambda entry: (entry[0], entry[1]))
+        for i, (_, high, first) in enumerate(ordered):
+            for j in range(i + 1, len(ordered)):
+                other_low, _, second = ordered[j]
+                if other_low > high:
+                    break
+                if first != second:
+                    pairs.add((min(first, second), max(first, second)))
+
+    @staticmethod
+    def _edge_keys(corners):
+        """Return the axis-aligned lines the edges of a surface lie on."""
+        edges = set()
+        count = len(corners)
+        for i in range(count):
+            start, end = corners[i], corners[(i + 1) % count]
+            if start[0] == end[0]:
+                edges.add(("x", start[0], (min(start[1], end[1]), max(start[1], end[1]))))
+            if start[1] == end[1]:
+                edges.add(("y", start[1], (min(start[0], end[0]), max(start[0], end[0]))))
+        return list(edges)
+
+
+class PointKDTree:
+    """KD-tree over 3D points answering nearest-neighbour queries, with deletion.
+
+    The tree is built once by median splits along the axis of widest spread, down
+    to leaves of at most `leaf_size` points. Every node counts the points still
+    alive below it, so deleting a point is O(log n) and searches skip emptied
+    subtrees. A query made from a point of the tree (the last goal of a tour, say)
+    starts at that point's leaf and climbs only until nothing closer can lie
+    outside the region searched, so a whole nearest-neighbour tour takes about
+    O(n log n).
+    """
+
+    def __init__(self, points, leaf_size=16):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self._coordinates = self.points.tolist()
+        self._axis = []
+        self._split = []
+        self._children = []   # (below, above), or None for a leaf
+        self._parent = []
+        self._low = []        # corners of the region of space each node covers
+        self._high = []
+        self._alive = []
+        self._items = []      # point indices of a leaf, None for inner nodes
+        self._leaf_of = [0] * len(self.points)
+        self._build(leaf_size)
+        self._size = len(self.points)
+
+    def __len__(self):
+        return self._size
+
+    def _add_node(self, parent, low, high, count):
+        self._parent.append(parent)
+        self._low.append(low)
+        self._high.append(high)
+        self._alive.append(count)
+        self._axis.append(-1)
+        self._split.append(0.0)
+        self._children.append(None)
+        self._items.append(None)
+        return len(self._alive) - 1
+
+    def _build(self, leaf_size):
+        """Build the tree one level at a time, splitting every segment of a level at once."""
+        points = self.points
+        order = np.arange(len(points))
+        infinity = float("inf")
+        root = self._add_node(-1, [-infinity] * 3, [infinity] * 3, len(points))
+        level = [(root, 0, len(points))]
+        while level:
+            splitting = []
+            for node, start, end in level:
+                if end - start <= leaf_size:
+                    self._items[node] = order[start:end].tolist()
+                    for i in self._items[node]:
+                        self._leaf_of[i] = node
+                else:
+                    splitting.append((node, start, end))
+            if not splitting:
+                break
+            starts = np.array([start for _, start, _ in splitting])
+            lengths = np.array([end - start for _, start, end in splitting])
+            segment = np.repeat(np.arange(len(splitting)), lengths)
+            positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            positions += np.repeat(starts, lengths)
+            coordinates = points[order[positions]]
+            offsets = np.cumsum(lengths) - lengths
+            spread = np.maximum.reduceat(coordinates, offsets) - np.minimum.reduceat(coordinates, offsets)
+            axes = spread.argmax(axis=1)
+            key = coordinates[np.arange(len(positions)), axes[segment]]
+            by_key = np.argsort(key)
+            order[positions] = order[positions][by_key[np.argsort(segment[by_key], kind="stable")]]
+
+            level = []
+            for (node, start, end), axis in zip(splitting, axes.tolist()):
+                middle = start + (end - start) // 2
+                split = float(points[order[middle], axis])
+                low, high = self._low[node], self._high[node]
+                below_high, above_low = list(high), list(low)
+                below_high[axis] = above_low[axis] = split
+                below = self._add_node(node, low, below_high, middle - start)
+                above = self._add_node(node, above_low, high, end - middle)
+                self._axis[node] = axis
+                self._split[node] = split
+                self._children[node] = (below, above)
+                level.append((below, start, middle))
+                level.append((above, middle, end))
+
+    def remove(self, i):
+        """Delete point `i` from the tree."""
+        node = self._leaf_of[i]
+        self._items[node].remove(i)
+        alive, parent = self._alive, self._parent
+        while node >= 0:
+            alive[node] -= 1
+            node = parent[node]
+        self._size -= 1
+
+    def nearest(self, point, near=None):
+        """Index of the closest remaining point; ties go to the smallest coordinates.
+
+        `near` is the index of a (possibly deleted) tree point at or next to `point`
+        to start the search from. Returns -1 once the tree is empty.
+        """
+        if near is None:
+            return self._descend(0, point, -1, float("inf"), 0.0)[0]
+        node = self._leaf_of[near]
+        best, best_distance = self._descend(node, point, -1, float("inf"), 0.0)
+        parent, children, alive = self._parent, self._children, self._alive
+        low_corners, high_corners = self._low, self._high
+        while True:
+            # Everything closer than the edge of this node's region has been searched
+            low, high = low_corners[node], high_corners[node]
+            margin = min(point[0] - low[0], high[0] - point[0], point[1] - low[1],
+                         high[1] - point[1], point[2] - low[2], high[2] - point[2])
+            if best >= 0 and margin * margin > best_distance:
+                return best
+            above = parent[node]
+            if above < 0:
+                return best
+            below, upper = children[above]
+            gap = point[self._axis[above]] - self._split[above]
+            sibling = upper if node == below else below
+            if gap * gap <= best_distance and alive[sibling]:
+                best, best_distance = self._descend(sibling, point, best, best_distance, gap * gap)
+            node = above
+
+    def _descend(self, top, point, best, best_distance, bound):
+        """Search the subtree under `top`, at least `bound` (squared) from `point`."""
+        x, y, z = point
+        coordinates = self._coordinates
+        alive, children, items = self._alive, self._children, self._items
+        axes, splits = self._axis, self._split
+        stack = [(top, bound)]
+        while stack:
+            node, bound = stack.pop()
+            if bound > best_distance or not alive[node]:
+                continue
+            pair = children[node]
+            if pair is None:
+                for i in items[node]:
+                    px, py, pz = coordinates[i]
+                    distance = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+                    if distance < best_distance or (
+                            distance == best_distance and coordinates[i] < coordinates[best]):
+                        best, best_distance = i, distance
+                continue
+            gap = point[axes[node]] - splits[node]
+            # Visit the side holding the query first; the other is at least `gap` away
+            if gap < 0:
+                stack.append((pair[1], gap * gap))
+                stack.append((pair[0], bound))
+            else:
+                stack.append((pair[0], gap * gap))
+                stack.append((pair[1], bound))
+        return best, best_distance
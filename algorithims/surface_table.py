@@ -0,0 +1,134 @@
+import numpy as np
+
+# Orientation codes stored in `SurfaceTable.orientation`
+VERTICAL_X = 0
+VERTICAL_Y = 1
+HORIZONTAL = 2
+UNKNOWN = -1
+
+ORIENTATION_CODES = {"Vertical-x": VERTICAL_X, "Vertical-y": VERTICAL_Y, "horizontal": HORIZONTAL}
+ORIENTATION_NAMES = {code: name for name, code in ORIENTATION_CODES.items()}
+# Labels are matched case-insensitively ("Horizontal", "vertical-X", ...)
+_CODES_BY_LOWER = {name.lower(): code for name, code in ORIENTATION_CODES.items()}
+
+
+def orientation_code(label):
+    """Code of an orientation label, or UNKNOWN."""
+    return _CODES_BY_LOWER.get(label.lower(), UNKNOWN) if isinstance(label, str) else UNKNOWN
+
+
+def normalize_orientation(label):
+    """The canonical spelling of a known orientation label; unknown labels are returned as is."""
+    return ORIENTATION_NAMES.get(orientation_code(label), label)
+
+
+class SurfaceTable:
+    """Struct-of-arrays view of the scene surfaces.
+
+    Every column is a NumPy array with one row per surface: `ids`, `width`, `height`,
+    `area`, `position` (N, 3), `orientation` (int8 code) and `corners` (N, 4, 3).
+    The table is built once by `WallE.parse_surfaces` and shared by the CSP, the
+    pathfinder and the renderers. Indexing or iterating it yields the same dicts
+    `parse_surfaces` used to return, built on demand.
+    """
+
+    def __init__(self, ids, width, height, position, orientation, orientation_labels=None):
+        self.ids = _id_array(ids)
+        self.width = np.asarray(width, dtype=np.float64)
+        self.height = np.asarray(height, dtype=np.float64)
+        self.area = self.height * self.width
+        self.position = np.asarray(position, dtype=np.float64).reshape(-1, 3)
+        self.orientation = np.asarray(orientation, dtype=np.int8)
+        # Original labels of surfaces whose orientation has no code, keyed by row
+        self.orientation_labels = orientation_labels or {}
+        self.corners = corner_tensor(self.position, self.width, self.height, self.orientation)
+        self._adjacency_corners = None
+
+    @classmethod
+    def from_records(cls, surfaces):
+        """Build the table from a list of surface dicts as found in the input JSON."""
+        ids, width, height, position, orientation = [], [], [], [], []
+        orientation_labels = {}
+        for row, surface in enumerate(surfaces):
+            ids.append(surface["id"])
+            width.append(surface["width"])
+            height.append(surface["height"])
+            position.append(surface["position"])
+            label = surface.get("orientation", "Vertical")
+            code = orientation_code(label)
+            if code == UNKNOWN:
+                orientation_labels[row] = label
+            orientation.append(code)
+        return cls(ids, width, height, np.array(position, dtype=np.float64).reshape(-1, 3),
+                   orientation, orientation_labels)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        code = int(self.orientation[index])
+        surface_id = self.ids[index]
+        return {
+            "id": surface_id.item() if isinstance(surface_id, np.generic) else surface_id,
+            "height": float(self.height[index]),
+            "width": float(self.width[index]),
+            "area": float(self.area[index]),
+            "position": tuple(self.position[index].tolist()),
+            "orientation": ORIENTATION_NAMES.get(code) or self.orientation_labels.get(index, "Vertical"),
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def adjacency_corners(self):
+        """Corners as laid out by `CSPColorAssigner.compute_surface_corners`.
+
+        The CSP adjacency test has always placed Vertical-x walls in the x-y plane,
+        like horizontal surfaces; this tensor reproduces that layout so the adjacency
+        graph is unchanged.
+        """
+        if self._adjacency_corners is None:
+            flat = np.where(self.orientation == VERTICAL_X, HORIZONTAL, self.orientation).astype(np.int8)
+            self._adjacency_corners = corner_tensor(self.position, self.width, self.height, flat)
+        return self._adjacency_corners
+
+
+def corner_tensor(position, width, height, orientation):
+    """Compute the (N, 4, 3) corners of all surfaces in one vectorized pass.
+
+    Vertical-x walls span x (width) and z (height), Vertical-y walls span y and z,
+    horizontal surfaces span x and y. Rows with an unknown orientation are NaN.
+    """
+    count = len(position)
+    # Offsets of the four corners along the width and height directions
+    along_width = np.array([0.0, 1.0, 1.0, 0.0])
+    along_height = np.array([0.0, 0.0, 1.0, 1.0])
+
+    width_axis = np.zeros((count, 3))
+    height_axis = np.zeros((count, 3))
+    vertical_x = orientation == VERTICAL_X
+    vertical_y = orientation == VERTICAL_Y
+    horizontal = orientation == HORIZONTAL
+    width_axis[vertical_x | horizontal, 0] = 1.0
+    width_axis[vertical_y, 1] = 1.0
+    height_axis[vertical_x | vertical_y, 2] = 1.0
+    height_axis[horizontal, 1] = 1.0
+
+    corners = (
+        position[:, None, :]
+        + along_width[None, :, None] * (width[:, None] * width_axis)[:, None, :]
+        + along_height[None, :, None] * (height[:, None] * height_axis)[:, None, :]
+    )
+    corners[orientation == UNKNOWN] = np.nan
+    return corners
+
+
+def _id_array(ids):
+    """Store integer ids compactly and anything else as objects."""
+    if all(isinstance(surface_id, (int, np.integer)) and not isinstance(surface_id, bool) for surface_id in ids):
+        return np.asarray(ids, dtype=np.int64)
+    return np.asarray(ids, dtype=object)
@@ -0,0 +1,266 @@
+import time
+
+import numpy as np
+
+from algorithims.spatial_index import PointKDTree
+
+TOUR_METHODS = ("auto", "greedy", "held_karp", "local_search", "space_filling")
+# The Held-Karp tables take 2^n * n entries; beyond this the local search is used
+HELD_KARP_MAX = 20
+
+
+class TourMetric:
+    """Distances between the tour points (index 0 is the start, 1..n the goals).
+
+    Up to `max_matrix_size` points the full distance matrix is computed once with
+    NumPy; beyond that rows are computed on demand so memory stays linear. A
+    precomputed `matrix` (travel costs around obstacles, say) replaces the
+    straight-line distances.
+    """
+
+    def __init__(self, points, max_matrix_size=2500, matrix=None):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.count = len(self.points)
+        self.matrix = None if matrix is None else np.asarray(matrix, dtype=np.float64)
+        self.euclidean = matrix is None
+        if self.matrix is None and self.count <= max_matrix_size:
+            difference = self.points[:, None, :] - self.points[None, :, :]
+            self.matrix = np.sqrt((difference * difference).sum(axis=2))
+
+    def row(self, source, targets):
+        """Distances from point `source` to every point in the index array `targets`."""
+        if self.matrix is not None:
+            return self.matrix[source, targets]
+        difference = self.points[targets] - self.points[source]
+        return np.sqrt((difference * difference).sum(axis=1))
+
+    def pairwise(self, sources, targets):
+        """Element-wise distances between `sources[i]` and `targets[i]`."""
+        if self.matrix is not None:
+            return self.matrix[sources, targets]
+        difference = self.points[targets] - self.points[sources]
+        return np.sqrt((difference * difference).sum(axis=1))
+
+    def length(self, route):
+        route = np.asarray(route)
+        return float(self.pairwise(route[:-1], route[1:]).sum()) if len(route) > 1 else 0.0
+
+
+def plan_tour(metric, method="auto", time_budget=None, held_karp_limit=12):
+    """Order the goals of `metric` into an open tour that starts at point 0.
+
+    `greedy` is the nearest-neighbour rule, `space_filling` follows a Hilbert curve
+    through the goals, `held_karp` is the exact dynamic program and `local_search`
+    improves the nearest-neighbour tour with 2-opt and Or-opt moves, so it is never
+    longer than `greedy`; `auto` uses Held-Karp up to `held_karp_limit` goals and
+    local search above. With a `time_budget` (seconds) the exact and improvement
+    phases stop at the deadline and the best tour found so far is returned.
+
+    Returns the route as a list of point indices, starting with 0.
+    """
+    if method not in TOUR_METHODS:
+        raise ValueError(f"Unknown tour method {method!r}; expected one of {TOUR_METHODS}")
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    goals = metric.count - 1
+    if goals <= 1:
+        return list(range(metric.count))
+    if method == "auto":
+        method = "held_karp" if goals <= held_karp_limit else "local_search"
+
+    if method == "held_karp":
+        route = held_karp(metric, deadline)
+        if route is not None:
+            return route
+        # Out of time: fall back to the heuristic with whatever budget is left
+    if method == "space_filling":
+        route = space_filling(metric)
+    else:
+        route = nearest_neighbour(metric)
+    if method in ("greedy", "space_filling"):
+        return route
+    return improve(metric, route, deadline)
+
+
+def nearest_neighbour(metric):
+    """Visit the closest unvisited goal next; ties go to the smallest coordinates.
+
+    Straight-line metrics query a KD-tree of the goals, so building the tour takes
+    about O(n log n); other metrics scan a row of costs per step.
+    """
+    if metric.euclidean:
+        tree = PointKDTree(metric.points[1:])
+        coordinates = metric.points[1:].tolist()
+        route = [0]
+        current, goal = metric.points[0].tolist(), None
+        while len(tree):
+            goal = tree.nearest(current, goal)
+            tree.remove(goal)
+            route.append(goal + 1)
+            current = coordinates[goal]
+        return route
+
+    points = metric.points
+    remaining = np.arange(1, metric.count)
+    route = [0]
+    while len(remaining):
+        distances = metric.row(route[-1], remaining)
+        closest = np.flatnonzero(distances == distances.min())
+        if len(closest) > 1:
+            tied = points[remaining[closest]]
+            closest = closest[np.lexsort(tied.T[::-1])]
+        position = closest[0]
+        route.append(int(remaining[position]))
+        remaining = np.delete(remaining, position)
+    return route
+
+
+def space_filling(metric, bits=16):
+    """Visit the goals in the order of a 3D Hilbert curve through their positions.
+
+    Computing the curve indices (Skilling's transform) and sorting them is
+    O(n log n) and fully vectorized. The curve is walked from whichever end lies
+    closer to the start.
+    """
+    goals = metric.points[1:]
+    low = goals.min(axis=0)
+    extent = (goals.max(axis=0) - low).max() or 1.0
+    axes = list(((goals - low) / extent * ((1 << bits) - 1)).astype(np.int64).T)
+    # Undo the rotations of each level so the axes hold the transposed index
+    level = 1 << (bits - 1)
+    while level > 1:
+        low_bits = level - 1
+        for i in range(3):
+            inverted = (axes[i] & level) != 0
+            axes[0] = np.where(inverted, axes[0] ^ low_bits, axes[0])
+            swapped = np.where(inverted, 0, (axes[0] ^ axes[i]) & low_bits)
+            axes[0] ^= swapped
+            axes[i] ^= swapped
+        level >>= 1
+    # Gray-code the transposed index
+    axes[1] ^= axes[0]
+    axes[2] ^= axes[1]
+    flips = np.zeros(len(goals), dtype=np.int64)
+    level = 1 << (bits - 1)
+    while level > 1:
+        flips = np.where(axes[2] & level, flips ^ (level - 1), flips)
+        level >>= 1
+    index = np.zeros(len(goals), dtype=np.int64)
+    for bit in range(bits - 1, -1, -1):
+        for i in range(3):
+            index = (index << 1) | (((axes[i] ^ flips) >> bit) & 1)
+
+    route = np.argsort(index, kind="stable") + 1
+    if metric.row(0, route[-1:])[0] < metric.row(0, route[:1])[0]:
+        route = route[::-1]
+    return [0] + route.tolist()
+
+
+def held_karp(metric, deadline=None):
+    """Exact shortest open tour from point 0 through every goal.
+
+    Runs the O(2^n n^2) dynamic program over subsets of goals, vectorized over the
+    last goal of each partial tour. Returns None if the deadline passes first or if
+    there are more than `HELD_KARP_MAX` goals.
+    """
+    goals = metric.count - 1
+    if goals > HELD_KARP_MAX:
+        return None
+    targets = np.arange(1, metric.count)
+    distances = metric.row(0, targets)
+    between = np.array([metric.row(i, targets) for i in targets])
+    full = 1 << goals
+    cost = np.full((full, goals), np.inf)
+    parent = np.full((full, goals), -1, dtype=np.int16)
+    bits = 1 << np.arange(goals)
+    cost[bits, np.arange(goals)] = distances
+
+    for mask in range(1, full):
+        if deadline is not None and not mask & 0xFF and time.perf_counter() > deadline:
+            return None
+        # Extend every partial tour over `mask` by one goal outside it
+        extended = cost[mask][:, None] + between
+        best_last = extended.argmin(axis=0)
+        best = extended[best_last, np.arange(goals)]
+        outside = np.flatnonzero(~(mask & bits).astype(bool))
+        if not len(outside):
+            continue
+        targets = mask | bits[outside]
+        better = best[outside] < cost[targets, outside]
+        targets, outside = targets[better], outside[better]
+        cost[targets, outside] = best[outside]
+        parent[targets, outside] = best_last[outside]
+
+    last = int(cost[full - 1].argmin())
+    mask = full - 1
+    order = []
+    while last >= 0:
+        order.append(last + 1)
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+    return [0] + order[::-1]
+
+
+def improve(metric, route, deadline=None):
+    """Apply improving 2-opt and Or-opt moves to an open route until none is left."""
+    route = np.asarray(route)
+    improved = True
+    while improved:
+        improved = False
+        for move in (_two_opt_pass, _or_opt_pass):
+            if deadline is not None and time.perf_counter() > deadline:
+                return route.tolist()
+            route, changed = move(metric, route, deadline)
+            improved = improved or changed
+    return route.tolist()
+
+
+def _two_opt_pass(metric, route, deadline):
+    """Reverse segments `route[i..j]` wherever that shortens the route."""
+    changed = False
+    last = len(route) - 1
+    for i in range(1, last):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        # Reversing route[i..k] replaces edges (a, b) and (c, d) with (a, c) and (b, d),
+        # where c = route[k] and d = route[k + 1]; evaluated for every k at once
+        a, b = route[i - 1], route[i]
+        c = route[i + 1:]
+        delta = metric.row(a, c) - metric.row(a, route[i:i + 1])[0]
+        # Reversing up to the last goal leaves no edge (c, d) to replace
+        delta[:-1] += metric.row(b, route[i + 2:]) - metric.pairwise(route[i + 1:-1], route[i + 2:])
+        j = int(delta.argmin())
+        if delta[j] < -1e-9:
+            route[i:i + j + 2] = route[i:i + j + 2][::-1].copy()
+            changed = True
+    return route, changed
+
+
+def _or_opt_pass(metric, route, deadline):
+    """Move segments of one to three goals to the position where they cost least."""
+    changed = False
+    for length in (1, 2, 3):
+        i = 1
+        while i + length <= len(route):
+            if deadline is not None and time.perf_counter() > deadline:
+                return route, changed
+            segment = route[i:i + length]
+            rest = np.concatenate((route[:i], route[i + length:]))
+            first, end = segment[0], segment[-1]
+            # Saving from cutting the segment out
+            previous = route[i - 1]
+            following = route[i + length] if i + length < len(route) else None
+            saving = metric.row(previous, segment[:1])[0]
+            if following is not None:
+                saving += metric.row(end, [following])[0] - metric.row(previous, [following])[0]
+            # Cost of inserting it after each point of the rest (the last slot has no successor)
+            cost = metric.row(first, rest).copy()
+            cost[:-1] += metric.row(end, rest[1:]) - metric.pairwise(rest[:-1], rest[1:])
+            cost[i - 1] = np.inf  # reinserting in place
+            slot = int(cost.argmin())
+            if cost[slot] < saving - 1e-9:
+                route = np.concatenate((rest[:slot + 1], segment, rest[slot + 1:]))
+                changed = True
+            else:
+                i += 1
+    return route, changed
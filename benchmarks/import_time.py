@@ -0,0 +1,70 @@
+"""Measure the cold import time of the solver modules.
+
+Every module is imported in a fresh interpreter, `--repeat` times, and the median
+wall time is reported together with any heavy optional dependency that the
+import pulled in (it should be none for the solver core):
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --json >> import_times.jsonl
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ("numpy", "algorithims.csp", "processing.WallE", "processing.batch")
+# Modules only plotting and the GUI should need
+HEAVY = ("matplotlib", "mpl_toolkits", "PyQt5", "concurrent.futures", "scipy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] if not name.startswith('concurrent.futures') else 'concurrent.futures'
+               for name in sys.modules if name.startswith({heavy!r})}})
+print(elapsed, ','.join(heavy))
+"""
+
+
+def measure(module, repeat=5):
+    """Median seconds to import `module` in a new interpreter, and the heavy modules it loaded."""
+    times = []
+    heavy = ""
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        times.append(float(output[0]))
+        heavy = output[1] if len(output) > 1 else ""
+    return statistics.median(times), heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print one JSON record for tracking over time")
+    args = parser.parse_args(argv)
+
+    results = {module: measure(module, args.repeat) for module in args.modules}
+    if args.json:
+        print(json.dumps({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "seconds": {module: round(seconds, 4) for module, (seconds, _) in results.items()},
+            "heavy": {module: heavy.split(",") if heavy else [] for module, (_, heavy) in results.items()},
+        }))
+        return
+    for module, (seconds, heavy) in results.items():
+        print(f"{module:<20} {seconds * 1000:8.1f} ms  {'loads ' + heavy if heavy else ''}")
+
+
+if __name__ == "__main__":
+    main()
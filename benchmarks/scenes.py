@@ -0,0 +1,124 @@
+"""Seeded synthetic buildings in the input schema, for benchmarks and stress tests.
+
+Every generator takes an approximate surface count and a seed; the same arguments
+always give the same scene:
+
+- `grid`: one floor of rooms on a grid with random column widths and row depths;
+  rooms share their walls and each has a ceiling.
+- `tower`: `floors` such grids stacked on top of each other.
+- `dense`: walls packed along a few lines with many shared corners and nested
+  edges, so surfaces get more neighbours as the scene grows (beyond a few
+  hundred surfaces it is hard to color; useful to stress adjacency and search).
+
+Write one to a file (any format of `processing.scene_io`) with
+
+    python -m benchmarks.scenes grid 5000 --seed 1 --output grid.npz
+"""
+import argparse
+import math
+import random
+from itertools import accumulate
+
+from processing.scene_io import save_scene
+
+COLORS = ["Red", "Yellow", "Blue", "White", "Black"]
+WALL_HEIGHT = 3
+# Colors each kind needs to be colorable. The adjacency test compares edges in x and y
+# only, so the walls of stacked floors all touch and a tower needs many more colors.
+DEFAULT_COLORS = {"grid": 6, "tower": 28, "dense": 10}
+
+
+def grid(size, seed=0, floors=1):
+    """Surfaces of a grid floorplan with about `size` surfaces (over all `floors`)."""
+    rng = random.Random(seed)
+    # An r x r grid has 2r(r + 1) walls and r^2 ceilings
+    side = max(1, round(math.sqrt(size / floors / 3)))
+    widths = [rng.randint(4, 8) for _ in range(side)]
+    depths = [rng.randint(4, 8) for _ in range(side)]
+    xs = [0, *accumulate(widths)]
+    ys = [0, *accumulate(depths)]
+
+    surfaces = []
+    for floor in range(floors):
+        z = floor * WALL_HEIGHT
+        for y in ys:
+            for x, width in zip(xs, widths):
+                surfaces.append(_surface(surfaces, WALL_HEIGHT, width, [x, y, z], "Vertical-x"))
+        for x in xs:
+            for y, depth in zip(ys, depths):
+                surfaces.append(_surface(surfaces, WALL_HEIGHT, depth, [x, y, z], "Vertical-y"))
+        for y, depth in zip(ys, depths):
+            for x, width in zip(xs, widths):
+                surfaces.append(_surface(surfaces, depth, width, [x, y, z + WALL_HEIGHT], "horizontal"))
+    return surfaces
+
+
+def tower(size, seed=0, floors=4):
+    """Surfaces of `floors` stacked grid floorplans with about `size` surfaces in total."""
+    return grid(size, seed, floors)
+
+
+def dense(size, seed=0, lines=4):
+    """About `size` walls on `lines` parallel lines, with integer ends in a short span."""
+    rng = random.Random(seed)
+    span = max(8, 2 * math.isqrt(size))
+    surfaces = []
+    for _ in range(size):
+        start = rng.randint(0, span - 1)
+        width = rng.randint(1, max(1, min(span - start, 6)))
+        line = rng.randrange(lines) * WALL_HEIGHT
+        if rng.random() < 0.5:
+            surfaces.append(_surface(surfaces, WALL_HEIGHT, width, [start, line, 0], "Vertical-x"))
+        else:
+            surfaces.append(_surface(surfaces, WALL_HEIGHT, width, [line, start, 0], "Vertical-y"))
+    return surfaces
+
+
+GENERATORS = {"grid": grid, "tower": tower, "dense": dense}
+
+
+def palette(count):
+    """`count` color names, starting with `COLORS`."""
+    return (COLORS + [f"Color {number}" for number in range(len(COLORS) + 1, count + 1)])[:count]
+
+
+def scene(kind, size, seed=0, colors=None):
+    """A complete input dict for a generated scene; paint and time never limit it.
+
+    `colors` is a list of names or a number of colors (default: `DEFAULT_COLORS`).
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown scene kind '{kind}'. Expected one of {tuple(GENERATORS)}.")
+    surfaces = GENERATORS[kind](size, seed)
+    colors = colors or DEFAULT_COLORS[kind]
+    colors = palette(colors) if isinstance(colors, int) else list(colors)
+    total_area = float(sum(surface["height"] * surface["width"] for surface in surfaces))
+    return {
+        "surfaces": surfaces,
+        "colors": colors,
+        "time_per_meter": 2.0,
+        "max_time": 1e12,
+        "paint_availability": {color: total_area for color in colors},
+        "min_colors": min(3, len(colors)),
+        "start_position": [0, 0, 0],
+    }
+
+
+def _surface(surfaces, height, width, position, orientation):
+    return {"id": len(surfaces) + 1, "height": height, "width": width, "position": position,
+            "orientation": orientation}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("size", type=int, help="approximate number of surfaces")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--colors", type=int, help="number of colors (default depends on the kind)")
+    parser.add_argument("--output", required=True, help=".json, .jsonl or .npz file to write")
+    args = parser.parse_args(argv)
+    save_scene(args.output, scene(args.kind, args.size, args.seed, args.colors))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Time every solver stage on generated buildings of growing size.
+
+The stages are timed separately on the scenes of `benchmarks.scenes`:
+`parse_surfaces`, `adjacency` (`CSPColorAssigner._calculate_adjacency_list`),
+`color_assign` (with the adjacency precomputed) and `find_path`. Each is run
+`--repeat` times and the median wall time is reported; a coloring that runs past
+`--timeout` is stopped and reported with status "timeout".
+
+    python -m benchmarks.stages --sizes 100 1000 --output before.json
+    python -m benchmarks.stages --sizes 100 1000 --compare before.json
+
+With `--compare`, stages slower than the earlier run by more than `--threshold`
+are listed and the exit status is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from algorithims.csp import CSPColorAssigner, SearchCancelled
+from benchmarks.scenes import GENERATORS, scene
+from processing.WallE import WallE
+from processing.profiling import search_counters
+
+STAGES = ("parse_surfaces", "adjacency", "color_assign", "find_path")
+SIZES = (100, 300, 1000)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_stages(input_data, repeat=3, timeout=10.0):
+    """Median seconds and status of every stage on one input, as a dict by stage."""
+    walle = WallE(input_data)
+    solver = walle.csp_solver
+    deadline = None
+
+    def check_deadline(stats):
+        if time.perf_counter() > deadline:
+            raise SearchCancelled
+
+    solver.progress = check_deadline
+    solver.progress_interval = 1000
+    surfaces = walle.surfaces
+    adjacency_list = solver._calculate_adjacency_list(surfaces)
+    stages = {
+        "parse_surfaces": lambda: WallE.parse_surfaces(input_data["surfaces"]),
+        "adjacency": lambda: solver._calculate_adjacency_list(surfaces),
+        "color_assign": lambda: solver.color_assign(surfaces, adjacency_list),
+        "find_path": lambda: walle.pathfinder.find_path(walle.start_position, surfaces.position),
+    }
+
+    results = {}
+    for stage in STAGES:
+        times, status = [], "ok"
+        for _ in range(repeat):
+            deadline = time.perf_counter() + timeout
+            started = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = stages[stage]()
+            except SearchCancelled:
+                times.append(time.perf_counter() - started)
+                status = "timeout"
+                break
+            times.append(time.perf_counter() - started)
+            if stage == "color_assign" and result[0] is None:
+                status = "no_solution"
+        results[stage] = {"seconds": statistics.median(times), "status": status}
+    results["color_assign"].update(search_counters(solver.stats))
+    return results
+
+
+def benchmark(kinds, sizes, seed=0, repeat=3, timeout=10.0, search="propagation", tour_time_budget=0.5):
+    """Run every stage on every scene and return the result records."""
+    records = []
+    for kind in kinds:
+        for size in sizes:
+            input_data = scene(kind, size, seed)
+            input_data["search"] = search
+            input_data["tour_time_budget"] = tour_time_budget
+            for stage, result in run_stages(input_data, repeat, timeout).items():
+                records.append(dict({"scene": kind, "size": size, "surfaces": len(input_data["surfaces"]),
+                                     "stage": stage}, **result))
+    return records
+
+
+def compare(records, baseline, threshold=1.2):
+    """Records of `records` slower than the matching `baseline` record by more than `threshold`."""
+    earlier = {(record["scene"], record["size"], record["stage"]): record for record in baseline}
+    slower = []
+    for record in records:
+        before = earlier.get((record["scene"], record["size"], record["stage"]))
+        if before is None or record["status"] != "ok" or before["status"] != "ok":
+            continue
+        ratio = record["seconds"] / max(before["seconds"], 1e-9)
+        if ratio > threshold:
+            slower.append(dict(record, baseline=before["seconds"], ratio=round(ratio, 2)))
+    return slower
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", nargs="+", default=sorted(GENERATORS), choices=sorted(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="approximate surface counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds allowed for one coloring")
+    parser.add_argument("--search", default="propagation", choices=CSPColorAssigner.SEARCH_STRATEGIES,
+                        help="search strategy for color_assign")
+    parser.add_argument("--tour-time-budget", type=float, default=0.5, help="seconds allowed for find_path")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    records = benchmark(args.scenes, args.sizes, args.seed, args.repeat, args.timeout, args.search,
+                        args.tour_time_budget)
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "commit": _commit(),
+        "options": {"seed": args.seed, "repeat": args.repeat, "timeout": args.timeout, "search": args.search,
+                    "tour_time_budget": args.tour_time_budget},
+        "results": records,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(run, file, indent=2)
+
+    for record in records:
+        print(f"{record['scene']:<6} {record['surfaces']:>7} {record['stage']:<15} "
+              f"{record['seconds'] * 1000:10.1f} ms  {record['status'] if record['status'] != 'ok' else ''}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        slower = compare(records, baseline["results"], args.threshold)
+        for record in slower:
+            print(f"Regression: {record['scene']} {record['surfaces']} {record['stage']} "
+                  f"{record['baseline'] * 1000:.1f} ms -> {record['seconds'] * 1000:.1f} ms (x{record['ratio']})")
+        if slower:
+            return 1
+        print(f"No stage slower than x{args.threshold} of {baseline.get('commit') or args.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
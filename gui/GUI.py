@@ -1,18 +1,114 @@
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFormLayout, QSpinBox, QComboBox, QMessageBox, QScrollArea, QGroupBox, QHBoxLayout, QFileDialog
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFormLayout, QSpinBox, QComboBox, QMessageBox, QScrollArea, QGroupBox, QHBoxLayout, QFileDialog, QProgressDialog
+import logging
 import sys
-from PyQt5.QtCore import Qt
-import json
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from processing.WallE import WallE
+from processing.cache import SolutionCache
+from processing.profiling import PhaseTimer
+from processing.scene_io import load_scene
+from processing.session import SolverSession
+from algorithims.surface_table import UNKNOWN
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-import matplotlib.pyplot as plt
+import numpy as np
 
+logger = logging.getLogger(__name__)
 
-class App(QWidget):
+
+class SolveWorker(QThread):
+    """Runs `WallE.solve()` off the GUI thread and reports progress through signals.
+
+    With a `SolverSession`, the session is brought up to `data` instead, so an edit
+    to a few walls is repaired rather than solved from scratch.
+    """
+
+    progress = pyqtSignal(str, dict)
+    solved = pyqtSignal(object, object)  # solution (None if not found or cancelled), WallE
+    failed = pyqtSignal(str)
+
+    def __init__(self, data, parent=None, session=None, cache=None):
+        super().__init__(parent)
+        self.data = data
+        self.session = session
+        self.cache = cache
+        self.walle = None
+        self.cancel_requested = False
+
+    def run(self):
+        try:
+            walle = WallE(self.data, self.cache) if self.session is None else self.session.load(self.data)
+            walle.progress = self.progress.emit
+            self.walle = walle
+            if self.cancel_requested:
+                walle.cancel()
+            if self.session is None:
+                self.solved.emit(walle.solve(), walle)
+            else:
+                self.solved.emit(self.session.update(self.data), walle)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def cancel(self):
+        """Stop the search at its next progress check; `solved` still fires."""
+        self.cancel_requested = True
+        if self.walle is not None:
+            self.walle.cancel()
+
+
+class BackgroundSolveMixin:
+    """Solve on a `SolveWorker` behind a progress dialog, then open the `OutputScreen`."""
+
+    PHASES = {
+        "route": "Planning the route...",
+        "navigation": "Measuring travel around the walls...",
+        "coloring": "Searching for a color assignment...",
+        "done": "Done.",
+    }
+
+    # Keep the screen open after a solve, e.g. to edit and resubmit
+    close_on_solve = True
+    # Solutions of inputs solved before are loaded from this cache
+    cache = None
+
+    def solve_in_background(self, data, session=None):
+        self.progress_dialog = QProgressDialog(self.PHASES["route"], "Cancel", 0, 0, self)
+        self.progress_dialog.setWindowTitle("Solving")
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(300)  # no flicker for quick solves
+
+        self.solve_worker = SolveWorker(data, self, session, self.cache)
+        self.solve_worker.progress.connect(self.on_solve_progress)
+        self.solve_worker.solved.connect(self.on_solved)
+        self.solve_worker.failed.connect(self.on_solve_failed)
+        self.progress_dialog.canceled.connect(self.solve_worker.cancel)
+        self.solve_worker.start()
+
+    def on_solve_progress(self, phase, stats):
+        text = self.PHASES.get(phase, phase)
+        if stats.get("nodes"):
+            text += f"\n{stats['nodes']:,} nodes explored"
+        if stats.get("cost") is not None:
+            text += f"\nBest cost so far: {stats['cost']:.2f}"
+        self.progress_dialog.setLabelText(text)
+
+    def on_solved(self, solution, walle):
+        self.progress_dialog.reset()
+        if walle.cancelled:
+            return
+        surfaces = walle.surfaces if self.solve_worker.session is None else self.solve_worker.data["surfaces"]
+        self.output_screen = OutputScreen(solution, surfaces)
+        self.output_screen.show()
+        if self.close_on_solve:
+            self.close()
+
+    def on_solve_failed(self, message):
+        self.progress_dialog.reset()
+        QMessageBox.critical(self, "Error", f"Failed to solve: {message}")
+
+
+class App(BackgroundSolveMixin, QWidget):
     def __init__(self):
         super().__init__()
+        self.cache = SolutionCache()
 
         self.setWindowTitle("WALL-E!")
         self.setGeometry(550, 300, 600, 500)
@@ -64,21 +160,16 @@ class App(QWidget):
         self.close()
 
     def load_json_file(self):
-        """Allow the user to load a JSON file."""
-        file_name, _ = QFileDialog.getOpenFileName(self, "Open JSON File", "", "JSON Files (*.json);;All Files (*)")
+        """Allow the user to load a scene file (.json, .jsonl or .npz)."""
+        file_name, _ = QFileDialog.getOpenFileName(self, "Open Scene File", "",
+                                                   "Scene Files (*.json *.jsonl *.npz);;All Files (*)")
         if file_name:
             try:
-                with open(file_name, "r") as file:
-                    data = json.load(file)
-                    Walle = WallE(data)
-                    solution = Walle.solve()
-                    #Walle.display_solutions()
-                    self.output_screen = OutputScreen(solution, data["surfaces"])
-                    self.output_screen.show()
-                    self.close()
-
+                data = load_scene(file_name)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to load JSON file: {e}")
+                return
+            self.solve_in_background(data)
 
     def load_test_sample(self):
         """Load a predefined sample JSON."""
@@ -120,12 +211,7 @@ class App(QWidget):
             "start_position": [0, 0, 0]
         }
 
-        Walle = WallE(sample_data)
-        solution = Walle.solve()
-        #Walle.display_solutions()
-        self.output_screen = OutputScreen(solution, sample_data["surfaces"])
-        self.output_screen.show()
-        self.close()
+        self.solve_in_background(sample_data)
 
     def load_data_to_manual_input(self, data):
         """Load the JSON data into the manual input screen."""
@@ -234,7 +320,9 @@ class OutputScreen(QWidget):
         plot_card_layout = QVBoxLayout(plot_card_widget)
         plot_card_layout.setObjectName("vbox_sub")
 
-        # Matplotlib 3D Plot
+        # Matplotlib 3D Plot (imported on first use to keep start-up fast)
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
         self.figure = Figure()
         self.canvas = FigureCanvas(self.figure)
         plot_card_layout.addWidget(self.canvas)
@@ -243,84 +331,32 @@ class OutputScreen(QWidget):
 
         # Render the 3D plot
         if solution is not None:
-            self.visualize_3d_environment(surfaces, solution["path"], solution["colors"])
+            # One line per robot in multi-robot mode
+            path = [robot["path"] for robot in solution["robots"]] if "robots" in solution else solution["path"]
+            self.visualize_3d_environment(surfaces, path, solution["colors"],
+                                          solution.get("stats", {}).get("phases"))
         else:
             # If no solution, do not render the 3D plot
-            print("No solution to display 3D plot.")
+            logger.info("No solution to display 3D plot.")
     
-    def visualize_3d_environment(self, surfaces, path, colors):
-        """Visualizes the 3D environment using matplotlib."""
+    def visualize_3d_environment(self, surfaces, path, colors, phases=None):
+        """Visualizes the 3D environment using matplotlib; the time taken is added to `phases`."""
+        from processing.render import draw_environment
         self.figure.clear()  # Clear any previous plots
 
         # Create a 3D subplot with a transparent background
         ax = self.figure.add_subplot(111, projection="3d", facecolor=(0, 0, 0, 0))
         self.figure.patch.set_alpha(0)  # Set the figure's background to transparent
 
-        # Validate and map colors
-        if isinstance(colors, dict):
-            # Map colors based on surface IDs
-            mapped_colors = [colors.get(surface["id"], "gray") for surface in surfaces]
-        else:
-            # Assume colors is already a list
-            mapped_colors = colors
-
-        # Plot each wall with its assigned color
-        for surface, color in zip(surfaces, mapped_colors):
-            x, y, z = surface["position"]
-            width = surface["width"]
-            height = surface["height"]
-            orientation = surface["orientation"]
-
-            # Compute the vertices based on the wall orientation
-            if orientation == "Vertical-x":
-                # Wall is aligned with the X-axis (height on Z-axis)
-                x_corners = [x, x + width, x + width, x]
-                y_corners = [y, y, y, y]
-                z_corners = [z, z, z + height, z + height]
-            elif orientation == "Vertical-y":
-                # Wall is aligned with the Y-axis (height on Z-axis)
-                x_corners = [x, x, x, x]
-                y_corners = [y, y + width, y + width, y]
-                z_corners = [z, z, z + height, z + height]
-            elif orientation == "horizontal":
-                # Wall is horizontal (height on Z-axis)
-                x_corners = [x, x + width, x + width, x]
-                y_corners = [y, y, y + height, y + height]
-                z_corners = [z, z, z, z]
-            else:
-                raise ValueError(f"Invalid orientation '{orientation}' for surface ID {surface['id']}.")
-
-            # Debugging: Print out the vertices and their positions
-            print(f"Surface {surface['id']} corners: {list(zip(x_corners, y_corners, z_corners))}")
+        surfaces = WallE.parse_surfaces(surfaces)
+        unknown = np.flatnonzero(surfaces.orientation == UNKNOWN)
+        if len(unknown):
+            surface = surfaces[int(unknown[0])]
+            raise ValueError(f"Invalid orientation '{surface['orientation']}' for surface ID {surface['id']}.")
 
-            # Create vertices list and add the wall to the 3D plot
-            vertices = [list(zip(x_corners, y_corners, z_corners))]
-
-            # Plot the surface (wall) with edge colors and transparency
-            ax.add_collection3d(Poly3DCollection(vertices, alpha=0.5, edgecolor='black', facecolors=color))
-
-        # Plot traversal path if provided
-        if path:
-            try:
-                # Ensure path is valid (list of tuples of (x, y, z) coordinates)
-                path_x, path_y, path_z = zip(*path)
-                ax.plot(path_x, path_y, path_z, color="red", marker="o", label="Traversal Path")
-            except ValueError:
-                raise ValueError("Path must be a list of tuples/lists with three numeric values each (x, y, z).")
-
-        # Set labels and limits
-        ax.set_xlabel("X")
-        ax.set_ylabel("Y")
-        ax.set_zlabel("Z")
-
-        # Calculate the limits of the plot based on surfaces
-        max_x = max(surface["position"][0] + surface.get("width", 0) for surface in surfaces) + 1
-        max_y = max(surface["position"][1] + surface.get("width", 0) for surface in surfaces) + 1
-        max_z = max(surface["position"][2] + surface.get("height", 0) for surface in surfaces) + 1
-
-        ax.set_xlim([0, max_x])
-        ax.set_ylim([0, max_y])
-        ax.set_zlim([0, max_z])
+        # All walls go into one collection; large scenes are merged and sampled
+        with PhaseTimer(phases).phase("render"):
+            draw_environment(ax, surfaces, path, colors, edgecolor="black")
 
         ax.set_title("3D Wall Painting Environment", alpha=0.8)
         ax.legend()
@@ -329,9 +365,13 @@ class OutputScreen(QWidget):
         self.canvas.setStyleSheet("background: transparent;")
         self.canvas.draw()
 
-class ManualInputScreen(QWidget):
+class ManualInputScreen(BackgroundSolveMixin, QWidget):
+    close_on_solve = False
+
     def __init__(self, data=None):
         super().__init__()
+        # Resubmitting after editing a few walls repairs the previous solution
+        self.session = SolverSession()
 
         self.setWindowTitle("Wall Painting Solver")
         self.setGeometry(200, 200, 600, 500)
@@ -481,14 +521,15 @@ class ManualInputScreen(QWidget):
                 "min_colors": int(self.min_colors_input.text()),
                 "start_position": list(map(float, self.start_position_input.text().split(","))),
             }
-            print(data)
-            WallE_obj = WallE(data)
-            WallE_obj.display_solutions(WallE_obj.solve())
+            logger.debug("Manual input: %s", data)
         except ValueError:
             QMessageBox.critical(self, "Input Error", "Please ensure all inputs are correctly formatted.")
+            return
+        self.solve_in_background(data, self.session)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     app = QApplication(sys.argv)
 
     # Load styles from an external file
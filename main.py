@@ -1,7 +1,11 @@
 from PyQt5.QtWidgets import QApplication
+import logging
+import os
 import sys
 from gui.GUI import App
 if __name__ == "__main__":
+    # Solver messages; set WALLE_LOG_LEVEL=DEBUG for paths, colorings and phase timings
+    logging.basicConfig(level=os.environ.get("WALLE_LOG_LEVEL", "INFO"), format="%(message)s")
     app = QApplication(sys.argv)
 
     try:
@@ -1,132 +1,341 @@
-import json
-import heapq
-from itertools import product
+import logging
+import os
+
 import numpy as np
-import random
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-import matplotlib.pyplot as plt
 from algorithims.astar import AStarPathfinder
-from algorithims.csp import CSPColorAssigner
+from algorithims.components import ComponentSolver
+from algorithims.csp import CSPColorAssigner, SearchCancelled
+from algorithims.fleet import FleetPlanner
+from algorithims.surface_table import SurfaceTable
+from processing.profiling import PhaseTimer, profiled, search_counters
+from processing.time_model import TimeModel
+
+logger = logging.getLogger(__name__)
 
 class WallE:
-    def __init__(self, input_data):
+    def __init__(self, input_data, cache=None):
         self.input_data = input_data
-        self.surfaces = self.parse_surfaces(input_data["surfaces"])
+        # Optional `processing.cache.SolutionCache` consulted by `solve()`
+        self.cache = cache
+        # Phase timings of the latest solve; see `processing.profiling`
+        self.timer = PhaseTimer()
+        with self.timer.phase("parse"):
+            self.surfaces = self.parse_surfaces(input_data["surfaces"])
+        self._parse_seconds = self.timer.seconds["parse"]
         self.colors = input_data["colors"]
         self.time_per_meter = input_data["time_per_meter"]
         self.max_time = input_data["max_time"]
         self.paint_availability = input_data.get("paint_availability", {})
         self.adjacency_constraint = input_data.get("adjacency_constraint", True)
         self.min_colors = input_data.get("min_colors", 3)
-        self.start_position = tuple(input_data["start_position"])
+        # Several start positions share the surfaces between that many robots
+        self.start_positions = [tuple(start) for start in input_data.get("start_positions") or []]
+        if "start_position" in input_data or not self.start_positions:
+            self.start_position = tuple(input_data["start_position"])
+        else:
+            self.start_position = self.start_positions[0]
+        self.robot_speed = input_data.get("robot_speed", 2.0)
+        self.search = input_data.get("search", "backtracking")
+        self.decompose = input_data.get("decompose", False)
+        self.workers = input_data.get("workers")
+        # True for the default portfolio of searches, or a list of configurations
+        self.portfolio = input_data.get("portfolio", False)
+        self.objective = input_data.get("objective")
+        self.node_limit = input_data.get("node_limit")
+        self.seed = input_data.get("seed", 0)
+        self.tour = input_data.get("tour", "auto")
+        self.tour_time_budget = input_data.get("tour_time_budget", 2.0)
+        self.navigation = input_data.get("navigation", False)
+        self.grid_resolution = input_data.get("grid_resolution", 0.5)
+        self.navigation_grid = None
+        # Per-robot tours of the latest multi-robot route, see `plan_fleet`
+        self.robots = None
+        # Called as `progress(phase, stats)` while solving (from the solving thread)
+        self.progress = None
+        # File to dump cProfile statistics of every solve to
+        self.profile = os.environ.get("WALLE_PROFILE")
+        # Why the latest solve found no solution, if it did not, and whether the
+        # search proved that no coloring exists (rather than giving up)
+        self.failure = None
+        self.infeasible = False
+        self.cancelled = False
+        self._cancel_requested = False
 
         # Instantiate sub-modules
-        self.pathfinder = AStarPathfinder()
+        self.time_model = TimeModel(self.time_per_meter, self.robot_speed)
+        self.pathfinder = AStarPathfinder(self.tour, self.tour_time_budget)
+        self.fleet = FleetPlanner(self.pathfinder, self.time_model, self.workers)
         self.csp_solver = CSPColorAssigner(
-            self.colors, self.paint_availability, self.adjacency_constraint, self.min_colors
+            self.colors, self.paint_availability, self.adjacency_constraint, self.min_colors,
+            search=self.search, progress=self._search_progress, seed=self.seed, max_steps=self.node_limit
         )
 
     @staticmethod
     def parse_surfaces(surfaces):
-        """Parses surface data and calculates area."""
-        parsed_surfaces = []
-        for surface in surfaces:
-            height = surface["height"]
-            width = surface["width"]
-            position = tuple(surface["position"])
-            orientation = surface.get("orientation", "Vertical")
-            parsed_surfaces.append({
-                "id": surface["id"],
-                "height": height,
-                "width": width,
-                "area": height * width,
-                "position": position,
-                "orientation": orientation
-            })
-        return parsed_surfaces
+        """Parses surface data into a `SurfaceTable` with areas and corners precomputed."""
+        if isinstance(surfaces, SurfaceTable):
+            return surfaces
+        return SurfaceTable.from_records(surfaces)
 
     def solve(self):
-        """Solve the wall painting problem."""
-        # Find the optimal path using A* pathfinding
-        surface_positions = [surface["position"] for surface in self.surfaces]
-        optimal_path = self.pathfinder.find_path(self.start_position, surface_positions)
+        """Solve the wall painting problem.
 
-        # Assign colors using the CSP solver
-        color_assignment, paint_usage = self.csp_solver.color_assign(self.surfaces)
-        if not color_assignment:
-            print("No valid solutions: Constraints could not be satisfied.")
+        Returns None if there is no solution or if `cancel()` stopped the search, in
+        which case `self.cancelled` is set. With a `cache`, a solution stored for an
+        equivalent input is returned without solving, and new solutions are stored
+        (a failure only when `infeasible` is set).
+        Solutions carry the phase timings and search counters under "stats" (see
+        `processing.profiling`).
+        """
+        self.timer = PhaseTimer({"parse": self._parse_seconds})
+        self.failure = None
+        self.infeasible = False
+        cacheable = self.cache is not None
+        if cacheable:
+            with self.timer.phase("cache"):
+                found, solution = self.cache.lookup(self.input_data)
+            if found:
+                logger.info("Loaded cached solution.")
+                if solution is None:
+                    self.failure = "No valid solutions: Constraints cannot be satisfied (cached)."
+                    return None
+                return dict(solution, stats={"phases": self.timer.seconds, "search": {}})
+        if self.profile:
+            solution = profiled(self.profile, self.run_cancellable, self._solve)
+        else:
+            solution = self.run_cancellable(self._solve)
+        if cacheable and solution is not None:
+            self.cache.store(self.input_data, {key: value for key, value in solution.items() if key != "stats"})
+        elif cacheable and self.infeasible:
+            self.cache.store(self.input_data, None)
+        return solution
+
+    def run_cancellable(self, function, *args):
+        """Call `function(*args)`; return None and set `cancelled` if `cancel()` stops it."""
+        self.cancelled = False
+        try:
+            return function(*args)
+        except SearchCancelled:
+            self.cancelled = True
+            self.failure = "Search cancelled."
+            logger.info("Search cancelled.")
             return None
+        finally:
+            self._cancel_requested = False
 
-        # Calculate total time
-        total_time = 0
-        for idx, surface in enumerate(self.surfaces):
-            painting_time = surface["area"] * self.time_per_meter
-            total_time += painting_time
+    def cancel(self):
+        """Ask a running `solve()` (in another thread) to stop at its next progress check."""
+        self._cancel_requested = True
 
-            if idx > 0:
-                travel_distance = np.linalg.norm(
-                    np.array(optimal_path[idx]) - np.array(optimal_path[idx - 1])
-                )
-                travel_time = travel_distance / 2.0
-                total_time += travel_time
+    def _report(self, phase, stats=None):
+        if self._cancel_requested:
+            raise SearchCancelled
+        if self.progress is not None:
+            self.progress(phase, dict(stats or {}))
 
-        if total_time > self.max_time:
-            print("No valid solutions: Exceeds maximum allowed time.")
+    def _search_progress(self, stats):
+        self._report("coloring", stats)
+
+    def _solve(self):
+        self._report("route")
+        route = self.plan_route()
+        if route is None:
             return None
+        optimal_path, total_time = route
 
-        print("Total time: ", total_time)
-        print("Paint usage: ", paint_usage)
-        print("Path: ", optimal_path)
-        print("Color assignment: ", color_assignment)
+        # Assign colors using the CSP solver
+        self._report("coloring")
+        timer = self.timer
+        with timer.phase("adjacency"):
+            adjacency_list = self.csp_solver._calculate_adjacency_list(self.surfaces)
+        logger.debug("Adjacency list: %s", adjacency_list)
+        with timer.phase("csp"):
+            if self.objective is not None:
+                # Optimization mode: branch-and-bound for the cheapest valid coloring
+                color_assignment, paint_usage = self.csp_solver.optimize(
+                    self.surfaces, self.objective, adjacency_list, node_limit=self.node_limit
+                )
+                search_stats = self.csp_solver.stats
+            elif self.decompose:
+                # Solve each connected component of the adjacency graph on its own
+                component_solver = ComponentSolver(self.csp_solver, self.workers)
+                color_assignment, paint_usage = component_solver.color_assign(self.surfaces, adjacency_list)
+                search_stats = component_solver.stats
+            elif self.portfolio:
+                # Race differently configured searches on a process pool; imported here as
+                # multiprocessing costs more to import than most solves take
+                from algorithims.portfolio import PortfolioSolver
+                configurations = None if self.portfolio is True else self.portfolio
+                portfolio = PortfolioSolver(self.csp_solver, configurations, self.workers)
+                color_assignment, paint_usage = portfolio.color_assign(self.surfaces, adjacency_list)
+                search_stats = portfolio.stats
+            else:
+                color_assignment, paint_usage = self.csp_solver.color_assign(self.surfaces, adjacency_list)
+                search_stats = self.csp_solver.stats
+        logger.info("Nodes explored: %s", search_stats["nodes"])
+        if not color_assignment:
+            if self._search_is_complete():
+                self.infeasible = True
+                return self._fail("No valid solutions: Constraints cannot be satisfied.")
+            return self._fail("No valid solutions: Constraints could not be satisfied.")
+
+        logger.info("Total time: %s", total_time)
+        logger.info("Paint usage: %s", paint_usage)
+        logger.debug("Path: %s", optimal_path)
+        logger.debug("Color assignment: %s", color_assignment)
 
         # Return the solution
-        return {
+        solution = {
             "colors": color_assignment,
             "total_time": total_time,
             "path": optimal_path,
-            "paint_usage": paint_usage
+            "paint_usage": paint_usage,
+            "stats": {"phases": timer.seconds, "search": search_counters(search_stats)},
         }
+        self._add_robots(solution)
+        if self.objective is not None:
+            stats = self.csp_solver.stats
+            solution["objective"] = {key: stats[key] for key in ("cost", "lower_bound", "optimal")}
+            logger.info("Objective: %s", solution["objective"])
+        self._report("done", self.csp_solver.stats)
+        return solution
+
+    def _search_is_complete(self):
+        """Whether a coloring the configured search does not find cannot exist.
+
+        Local search and any node limit can give up on colorable inputs, and the
+        portfolio may stop at an incomplete configuration.
+        """
+        if self.node_limit is not None:
+            return False
+        if self.objective is not None:
+            return True  # branch-and-bound runs the propagation search to the end
+        return self.search != "local_search" and not self.portfolio
+
+    def _fail(self, reason):
+        """Record and log why there is no solution; returns None."""
+        self.failure = reason
+        logger.warning(reason)
+        return None
+
+    def iter_solutions(self, k=None, unique=True):
+        """Yield solution dicts one at a time, up to `k` of them.
+
+        The path and total time do not depend on the colors, so they are computed
+        once and shared; colorings come lazily from `CSPColorAssigner.iter_solutions`
+        (with `unique`, colorings differing only by a renaming of colors are yielded
+        once). Nothing is yielded if the job exceeds `max_time`.
+        """
+        route = self.plan_route()
+        if route is None:
+            return
+        optimal_path, total_time = route
+        for color_assignment, paint_usage in self.csp_solver.iter_solutions(self.surfaces, k, unique):
+            yield self._add_robots({
+                "colors": color_assignment,
+                "total_time": total_time,
+                "path": optimal_path,
+                "paint_usage": paint_usage
+            })
+
+    def _add_robots(self, solution):
+        """Add the makespan and per-robot tours of a multi-robot route to `solution`."""
+        if self.start_positions and self.robots is not None:
+            solution["makespan"] = solution["total_time"]
+            solution["robots"] = self.robots
+        return solution
+
+    def plan_route(self):
+        """Order the surfaces into a tour and time the job.
+
+        Returns `(path, total_time)`, or None (after reporting it) when the job cannot
+        be done within `max_time` whatever the colors. With `start_positions` the
+        walls are shared between several robots instead, see `plan_fleet`.
+        """
+        if self.start_positions:
+            return self.plan_fleet()
+        # Order the walls into the shortest tour we can find within the time budget
+        cost_matrix = self.travel_costs()
+        with self.timer.phase("path"):
+            order = self.pathfinder.plan(self.start_position, self.surfaces.position, cost_matrix=cost_matrix)
+            optimal_path = [self.start_position] + [tuple(position) for position in self.surfaces.position[order].tolist()]
+
+        # Painting and travel time do not depend on the colors, so reject the job
+        # before searching for a coloring
+        with self.timer.phase("time_model"):
+            if cost_matrix is not None:
+                route = np.concatenate(([0], order + 1))
+                legs = cost_matrix[route[:-1], route[1:]]
+            else:
+                legs = self.time_model.path_legs(optimal_path)
+            total_time = self.time_model.total_time(self.surfaces.area, legs)
+        if total_time > self.max_time:
+            return self._fail("No valid solutions: Exceeds maximum allowed time.")
+        return optimal_path, total_time
+
+    def plan_fleet(self):
+        """Share the surfaces between the robots at `start_positions` and time their tours.
+
+        Sets `self.robots` to one dict per robot with its "start", the "surfaces" it
+        paints (ids in visiting order), its "path" and its "time". The robots work in
+        parallel, so the job takes as long as the slowest one (the makespan). Returns
+        `(path, makespan)`, the path being every robot's path one after the other, or
+        None when the makespan exceeds `max_time`.
+        """
+        self.robots = None
+        cost_matrices = None
+        if self.navigation:
+            cost_matrices = [self.travel_costs(start) for start in self.start_positions]
+        surfaces = self.surfaces
+        with self.timer.phase("path"):
+            routes = self.fleet.plan(self.start_positions, surfaces.position, surfaces.area, cost_matrices)
+
+        with self.timer.phase("time_model"):
+            robots = []
+            for robot, (start, rows) in enumerate(zip(self.start_positions, routes)):
+                path = [start] + [tuple(position) for position in surfaces.position[rows].tolist()]
+                if cost_matrices is not None:
+                    route = np.concatenate(([0], rows + 1))
+                    legs = cost_matrices[robot][route[:-1], route[1:]]
+                else:
+                    legs = self.time_model.path_legs(path)
+                robots.append({"start": start, "surfaces": surfaces.ids[rows].tolist(), "path": path,
+                               "time": self.time_model.total_time(surfaces.area[rows], legs)})
+            makespan = max(robot["time"] for robot in robots)
+        self.robots = robots
+        logger.info("Robot times: %s", [robot["time"] for robot in robots])
+        if makespan > self.max_time:
+            return self._fail("No valid solutions: Makespan exceeds maximum allowed time.")
+        return [point for robot in robots for point in robot["path"]], makespan
+
+    def travel_costs(self, start=None):
+        """Travel costs around the walls between a start (default: `start_position`) and every surface, or None.
+
+        Only computed when the "navigation" option is set; the grid is kept so its
+        cost cache is reused by later solves.
+        """
+        if not self.navigation:
+            return None
+        self._report("navigation")
+        with self.timer.phase("navigation"):
+            if self.navigation_grid is None:
+                from algorithims.navigation import NavigationGrid
+                self.navigation_grid = NavigationGrid(self.surfaces, self.grid_resolution)
+            return self.navigation_grid.cost_matrix(self.start_position if start is None else start)
+
+    def visualize_3d_environment(self, surfaces, path, colors, lod=None):
+        """Visualizes the 3D environment using matplotlib.
+
+        The drawing time is added to the "render" phase of the latest solve.
+        """
+        # Imported here so headless runs never load matplotlib
+        import matplotlib.pyplot as plt
+        from processing.render import draw_environment
 
-    def visualize_3d_environment(self, surfaces, path, colors):
-        """Visualizes the 3D environment using matplotlib."""
         fig = plt.figure()
         ax = fig.add_subplot(111, projection="3d")
-
-        # Plot each wall with its assigned color
-        for surface, color in zip(surfaces, colors):
-            x, y, z = surface["position"]
-
-            if surface["orientation"] == "Vertical-x":
-                # Vertical wall spans z (height) and x (width)
-                x_corners = [x, x + surface["width"], x + surface["width"], x]
-                y_corners = [y, y, y, y]
-                z_corners = [z, z, z + surface["height"], z + surface["height"]]
-            elif surface["orientation"] == "Vertical-y":
-                # Vertical wall spans z (height) and y (width)
-                x_corners = [x, x, x, x]
-                y_corners = [y, y + surface["width"], y + surface["width"], y]
-                z_corners = [z, z, z + surface["height"], z + surface["height"]]
-            elif surface["orientation"] == "horizontal":
-                # Horizontal wall spans x (width) and y (height)
-                x_corners = [x, x + surface["width"], x + surface["width"], x]
-                y_corners = [y, y, y + surface["height"], y + surface["height"]]
-                z_corners = [z, z, z, z]
-
-            vertices = [list(zip(x_corners, y_corners, z_corners))]
-            ax.add_collection3d(Poly3DCollection(vertices, alpha=0.5, edgecolor=color, facecolors=color))
-
-        # Plot traversal path
-        if path:
-            path_x, path_y, path_z = zip(*path)
-            ax.plot(path_x, path_y, path_z, color="red", marker="o", label="Traversal Path")
-
-        # Set labels and limits
-        ax.set_xlabel("X")
-        ax.set_ylabel("Y")
-        ax.set_zlabel("Z")
-        ax.set_xlim([0, max(surface["position"][0] + surface["width"] for surface in surfaces) + 1])
-        ax.set_ylim([0, max(surface["position"][1] + surface["height"] for surface in surfaces) + 1])
-        ax.set_zlim([0, max(surface["position"][2] + surface["height"] for surface in surfaces) + 1])
+        with self.timer.phase("render"):
+            draw_environment(ax, self.parse_surfaces(surfaces), path, colors, lod=lod)
 
         plt.title("3D Wall Painting Environment")
         plt.legend()
@@ -139,14 +348,34 @@ class WallE:
             return
 
         print("=== Solution ===")
-        print(f"  - Total Time: {solution['total_time']:.2f} minutes")
-        print(f"  - Colors Used: {', '.join(solution['colors'])}")
-        print(f"  - Paint Usage: {solution['paint_usage']}")
-        print(f"  - Optimal Path: {solution['path']}")
+        self._print_solution(solution)
 
         # Visualize the solution
         #self.visualize_3d_environment(self.surfaces, solution["path"], solution["colors"])
 
+    def display_all_solutions(self, solutions):
+        """Prints solutions as they arrive from an iterable such as `iter_solutions()`."""
+        count = 0
+        for count, solution in enumerate(solutions, start=1):
+            if count == 1:
+                print("=== Valid Solutions ===")
+            print(f"\nSolution {count}:")
+            self._print_solution(solution)
+            print("-" * 40)
+        if not count:
+            print("No valid solutions found.")
+
+    @staticmethod
+    def _print_solution(solution):
+        print(f"  - Total Time: {solution['total_time']:.2f} minutes")
+        print(f"  - Colors Used: {', '.join(sorted(set(solution['colors'].values())))}")
+        print(f"  - Paint Usage: {solution['paint_usage']}")
+        if "robots" in solution:
+            for number, robot in enumerate(solution["robots"], start=1):
+                print(f"  - Robot {number}: {robot['time']:.2f} minutes, path {robot['path']}")
+        else:
+            print(f"  - Optimal Path: {solution['path']}")
+
 
 # Main execution
 if __name__ == "__main__":
@@ -210,6 +439,7 @@ if __name__ == "__main__":
     "min_colors": 5,
     "start_position": [0, 0, 0] }
  
+    logging.basicConfig(level=os.environ.get("WALLE_LOG_LEVEL", "INFO"), format="%(message)s")
     solver = WallE(complex_input_data)
     solution = solver.solve()
     solver.display_solutions(solution)
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""Headless batch solver: solve many input files on a pool of worker processes.
+
+Usage:
+    python -m processing.batch INPUT [INPUT ...] [--workers N] [--timeout SECONDS] [--output FILE] [--cache DIR]
+
+Every INPUT is a scene file (`.json`, `.jsonl` or `.npz`, see `processing.scene_io`),
+a directory (all such files in it), a glob pattern or a JSONL file with one input
+per line. A JSONL file whose first line is a whole input (it has "surfaces") is
+such a job list; otherwise it is a scene with its settings on the first line. One JSON record is written per job, as soon as it finishes:
+
+    {"job": "rooms/a.json", "status": "solved", "seconds": 0.41, "solution": {...}}
+
+`status` is "solved", "no_solution", "timeout" or "error"; with `--cache`, records
+of jobs answered from the solution cache have `"cached": true`. Nothing here
+imports PyQt5 or matplotlib.
+"""
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+
+from processing.WallE import WallE
+from processing.cache import SolutionCache, jsonable
+from processing.scene_io import load_scene
+
+
+def collect_jobs(inputs):
+    """Expand the inputs into `(name, path, line)` jobs.
+
+    `line` is the line number inside a JSONL job list and None for a scene file.
+    Scenes are only read by the workers, so collecting is cheap even for large inputs.
+    """
+    jobs = []
+    for spec in inputs:
+        if os.path.isdir(spec):
+            paths = sorted(path for pattern in ("*.json", "*.jsonl", "*.npz")
+                           for path in glob.glob(os.path.join(spec, pattern)))
+        elif os.path.exists(spec):
+            paths = [spec]
+        else:
+            paths = sorted(glob.glob(spec))
+            if not paths:
+                raise FileNotFoundError(f"No input files match '{spec}'.")
+        for path in paths:
+            if path.endswith(".jsonl") and is_job_list(path):
+                with open(path, "r") as file:
+                    for number, line in enumerate(file, start=1):
+                        if line.strip():
+                            jobs.append((f"{path}:{number}", path, number))
+            else:
+                jobs.append((path, path, None))
+    return jobs
+
+
+def is_job_list(path):
+    """Whether a JSONL file holds one input per line rather than one streamed scene."""
+    with open(path, "r") as file:
+        for line in file:
+            if line.strip():
+                return "surfaces" in json.loads(line)
+    return False
+
+
+def load_job(path, line=None):
+    """Read the input of one job; scene files are streamed by `load_scene`."""
+    if line is None:
+        return load_scene(path)
+    with open(path, "r") as file:
+        for number, text in enumerate(file, start=1):
+            if number == line:
+                return json.loads(text)
+    raise ValueError(f"{path} has no line {line}.")
+
+
+def solve_job(path, line=None, cache=None):
+    """Solve one job and return its result record (without the job name and timing)."""
+    try:
+        input_data = load_job(path, line)
+    except Exception as error:
+        return _error_record(error)
+    return solve_input(input_data, cache)
+
+
+def solve_input(input_data, cache=None):
+    """Solve one input dict and return its result record, as `solve_job` does."""
+    hits = cache.stats["hits"] if cache is not None else 0
+    try:
+        walle = WallE(input_data, cache=cache)
+        solution = walle.solve()
+    except Exception as error:
+        return _error_record(error)
+    if solution is None:
+        record = {"status": "no_solution", "error": walle.failure}
+    else:
+        record = {"status": "solved", "solution": jsonable(solution)}
+    if cache is not None:
+        record["cached"] = cache.stats["hits"] > hits
+    return record
+
+
+def _error_record(error):
+    return {"status": "error", "error": f"{type(error).__name__}: {error}", "traceback": traceback.format_exc()}
+
+
+class BatchRunner:
+    """Run jobs on `workers` long-lived processes, each solving one job at a time.
+
+    A job still running after `timeout` seconds has its process killed and a fresh
+    one started in its place, so a stuck search never holds up the batch. A worker
+    that dies (out of memory, say) is replaced the same way.
+    """
+
+    def __init__(self, workers=None, timeout=None, verbose=False, cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.verbose = verbose
+        self.cache = cache
+
+    def run(self, jobs):
+        """Yield one record per job in the order the jobs finish."""
+        pending = list(reversed(jobs))
+        idle = [start_worker(self.verbose, self.cache) for _ in range(min(self.workers, len(jobs)))]
+        busy = {}  # connection -> (process, job, start time)
+        try:
+            while pending or busy:
+                while pending and idle:
+                    process, connection = idle.pop()
+                    job = pending.pop()
+                    connection.send(job[1:])
+                    busy[connection] = (process, job, time.perf_counter())
+
+                ready = wait(list(busy), timeout=self._next_timeout(busy))
+                now = time.perf_counter()
+                for connection in list(busy):
+                    process, job, started = busy[connection]
+                    if connection in ready:
+                        try:
+                            record = connection.recv()
+                            replace = False
+                        except EOFError:
+                            record = {"status": "error", "error": f"Worker exited with code {process.exitcode}."}
+                            replace = True
+                    elif self.timeout is not None and now - started >= self.timeout:
+                        record = {"status": "timeout", "error": f"Exceeded {self.timeout} s."}
+                        replace = True
+                    else:
+                        continue
+                    del busy[connection]
+                    if not replace:
+                        idle.append((process, connection))
+                    else:
+                        # Kill the dead or stuck worker and start a fresh one if there is work left
+                        stop_worker(process, connection)
+                        if pending:
+                            idle.append(start_worker(self.verbose, self.cache))
+                    yield dict({"job": job[0], "seconds": round(now - started, 3)}, **record)
+        finally:
+            for process, connection in idle + [(process, connection) for connection, (process, _, _) in busy.items()]:
+                stop_worker(process, connection)
+
+    def _next_timeout(self, busy):
+        """Seconds until the oldest running job times out."""
+        if self.timeout is None:
+            return None
+        now = time.perf_counter()
+        return max(0.0, min(started + self.timeout - now for _, _, started in busy.values()))
+
+
+def start_worker(verbose=False, cache=None, solve=solve_job, context=multiprocessing):
+    """Start a worker process that answers every job `args` sent to it with `solve(*args)`.
+
+    `context` is the `multiprocessing` start method context to use. Returns the
+    process and the parent end of its connection.
+    """
+    parent, child = context.Pipe()
+    # Not a daemon, so that a job with the "portfolio" option can start its own processes
+    process = context.Process(target=_worker, args=(child, verbose, cache, solve))
+    process.start()
+    child.close()
+    return process, parent
+
+
+def stop_worker(process, connection):
+    """Kill a worker process if it is still running and close its connection."""
+    if process.is_alive():
+        process.kill()
+    process.join()
+    connection.close()
+
+
+def _worker(connection, verbose, cache, solve):
+    """Solve jobs sent over `connection` until it is closed; runs in a worker process."""
+    logging.basicConfig(level=logging.INFO if verbose else logging.ERROR, stream=sys.stderr,
+                        format="%(processName)s %(name)s: %(message)s", force=True)
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            return
+        connection.send(solve(*job, cache=cache))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m processing.batch",
+                                     description="Solve many Wall-E input files without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="JSON files, directories, glob patterns or JSONL files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per job")
+    parser.add_argument("--output", default="-", help="JSONL file for the result records (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="log the solver output of every job to stderr")
+    parser.add_argument("--cache", metavar="DIR", help="reuse solutions stored in (and store new ones to) DIR")
+    parser.add_argument("--cache-size", type=float, default=100.0, help="cache size limit in MB (default: 100)")
+    args = parser.parse_args(argv)
+
+    jobs = collect_jobs(args.inputs)
+    cache = SolutionCache(args.cache, max_bytes=int(args.cache_size * 1024 * 1024)) if args.cache else None
+    runner = BatchRunner(args.workers, args.timeout, args.verbose, cache)
+    counts = {}
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for record in runner.run(jobs):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            if record.get("cached"):
+                counts["cached"] = counts.get("cached", 0) + 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{len(jobs)} jobs: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())),
+          file=sys.stderr)
+    return 0 if counts.get("error", 0) + counts.get("timeout", 0) == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
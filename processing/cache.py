@@ -0,0 +1,174 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from algorithims.surface_table import SurfaceTable, normalize_orientation
+
+# Input keys that change how fast a solution is found but never which one
+IGNORED_KEYS = ("workers",)
+# Modules whose source decides the solution; editing any of them invalidates the cache
+SOLVER_SOURCES = ("algorithims/*.py", "processing/WallE.py", "processing/time_model.py")
+# Bump when `canonical_input` merges inputs it used to tell apart (e.g. orientation
+# labels became case-insensitive), so entries stored under the old rules are not reused
+CACHE_FORMAT = 2
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "wall-e")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_solver_version = None
+
+
+def solver_version():
+    """Hash of the solver source files, computed once per process."""
+    global _solver_version
+    if _solver_version is None:
+        digest = hashlib.sha256()
+        for pattern in SOLVER_SOURCES:
+            for path in sorted(glob.glob(os.path.join(_ROOT, pattern))):
+                digest.update(os.path.relpath(path, _ROOT).replace(os.sep, "/").encode())
+                with open(path, "rb") as file:
+                    digest.update(file.read())
+        _solver_version = digest.hexdigest()[:16]
+    return _solver_version
+
+
+def canonical_input(input_data):
+    """Normalize an input so that equivalent inputs compare (and hash) equal.
+
+    Surfaces are sorted by id, orientation labels get their canonical spelling and
+    every number becomes a float, so `3` and `3.0`, a reordered surface list or the
+    same surfaces as a `SurfaceTable` give the same result. Keys in `IGNORED_KEYS` are dropped.
+    """
+    canonical = {key: _normalize(value) for key, value in input_data.items()
+                 if key not in IGNORED_KEYS and key != "surfaces"}
+    surfaces = []
+    records = input_data.get("surfaces", [])
+    # A SurfaceTable (e.g. from `processing.scene_io`) adds the computed area to its rows
+    derived = ("area",) if isinstance(records, SurfaceTable) else ()
+    for surface in records:
+        surface = {key: _normalize(value) for key, value in surface.items() if key not in derived}
+        surface["orientation"] = normalize_orientation(surface.get("orientation", "Vertical"))
+        surfaces.append(surface)
+    canonical["surfaces"] = sorted(surfaces, key=lambda surface: (type(surface["id"]).__name__, surface["id"]))
+    return canonical
+
+
+def input_key(input_data):
+    """Content hash of the canonical input, the cache format and the solver version."""
+    text = json.dumps([CACHE_FORMAT, solver_version(), canonical_input(input_data)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class SolutionCache:
+    """Solutions stored on disk by input hash, evicting the least recently used.
+
+    Every entry is one JSON file named after `input_key`; reading an entry touches
+    its modification time, and once the files exceed `max_bytes` the oldest are
+    deleted. `WallE` stores an input without a solution only when a complete search
+    proved there is none, not when the search or the time budget gave up. `stats`
+    counts hits, misses, stores and evictions made through this instance.
+    """
+
+    def __init__(self, directory=None, max_bytes=100 * 1024 * 1024):
+        self.directory = directory or os.environ.get("WALLE_CACHE_DIR") or DEFAULT_DIRECTORY
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def lookup(self, input_data):
+        """Return `(True, solution)` for a cached input (solution may be None) or `(False, None)`."""
+        path = self._path(input_key(input_data))
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return False, None
+        self.stats["hits"] += 1
+        return True, _decode(entry["solution"])
+
+    def store(self, input_data, solution):
+        """Save the solution found for `input_data`, or None if there provably is none."""
+        path = self._path(input_key(input_data))
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w") as file:
+            json.dump({"solution": _encode(solution)}, file)
+        os.replace(temporary, path)
+        self.stats["stores"] += 1
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                status = entry.stat()
+                entries.append((status.st_mtime, status.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Delete every entry."""
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            os.remove(path)
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def _encode(solution):
+    """Solution dict as JSON; colors become pairs so surface ids keep their type."""
+    if solution is None:
+        return None
+    encoded = {key: jsonable(value) for key, value in solution.items() if key != "colors"}
+    encoded["colors"] = [[jsonable(surface_id), color] for surface_id, color in solution["colors"].items()]
+    return encoded
+
+
+def _decode(encoded):
+    if encoded is None:
+        return None
+    solution = dict(encoded)
+    solution["colors"] = {surface_id: color for surface_id, color in encoded["colors"]}
+    solution["path"] = [tuple(point) for point in encoded["path"]]
+    if "robots" in encoded:
+        solution["robots"] = [dict(robot, start=tuple(robot["start"]), path=[tuple(point) for point in robot["path"]])
+                              for robot in encoded["robots"]]
+    return solution
+
+
+def jsonable(value):
+    """Convert tuples, NumPy scalars and arrays to plain JSON types."""
+    if isinstance(value, dict):
+        return {str(key): jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,59 @@
+"""Per-phase timings and search counters for solutions, and an optional cProfile hook.
+
+`WallE.solve` attaches them to every solution it returns under "stats":
+
+    {"phases": {"parse": 0.01, "adjacency": 0.2, "path": 0.5, ...},
+     "search": {"nodes": 1200, "backtracks": 40, "prunings": 3100}}
+
+Each phase costs one pair of `perf_counter` calls. Phase times are also logged at
+DEBUG on this module's logger. Set `WALLE_PROFILE` to a file name to run every solve
+under cProfile and dump its statistics there (read them with `python -m pstats`).
+"""
+import contextlib
+import io
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Search statistics copied into a solution when the search reported them
+SEARCH_COUNTERS = ("nodes", "backtracks", "prunings", "peak_nogoods", "restarts")
+
+
+class PhaseTimer:
+    """Accumulates wall-clock seconds per named phase into `seconds` (a dict)."""
+
+    def __init__(self, seconds=None):
+        self.seconds = {} if seconds is None else seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+            logger.debug("Phase %s took %.4f s", name, elapsed)
+
+
+def search_counters(stats):
+    """The `SEARCH_COUNTERS` present in a search's `stats`."""
+    return {key: stats[key] for key in SEARCH_COUNTERS if key in stats}
+
+
+def profiled(path, function, *args):
+    """Call `function(*args)` under cProfile and dump the statistics to `path`."""
+    # Imported here: only profiled runs need them
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args)
+    finally:
+        profiler.dump_stats(path)
+        if logger.isEnabledFor(logging.DEBUG):
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(20)
+            logger.debug("Profile written to %s:\n%s", path, text.getvalue())
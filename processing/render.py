@@ -0,0 +1,115 @@
+import numpy as np
+
+from algorithims.surface_table import SurfaceTable, VERTICAL_X, VERTICAL_Y, HORIZONTAL, UNKNOWN, corner_tensor
+
+# Above this many faces, coplanar faces of the same color are merged before drawing
+MAX_FACES = 2000
+# Above this many points, the path is drawn through an evenly spaced sample of them
+MAX_PATH_POINTS = 1000
+
+
+def face_colors(surfaces, colors, default="gray"):
+    """Color of every surface, from a dict keyed by surface id or a list in table order."""
+    if isinstance(colors, dict):
+        return [colors.get(surface_id, default) for surface_id in surfaces.ids.tolist()]
+    colors = list(colors or [])
+    return colors + [default] * (len(surfaces) - len(colors))
+
+
+def merge_faces(surfaces, colors):
+    """Merge faces lying side by side in the same plane with the same color and span.
+
+    Faces are grouped by orientation, plane, extent across the run direction and
+    color; within a group, faces whose extents along the run direction touch or
+    overlap become one rectangle. Returns the merged `(corners, colors)`.
+    """
+    orientation = surfaces.orientation
+    position = surfaces.position
+    # Run direction (the width axis) and plane coordinate of every face
+    run_axis = np.where(orientation == VERTICAL_Y, 1, 0)
+    plane_axis = np.select([orientation == VERTICAL_X, orientation == VERTICAL_Y], [1, 0], 2)
+    span_axis = np.where(orientation == HORIZONTAL, 1, 2)
+    rows = np.arange(len(surfaces))
+    start = position[rows, run_axis]
+    end = start + surfaces.width
+    plane = position[rows, plane_axis]
+    span_start = position[rows, span_axis]
+    color_codes = np.unique(np.asarray(colors, dtype=object).astype(str), return_inverse=True)[1]
+
+    order = np.lexsort((start, surfaces.height, span_start, plane, color_codes, orientation))
+    keys = np.stack((orientation, color_codes, plane, span_start, surfaces.height), axis=1)[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+
+    merged = []  # (first row, run start, run end)
+    for row, group_start in zip(order.tolist(), new_group.tolist()):
+        if not group_start and start[row] <= merged[-1][2] + 1e-9:
+            merged[-1][2] = max(merged[-1][2], end[row])
+        else:
+            merged.append([row, start[row], end[row]])
+
+    first = np.array([item[0] for item in merged], dtype=np.int64)
+    run_start = np.array([item[1] for item in merged])
+    merged_position = position[first].copy()
+    merged_position[np.arange(len(first)), run_axis[first]] = run_start
+    width = np.array([item[2] for item in merged]) - run_start
+    corners = corner_tensor(merged_position, width, surfaces.height[first], orientation[first])
+    return corners, [colors[row] for row in first.tolist()]
+
+
+def sample_path(path, max_points=MAX_PATH_POINTS):
+    """Evenly spaced points of `path`, always keeping both ends."""
+    if len(path) <= max_points:
+        return list(path)
+    step = int(np.ceil((len(path) - 1) / (max_points - 1)))
+    return list(path[::step]) + ([path[-1]] if (len(path) - 1) % step else [])
+
+
+def draw_environment(ax, surfaces, path, colors, edgecolor=None, alpha=0.5, lod=None):
+    """Draw all surfaces as one `Poly3DCollection` and the path as one line on a 3D axes.
+
+    `path` is a list of points, or a list of such paths (one per robot) drawn as
+    separate lines. `colors` maps surface ids to colors (or lists them in table
+    order); an `edgecolor` of None outlines each face in its own color. Surfaces
+    with an unknown orientation are skipped. With `lod` (default: only above
+    `MAX_FACES` faces) coplanar same-color faces are merged and the paths are
+    sampled, which keeps large scenes responsive to rotate.
+    """
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+    surfaces = surfaces if isinstance(surfaces, SurfaceTable) else SurfaceTable.from_records(surfaces)
+    colors = face_colors(surfaces, colors)
+    known = surfaces.orientation != UNKNOWN
+    if not known.all():
+        rows = np.flatnonzero(known)
+        surfaces = SurfaceTable(surfaces.ids[rows], surfaces.width[rows], surfaces.height[rows],
+                                surfaces.position[rows], surfaces.orientation[rows])
+        colors = [colors[row] for row in rows.tolist()]
+    if lod is None:
+        lod = len(surfaces) > MAX_FACES
+
+    paths = list(path) if path and isinstance(path[0][0], (list, tuple)) else [path or []]
+    if lod and len(surfaces):
+        corners, colors = merge_faces(surfaces, colors)
+        paths = [sample_path(path) for path in paths]
+    else:
+        corners = surfaces.corners
+    faces = Poly3DCollection(corners, alpha=alpha, facecolors=colors,
+                             edgecolors=colors if edgecolor is None else edgecolor)
+    ax.add_collection3d(faces)
+
+    for number, path in enumerate(paths, start=1):
+        if path:
+            path_x, path_y, path_z = zip(*path)
+            ax.plot(path_x, path_y, path_z, color="red" if len(paths) == 1 else None, marker=None if lod else "o",
+                    label="Traversal Path" if len(paths) == 1 else f"Robot {number}")
+
+    ax.set_xlabel("X")
+    ax.set_ylabel("Y")
+    ax.set_zlabel("Z")
+    if len(surfaces):
+        max_x, max_y, max_z = np.nanmax(surfaces.corners.reshape(-1, 3), axis=0) + 1
+        ax.set_xlim([0, max_x])
+        ax.set_ylim([0, max_y])
+        ax.set_zlim([0, max_z])
+    return faces
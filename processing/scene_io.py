@@ -0,0 +1,235 @@
+"""Scene files: streaming JSON / JSONL readers and a compact binary format.
+
+Three formats hold the same input as `resources/sample.json`:
+
+- `.json`: the original document. `iter_surfaces` streams the "surfaces" array
+  one object at a time instead of parsing the whole document at once.
+- `.jsonl`: the settings (every key but "surfaces") on the first line, then one
+  surface per line. `processing.batch` also takes JSONL files with a whole input
+  per line; those have "surfaces" on every line and are refused here.
+- `.npz`: NumPy arrays `ids`, `width`, `height`, `position` (N, 3) and
+  `orientation` (int8 codes, see `algorithims.surface_table`) plus the settings
+  as JSON, loaded without creating a Python object per surface.
+
+`load_scene` reads any of them into an input dict whose "surfaces" is a
+`SurfaceTable`, which `WallE` accepts directly. Convert between formats with
+
+    python -m processing.scene_io INPUT OUTPUT
+"""
+import json
+import sys
+from array import array
+
+import numpy as np
+
+from algorithims.surface_table import SurfaceTable, UNKNOWN, orientation_code
+
+CHUNK_SIZE = 1 << 20
+
+
+def load_scene(path):
+    """Read a scene file into an input dict with the surfaces as a `SurfaceTable`."""
+    if path.endswith(".npz"):
+        return _load_npz(path)
+    settings = {}
+    columns = _Columns()
+    for surface in iter_surfaces(path, settings):
+        columns.add(surface)
+    settings["surfaces"] = columns.table()
+    return settings
+
+
+def iter_surfaces(path, settings=None):
+    """Yield the surfaces of a scene file one dict at a time.
+
+    The other keys of the scene are stored into `settings` (a dict) as they are
+    read; they are complete once the generator is exhausted.
+    """
+    settings = {} if settings is None else settings
+    if path.endswith(".npz"):
+        scene = _load_npz(path)
+        table = scene.pop("surfaces")
+        settings.update(scene)
+        yield from table
+    elif path.endswith(".jsonl"):
+        with open(path, "r") as file:
+            for number, line in enumerate(file):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "surfaces" in record:
+                    raise ValueError(f"{path} holds whole inputs, one per line (a batch job list), "
+                                     "not a scene.")
+                if number == 0 and "id" not in record:
+                    settings.update(record)
+                else:
+                    yield record
+    else:
+        with open(path, "r") as file:
+            yield from _JsonStream(file).surfaces(settings)
+
+
+def save_scene(path, input_data):
+    """Write an input dict (surfaces as dicts or a `SurfaceTable`) in the format of `path`."""
+    surfaces = input_data["surfaces"]
+    settings = {key: value for key, value in input_data.items() if key != "surfaces"}
+    if path.endswith(".npz"):
+        table = surfaces if isinstance(surfaces, SurfaceTable) else SurfaceTable.from_records(surfaces)
+        ids = table.ids
+        if ids.dtype == object:
+            ids = np.asarray([str(surface_id) for surface_id in ids.tolist()])
+        labels = {str(row): label for row, label in table.orientation_labels.items()}
+        np.savez(path, ids=ids, width=table.width, height=table.height, position=table.position,
+                 orientation=table.orientation, settings=json.dumps(settings),
+                 orientation_labels=json.dumps(labels))
+    elif path.endswith(".jsonl"):
+        with open(path, "w") as file:
+            file.write(json.dumps(settings) + "\n")
+            for surface in surfaces:
+                file.write(json.dumps(_plain_surface(surface)) + "\n")
+    else:
+        with open(path, "w") as file:
+            # Surfaces are written one at a time so a SurfaceTable is never expanded at once
+            file.write('{\n    "surfaces": [')
+            for number, surface in enumerate(surfaces):
+                file.write(("," if number else "") + "\n        " + json.dumps(_plain_surface(surface)))
+            file.write("\n    ]")
+            for key, value in settings.items():
+                file.write(f",\n    {json.dumps(key)}: {json.dumps(value)}")
+            file.write("\n}\n")
+
+
+def convert(source, destination):
+    """Convert a scene file between the `.json`, `.jsonl` and `.npz` formats."""
+    save_scene(destination, load_scene(source))
+
+
+def _load_npz(path):
+    with np.load(path, allow_pickle=False) as scene:
+        settings = json.loads(str(scene["settings"]))
+        labels = {int(row): label for row, label in json.loads(str(scene["orientation_labels"])).items()}
+        settings["surfaces"] = SurfaceTable(scene["ids"], scene["width"], scene["height"], scene["position"],
+                                            scene["orientation"], labels)
+    return settings
+
+
+def _plain_surface(surface):
+    return {key: list(value) if isinstance(value, tuple) else value
+            for key, value in surface.items() if key != "area"}
+
+
+class _Columns:
+    """Surface columns accumulated in typed arrays while a scene streams in."""
+
+    def __init__(self):
+        self.ids = []
+        self.width = array("d")
+        self.height = array("d")
+        self.position = array("d")
+        self.orientation = array("b")
+        self.labels = {}
+
+    def add(self, surface):
+        label = surface.get("orientation", "Vertical")
+        code = orientation_code(label)
+        if code == UNKNOWN:
+            self.labels[len(self.ids)] = label
+        self.ids.append(surface["id"])
+        self.width.append(surface["width"])
+        self.height.append(surface["height"])
+        self.position.extend(surface["position"])
+        self.orientation.append(code)
+
+    def table(self):
+        return SurfaceTable(self.ids, np.frombuffer(self.width), np.frombuffer(self.height),
+                            np.frombuffer(self.position).reshape(-1, 3),
+                            np.frombuffer(self.orientation, dtype=np.int8), self.labels)
+
+
+class _JsonStream:
+    """Incremental reader for a scene JSON object, decoding one value at a time."""
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def _read(self):
+        chunk = self.file.read(CHUNK_SIZE)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return bool(chunk)
+
+    def _next_char(self):
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                raise ValueError("Unexpected end of scene file.")
+
+    def _expect(self, char):
+        if self._next_char() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.position} of the scene chunk.")
+        self.position += 1
+
+    def _value(self):
+        self._next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # The value may run past the buffer; read more and retry
+                if not self._read():
+                    raise
+                continue
+            if end == len(self.buffer) and self._read():
+                continue  # a number may go on in the next chunk
+            self.position = end
+            return value
+
+    def surfaces(self, settings):
+        """Yield the elements of the top-level "surfaces" array; other keys go to `settings`."""
+        self._expect("{")
+        if self._next_char() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "surfaces":
+                self._expect("[")
+                if self._next_char() == "]":
+                    self.position += 1
+                else:
+                    while True:
+                        yield self._value()
+                        separator = self._next_char()
+                        self.position += 1
+                        if separator == "]":
+                            break
+                        if separator != ",":
+                            raise ValueError("Malformed surfaces array in scene file.")
+            else:
+                settings[key] = self._value()
+            separator = self._next_char()
+            self.position += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Malformed scene file.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python -m processing.scene_io INPUT OUTPUT  (.json, .jsonl or .npz)")
+        return 2
+    convert(*argv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
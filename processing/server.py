@@ -0,0 +1,325 @@
+"""Local solver service: JSON over HTTP, solved on a pool of warm worker processes.
+
+Usage:
+    python -m processing.server [--host 127.0.0.1] [--port 8765] [--workers N] [--queue-size 64] [--timeout SECONDS] [--cache DIR]
+
+Endpoints:
+
+- `POST /solve` with an input dict as the body (see `resources/sample.json`)
+  answers a record like those of `processing.batch`:
+
+      {"status": "solved", "seconds": 0.41, "solution": {...}}
+
+  `status` is "solved" or "no_solution" (HTTP 200), "timeout" (504) or "error"
+  (500; 400 for a body that is not a JSON object). When the queue is full the
+  request is refused at once with status "busy" (503). `?timeout=SECONDS` lowers
+  the server's timeout for one request; it counts from arrival, queueing included.
+- `GET /status` reports the workers, the queue depth, request counts by status
+  and latency percentiles over the latest requests.
+
+The workers are started (and have imported the solver) before the first request
+and live as long as the server; one running past its timeout is killed and
+replaced. Try it with
+
+    python -m processing.server --port 8765 &
+    curl -s --data @resources/sample.json localhost:8765/solve
+    curl -s localhost:8765/status
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from processing.batch import solve_input, start_worker, stop_worker
+from processing.cache import SolutionCache
+
+logger = logging.getLogger(__name__)
+
+HTTP_STATUS = {"solved": 200, "no_solution": 200, "busy": 503, "timeout": 504, "error": 500}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error",
+           503: "Service Unavailable", 504: "Gateway Timeout"}
+# Requests whose latency the percentiles of /status are computed over
+LATENCY_WINDOW = 1000
+# Workers replacing a stuck one are started while connections are open; forked
+# from this process they would inherit the client sockets and hold them open
+WORKER_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+class SolverService:
+    """Solve input dicts on `workers` long-lived processes, queueing at most `queue_size` requests.
+
+    Each worker process has one task of the event loop feeding it requests from the
+    queue; the blocking pipe transfers run on a thread per worker.
+    """
+
+    def __init__(self, workers=None, queue_size=64, timeout=None, verbose=False, cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.verbose = verbose
+        self.cache = cache
+        self.queue = None
+        self.busy = 0
+        self.counts = {}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+        self._processes = []
+        self._tasks = []
+        self._threads = None
+
+    async def start(self):
+        """Start the worker processes and the tasks feeding them."""
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        self._threads = ThreadPoolExecutor(self.workers, thread_name_prefix="solver-pipe")
+        self._processes = await asyncio.gather(*(loop.run_in_executor(self._threads, self._start_worker)
+                                                 for _ in range(self.workers)))
+        self._tasks = [asyncio.create_task(self._feed(slot)) for slot in range(self.workers)]
+
+    async def close(self):
+        """Stop the feeding tasks and kill the worker processes."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for process, connection in self._processes:
+            stop_worker(process, connection)
+        self._threads.shutdown(wait=False)
+
+    async def solve(self, input_data, timeout=None):
+        """The result record of one input; refused with status "busy" when the queue is full."""
+        arrived = time.perf_counter()
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout or timeout)
+        deadline = None if timeout is None else arrived + timeout
+        result = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((input_data, deadline, result))
+        except asyncio.QueueFull:
+            record = {"status": "busy", "error": f"The queue of {self.queue_size} requests is full."}
+        else:
+            try:
+                record = await result
+            except asyncio.CancelledError:
+                result.cancel()  # dropped while queued: `_feed` skips it
+                raise
+        seconds = time.perf_counter() - arrived
+        self.counts[record["status"]] = self.counts.get(record["status"], 0) + 1
+        if record["status"] != "busy":
+            self.latencies.append(seconds)
+        return dict({"seconds": round(seconds, 3)}, **record)
+
+    def status(self):
+        """Workers, queue depth, request counts and latency percentiles (seconds) as a dict."""
+        latencies = sorted(self.latencies)
+        percentiles = {}
+        for percentile in (50, 90, 99):
+            if latencies:
+                index = min(len(latencies) - 1, int(round(percentile / 100 * (len(latencies) - 1))))
+                percentiles[f"p{percentile}"] = round(latencies[index], 3)
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue_size,
+            "timeout": self.timeout,
+            "requests": dict(self.counts),
+            "latency": dict(percentiles, window=len(latencies)),
+            "uptime": round(time.time() - self.started, 1),
+        }
+
+    async def _feed(self, slot):
+        """Pass queued requests one at a time to worker process number `slot`."""
+        loop = asyncio.get_running_loop()
+        while True:
+            input_data, deadline, result = await self.queue.get()
+            if result.done():
+                continue  # the request was cancelled
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                result.set_result({"status": "timeout", "error": "Timed out in the queue."})
+                continue
+            process, connection = self._processes[slot]
+            self.busy += 1
+            try:
+                record = await asyncio.wait_for(
+                    loop.run_in_executor(self._threads, self._exchange, connection, input_data), remaining)
+            except asyncio.TimeoutError:
+                record = {"status": "timeout", "error": "Exceeded the request timeout."}
+                record = await self._replace(slot, record)
+            except (EOFError, OSError):
+                record = {"status": "error", "error": f"Worker exited with code {process.exitcode}."}
+                record = await self._replace(slot, record)
+            except Exception as error:
+                # Keep the slot serving; the next request finds out whether the worker is usable
+                logger.exception("Worker %s failed a request.", slot)
+                record = {"status": "error", "error": f"{type(error).__name__}: {error}"}
+            finally:
+                self.busy -= 1
+            if not result.done():
+                result.set_result(record)
+
+    async def _replace(self, slot, record):
+        """Kill worker `slot` (stuck or dead) and start a fresh one; returns `record`.
+
+        If the new worker cannot be started the record says so, and the next request
+        for the slot (finding the old worker gone) tries again.
+        """
+        process, connection = self._processes[slot]
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, stop_worker, process, connection)
+            self._processes[slot] = await loop.run_in_executor(None, self._start_worker)
+        except Exception as error:
+            logger.exception("Could not replace worker %s.", slot)
+            failure = f"Replacing the worker failed: {type(error).__name__}: {error}"
+            return dict(record, error=f"{record['error']} {failure}")
+        logger.info("Replaced worker %s.", slot)
+        return record
+
+    def _start_worker(self):
+        return start_worker(self.verbose, self.cache, solve_input, WORKER_CONTEXT)
+
+    @staticmethod
+    def _exchange(connection, input_data):
+        connection.send((input_data,))
+        return connection.recv()
+
+
+class SolverServer:
+    """Minimal HTTP/1.1 front end of a `SolverService` (one request per connection)."""
+
+    def __init__(self, service, host="127.0.0.1", port=8765):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        await self.service.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info("Listening on http://%s:%s with %s workers.", self.host, self.port, self.service.workers)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            await self.service.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                method, target, body = await self._read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as error:
+                await self._respond(writer, 400, {"status": "error", "error": str(error) or "Malformed request."})
+                return
+            url = urlsplit(target)
+            if url.path == "/status":
+                if method != "GET":
+                    await self._respond(writer, 405, {"status": "error", "error": "Use GET /status."})
+                else:
+                    await self._respond(writer, 200, self.service.status())
+            elif url.path == "/solve":
+                if method != "POST":
+                    await self._respond(writer, 405, {"status": "error", "error": "Use POST /solve."})
+                    return
+                try:
+                    input_data = json.loads(body)
+                    if not isinstance(input_data, dict):
+                        raise ValueError("The body must be a JSON object.")
+                    query = parse_qs(url.query)
+                    timeout = float(query["timeout"][0]) if "timeout" in query else None
+                    if timeout is not None and not (math.isfinite(timeout) and timeout > 0):
+                        raise ValueError("The timeout must be a positive number of seconds.")
+                except ValueError as error:
+                    await self._respond(writer, 400, {"status": "error", "error": str(error)})
+                    return
+                record = await self._solve_unless_closed(reader, input_data, timeout)
+                if record is not None:
+                    await self._respond(writer, HTTP_STATUS[record["status"]], record)
+            else:
+                await self._respond(writer, 404, {"status": "error", "error": f"No endpoint {url.path}."})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _solve_unless_closed(self, reader, input_data, timeout):
+        """The service's record, or None if the client closes the connection first.
+
+        Closing cancels the request, so one still queued is never solved.
+        """
+        solving = asyncio.ensure_future(self.service.solve(input_data, timeout))
+        closed = asyncio.ensure_future(reader.read(1))
+        try:
+            await asyncio.wait((solving, closed), return_when=asyncio.FIRST_COMPLETED)
+            # The read only ends before the answer if the client closed (or reset) the connection
+            if not solving.done() and (closed.exception() or not closed.result()):
+                logger.info("Client closed the connection; request dropped.")
+                solving.cancel()
+                await asyncio.gather(solving, return_exceptions=True)
+                return None
+            return await solving
+        finally:
+            solving.cancel()
+            closed.cancel()
+
+    @staticmethod
+    async def _read_request(reader):
+        """Return the method, target and body of the next request."""
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise ValueError("Malformed request line.")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return request_line[0].upper(), request_line[1], body
+
+    @staticmethod
+    async def _respond(writer, code, payload):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {code} {REASONS[code]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m processing.server",
+                                     description="Serve Wall-E solves as JSON over HTTP on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=64, help="requests waiting beyond which new ones get 503")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per request")
+    parser.add_argument("--verbose", action="store_true", help="log the solver output of every request to stderr")
+    parser.add_argument("--cache", metavar="DIR", help="reuse solutions stored in (and store new ones to) DIR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(name)s: %(message)s")
+    cache = SolutionCache(args.cache) if args.cache else None
+    service = SolverService(args.workers, args.queue_size, args.timeout, args.verbose, cache)
+    try:
+        asyncio.run(SolverServer(service, args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+import logging
+import time
+
+import numpy as np
+
+from algorithims.csp_state import CSPState
+from algorithims.spatial_index import SurfaceSpatialIndex
+from algorithims.surface_table import SurfaceTable
+from processing.WallE import WallE
+
+logger = logging.getLogger(__name__)
+
+
+class _RegionTooHard(Exception):
+    """Raised inside a local repair once it has explored its node budget."""
+
+
+class SolverSession:
+    """A solved problem kept in memory so that editing one wall is cheap to re-solve.
+
+    The session keeps the spatial index, the adjacency graph, the color assignment
+    and the tour. After adding, removing or updating a surface it
+
+    1. re-tests adjacency only against the surfaces the index says may touch it;
+    2. re-colors the changed surface and its neighbours with everything else kept
+       fixed, widening the region ring by ring (up to `max_radius`) when that fails,
+       and solving from scratch only as a last resort;
+    3. removes the surface from the tour and inserts it again where it adds the
+       least travel.
+
+    Adjacency is symmetric (two surfaces differ if either one lists the other, as
+    the propagation search has it) in full solves and repairs alike, so a repaired
+    coloring obeys the same constraints as one solved from scratch, whatever the
+    `search` option. Travel is measured in straight lines (the `navigation` option
+    is not used) for a single robot, so inputs with `start_positions` are refused;
+    the tour can drift from what a full solve would find after many edits and
+    `solve()` starts over. `update(input_data)` diffs a whole input against the
+    session and applies the edits, re-solving from scratch when anything but the
+    surfaces changed.
+    """
+
+    def __init__(self, max_radius=3, region_node_limit=20000):
+        self.max_radius = max_radius
+        self.region_node_limit = region_node_limit
+        self.walle = None
+        self.records = None
+        self._settings = None
+        self.stats = {}
+
+    def load(self, input_data):
+        """Adopt the settings of `input_data` and return the `WallE` that solves with them.
+
+        The current state is dropped when any setting other than the surfaces changed.
+        """
+        if input_data.get("start_positions"):
+            raise ValueError("The solver session plans a single robot's tour; solve inputs with "
+                             "start_positions with WallE.")
+        settings = {key: value for key, value in input_data.items() if key != "surfaces"}
+        if self.walle is None or settings != self._settings:
+            self.walle = WallE(dict(input_data, surfaces=[]))
+            self._settings = settings
+            self.records = None
+        return self.walle
+
+    def update(self, input_data):
+        """Bring the session to `input_data` and return its solution (see `WallE.solve`)."""
+        walle = self.load(input_data)
+        solution = walle.run_cancellable(self._update, input_data["surfaces"])
+        if walle.cancelled:
+            # A repair may have been cut short; color everything on the next update
+            self.assignment = None
+        return solution
+
+    def _update(self, surfaces):
+        started = time.perf_counter()
+        if self.records is None:
+            self._solve(surfaces)
+        else:
+            new = {surface["id"]: surface for surface in surfaces}
+            removed = [surface_id for surface_id in self.records if surface_id not in new]
+            changed = [surface for surface_id, surface in new.items() if self.records.get(surface_id) != surface]
+            if len(removed) + len(changed) > max(8, len(new) // 10):
+                self._solve(surfaces)
+            else:
+                for surface_id in removed:
+                    self.remove_surface(surface_id)
+                for surface in changed:
+                    if surface["id"] in self.records:
+                        self.update_surface(surface)
+                    else:
+                        self.add_surface(surface)
+        self.stats["seconds"] = time.perf_counter() - started
+        return self.solution(report=True)
+
+    def solve(self, surfaces=None):
+        """Solve the current (or the given) surfaces from scratch."""
+        surfaces = list(self.records.values()) if surfaces is None else surfaces
+        self.walle.run_cancellable(self._solve, surfaces)
+        if self.walle.cancelled:
+            self.assignment = None
+        return self.solution(report=True)
+
+    def _solve(self, surfaces):
+        walle = self.walle
+        self.records = {surface["id"]: surface for surface in surfaces}
+        table = SurfaceTable.from_records(surfaces)
+        self.areas = dict(zip(self.records, table.area.tolist()))
+        self.assignment = None
+
+        # Adjacency, with the index kept for later edits
+        self.index = SurfaceSpatialIndex()
+        corners = walle.csp_solver._surface_corners(table)
+        for surface_id, surface_corners in zip(self.records, corners):
+            self.index.add(surface_id, surface_corners)
+        self.corners = dict(zip(self.records, corners))
+        self.neighbours = {surface_id: set() for surface_id in self.records}
+        for first, second in self.index.candidate_pairs():
+            self._link(first, second)
+
+        # Tour
+        order = walle.pathfinder.plan(walle.start_position, table.position)
+        ids = list(self.records)
+        self.tour = [ids[row] for row in order.tolist()]
+        self.tour_points = np.vstack((np.asarray(walle.start_position, dtype=float).reshape(1, 3),
+                                      table.position[order]))
+        self.travel = float(walle.time_model.path_legs(self.tour_points).sum())
+
+        # Coloring
+        self.stats = {"edit": "solve", "full_solves": 0, "freed": len(self.records), "nodes": 0}
+        self._color_all()
+
+    def add_surface(self, surface):
+        """Add a new surface and repair the solution around it."""
+        if surface["id"] in self.records:
+            raise ValueError(f"Surface {surface['id']} already exists.")
+        self.stats = {"edit": "add", "full_solves": 0, "freed": 0, "nodes": 0}
+        self._insert(surface)
+        self._repair({surface["id"]})
+
+    def remove_surface(self, surface_id):
+        """Remove a surface; the coloring is only repaired if `min_colors` is no longer met."""
+        if surface_id not in self.records:
+            raise ValueError(f"Surface {surface_id} does not exist.")
+        self.stats = {"edit": "remove", "full_solves": 0, "freed": 0, "nodes": 0}
+        neighbours = self._delete(surface_id)
+        if self.assignment is None or sum(1 for count in self.counts.values() if count) < self.walle.min_colors:
+            self._repair(neighbours or set(list(self.records)[:1]))
+
+    def update_surface(self, surface):
+        """Replace the surface with the same id (new size, position or orientation) and repair."""
+        if surface["id"] not in self.records:
+            raise ValueError(f"Surface {surface['id']} does not exist.")
+        self.stats = {"edit": "update", "full_solves": 0, "freed": 0, "nodes": 0}
+        neighbours = self._delete(surface["id"])
+        self._insert(surface)
+        self._repair({surface["id"]} | neighbours)
+
+    def solution(self, report=False):
+        """The current solution as a `WallE.solve` dict, or None if there is none."""
+        walle = self.walle
+        if self.records is None or self.assignment is None:
+            if report:
+                logger.warning("No valid solutions: Constraints could not be satisfied.")
+            return None
+        total_time = walle.time_model.total_time(sum(self.areas.values()), self.travel)
+        if total_time > walle.max_time:
+            if report:
+                logger.warning("No valid solutions: Exceeds maximum allowed time.")
+            return None
+        phases = {"update": self.stats["seconds"]} if "seconds" in self.stats else {}
+        return {
+            "colors": {surface_id: self.assignment[surface_id] for surface_id in self.records},
+            "total_time": total_time,
+            "path": [tuple(point) for point in self.tour_points.tolist()],
+            "paint_usage": dict(self.usage),
+            "stats": {"phases": phases, "search": {"nodes": self.stats.get("nodes", 0)}},
+        }
+
+    # Adjacency and tour patches
+
+    def _insert(self, surface):
+        surface_id = surface["id"]
+        table = SurfaceTable.from_records([surface])
+        self.records[surface_id] = surface
+        self.areas[surface_id] = float(table.area[0])
+        corners = self.walle.csp_solver._surface_corners(table)[0]
+        self.corners[surface_id] = corners
+        self.index.add(surface_id, corners)
+        self.neighbours[surface_id] = set()
+        for other in self.index.candidates(surface_id):
+            self._link(surface_id, other)
+
+        # Cheapest insertion: after tour point k (0 is the start)
+        point = table.position[0]
+        points = self.tour_points
+        to_point = np.linalg.norm(points - point, axis=1)
+        cost = to_point.copy()
+        cost[:-1] += to_point[1:] - np.linalg.norm(np.diff(points, axis=0), axis=1)
+        slot = int(cost.argmin())
+        self.tour.insert(slot, surface_id)
+        self.tour_points = np.insert(points, slot + 1, point, axis=0)
+        self.travel += float(cost[slot])
+
+    def _delete(self, surface_id):
+        """Remove a surface from every structure; returns its former neighbours."""
+        neighbours = self.neighbours.pop(surface_id)
+        for other in neighbours:
+            self.neighbours[other].discard(surface_id)
+        self.index.remove(surface_id)
+        del self.corners[surface_id]
+        del self.records[surface_id]
+        area = self.areas.pop(surface_id)
+        if self.assignment is not None:
+            color = self.assignment.pop(surface_id)
+            self.usage[color] -= area
+            self.counts[color] -= 1
+
+        slot = self.tour.index(surface_id)
+        points = self.tour_points
+        before = points[slot]
+        removed = np.linalg.norm(points[slot + 1] - before)
+        if slot + 2 < len(points):
+            after = points[slot + 2]
+            removed += np.linalg.norm(after - points[slot + 1]) - np.linalg.norm(after - before)
+        del self.tour[slot]
+        self.tour_points = np.delete(points, slot + 1, axis=0)
+        self.travel -= float(removed)
+        return neighbours
+
+    def _link(self, first, second):
+        """Record the adjacency between two surfaces if either one lists the other."""
+        adjacent = self.walle.csp_solver._corners_adjacent
+        corners = self.corners
+        if adjacent(corners[first], corners[second]) or adjacent(corners[second], corners[first]):
+            self.neighbours[first].add(second)
+            self.neighbours[second].add(first)
+
+    # Coloring
+
+    def _color_all(self):
+        """Color every surface with the configured search, on the symmetric adjacency."""
+        self.stats["full_solves"] += 1
+        solver = self.walle.csp_solver
+        ids = list(self.records)
+        position = {surface_id: i for i, surface_id in enumerate(ids)}
+        adjacency_list = {surface_id: sorted(self.neighbours[surface_id], key=position.get) for surface_id in ids}
+        assignment, usage = solver.assign_colors(ids, [self.areas[surface_id] for surface_id in ids], adjacency_list)
+        self.stats["nodes"] += solver.stats["nodes"]
+        self.assignment = assignment
+        self.usage = usage
+        self.counts = {color: 0 for color in self.walle.colors}
+        for color in (assignment or {}).values():
+            self.counts[color] += 1
+
+    def _repair(self, seeds):
+        """Re-color a growing region around `seeds`, keeping every other color fixed."""
+        if self.assignment is None:
+            self._color_all()
+            return
+        region = set(seeds)
+        for _ in range(self.max_radius + 1):
+            if len(region) >= len(self.records):
+                break
+            if self._color_region(region):
+                return
+            grown = region.union(*(self.neighbours[surface_id] for surface_id in region))
+            if len(grown) == len(region):
+                break  # an isolated region; nothing nearby to free
+            region = grown
+        self._color_all()
+
+    def _color_region(self, region):
+        """Find colors for the surfaces in `region` compatible with the fixed rest."""
+        walle = self.walle
+        colors = walle.colors
+        ids = [surface_id for surface_id in self.records if surface_id in region]
+        self.stats["freed"] = len(ids)
+        assignment = self.assignment
+        fixed_usage = dict(self.usage)
+        fixed_counts = dict(self.counts)
+        for surface_id in ids:
+            if surface_id in assignment:
+                fixed_usage[assignment[surface_id]] -= self.areas[surface_id]
+                fixed_counts[assignment[surface_id]] -= 1
+        residual = {color: walle.paint_availability.get(color, float("inf")) - fixed_usage[color] for color in colors}
+        fixed_colors = {i for i, color in enumerate(colors) if fixed_counts[color]}
+
+        adjacency_list = {surface_id: [other for other in self.neighbours[surface_id] if other in region]
+                          for surface_id in ids}
+        state = CSPState(ids, [self.areas[surface_id] for surface_id in ids], adjacency_list, colors, residual)
+        color_index = {color: i for i, color in enumerate(colors)}
+        for var, surface_id in enumerate(ids):
+            for other in self.neighbours[surface_id]:
+                if other not in region:
+                    state.domains[var] &= ~(1 << color_index[assignment[other]])
+
+        solver = walle.csp_solver.derive(min_colors=0)
+        solver.stats = {"nodes": 0, "backtracks": 0, "prunings": 0}
+        min_colors, limit = walle.min_colors, self.region_node_limit
+
+        def prune(state):
+            if solver.stats["nodes"] >= limit:
+                raise _RegionTooHard
+            used = sum(1 for color in range(state.color_count) if state.color_counts[color] or color in fixed_colors)
+            return used + state.count - state.assigned < min_colors
+
+        try:
+            solved = next(solver._propagation_solutions(state, prune), None)
+        except _RegionTooHard:
+            solved = None
+        finally:
+            self.stats["nodes"] += solver.stats["nodes"]
+        if solved is None:
+            return False
+        for var, surface_id in enumerate(ids):
+            assignment[surface_id] = colors[solved.assignment[var]]
+        self.usage = {color: fixed_usage[color] + solved.usage[color_index[color]] for color in colors}
+        self.counts = {color: fixed_counts[color] + solved.color_counts[color_index[color]] for color in colors}
+        return True
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+class TimeModel:
+    """Time needed to paint the surfaces and drive the robot between them.
+
+    Painting time is `time_per_meter` per square meter of area and travel time is
+    distance over `robot_speed`. Neither depends on the colors chosen, so a job can
+    be checked against `max_time` as soon as the tour is known.
+    """
+
+    def __init__(self, time_per_meter, robot_speed=2.0):
+        if robot_speed <= 0:
+            raise ValueError("robot_speed must be positive.")
+        self.time_per_meter = time_per_meter
+        self.robot_speed = robot_speed
+
+    def painting_time(self, areas):
+        return float(np.sum(areas)) * self.time_per_meter
+
+    def travel_time(self, legs):
+        return float(np.sum(legs)) / self.robot_speed
+
+    def total_time(self, areas, legs):
+        return self.painting_time(areas) + self.travel_time(legs)
+
+    @staticmethod
+    def path_legs(path):
+        """Straight-line length of every leg of `path`, an (n, 3) sequence of points."""
+        path = np.asarray(path, dtype=float).reshape(-1, 3)
+        return np.linalg.norm(np.diff(path, axis=0), axis=1)
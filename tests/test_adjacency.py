@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from algorithims.csp import CSPColorAssigner
+from algorithims.surface_table import SurfaceTable
+
+ORIENTATIONS = ["Vertical-x", "Vertical-y", "horizontal", "vertical-X", "Diagonal"]
+
+
+def random_surfaces(seed, count=60, span=8):
+    rng = random.Random(seed)
+    return [
+        {"id": number, "height": rng.randint(1, 3), "width": rng.randint(1, 3),
+         "position": [rng.randint(0, span), rng.randint(0, span), rng.randint(0, 2)],
+         "orientation": rng.choice(ORIENTATIONS)}
+        for number in range(1, count + 1)
+    ]
+
+
+def assigner():
+    return CSPColorAssigner(["Red", "Blue"], {}, True, 1)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_spatial_hash_matches_bruteforce(seed):
+    surfaces = random_surfaces(seed)
+    expected = assigner()._calculate_adjacency_list_bruteforce(surfaces)
+    assert assigner()._calculate_adjacency_list(surfaces) == expected
+    assert assigner()._calculate_adjacency_list(SurfaceTable.from_records(surfaces)) == expected
+
+
+def test_shared_corner_and_edge():
+    surfaces = [
+        {"id": 1, "height": 3, "width": 6, "position": [0, 0, 0], "orientation": "Vertical-x"},
+        {"id": 2, "height": 3, "width": 6, "position": [6, 0, 0], "orientation": "Vertical-x"},
+        {"id": 3, "height": 3, "width": 6, "position": [20, 20, 0], "orientation": "Vertical-x"},
+    ]
+    adjacency_list = assigner()._calculate_adjacency_list(surfaces)
+    assert adjacency_list[1] == [2]
+    assert adjacency_list[2] == [1]
+    assert adjacency_list[3] == []
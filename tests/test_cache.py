@@ -0,0 +1,76 @@
+import json
+import os
+import random
+
+import pytest
+
+from benchmarks.scenes import scene
+from processing.WallE import WallE
+from processing.cache import SolutionCache, canonical_input, input_key
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "sample.json")
+
+
+@pytest.fixture
+def sample():
+    with open(SAMPLE) as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SolutionCache(str(tmp_path))
+
+
+def test_equivalent_inputs_share_a_key(sample):
+    shuffled = dict(sample, surfaces=list(reversed(sample["surfaces"])), workers=4)
+    shuffled["surfaces"][0] = dict(shuffled["surfaces"][0], height=float(shuffled["surfaces"][0]["height"]))
+    assert input_key(shuffled) == input_key(sample)
+    changed = dict(sample, min_colors=3)
+    assert input_key(changed) != input_key(sample)
+    assert canonical_input(sample)["surfaces"][0]["id"] == 1.0
+
+
+def test_solution_round_trip(sample, cache):
+    solution = WallE(sample).solve()
+    stored = {key: value for key, value in solution.items() if key != "stats"}
+    cache.store(sample, stored)
+    found, loaded = cache.lookup(dict(sample, surfaces=sample["surfaces"][::-1]))
+    assert found
+    assert loaded == stored
+    assert all(isinstance(point, tuple) for point in loaded["path"])
+    assert cache.stats == {"hits": 1, "misses": 0, "stores": 1, "evictions": 0}
+
+
+def test_solve_is_answered_from_the_cache(sample, cache):
+    first = WallE(sample, cache=cache).solve()
+    second = WallE(sample, cache=cache).solve()
+    assert cache.stats["hits"] == 1
+    assert second["colors"] == first["colors"]
+    assert second["path"] == first["path"]
+
+
+def test_only_proven_failures_are_cached(cache):
+    # Two colors cannot color a grid of rooms
+    infeasible = dict(scene("grid", 40, 1, 2), tour="greedy", search="propagation")
+    walle = WallE(infeasible, cache=cache)
+    assert walle.solve() is None and walle.infeasible
+    walle = WallE(infeasible, cache=cache)
+    assert walle.solve() is None and "cached" in walle.failure
+
+    for options in ({"search": "local_search", "node_limit": 50}, {"search": "propagation", "node_limit": 1}):
+        stores = cache.stats["stores"]
+        walle = WallE(dict(infeasible, **options), cache=cache)
+        assert walle.solve() is None and not walle.infeasible
+        assert cache.stats["stores"] == stores
+        assert not cache.lookup(dict(infeasible, **options))[0]
+
+
+def test_eviction_keeps_the_newest_entries(sample, tmp_path):
+    cache = SolutionCache(str(tmp_path), max_bytes=0)
+    solution = {key: value for key, value in WallE(sample).solve().items() if key != "stats"}
+    rng = random.Random(0)
+    for _ in range(3):
+        cache.store(dict(sample, max_time=rng.random()), solution)
+    assert cache.stats["evictions"] == 3
+    assert not list(tmp_path.glob("*.json"))
@@ -0,0 +1,119 @@
+import random
+from itertools import product
+
+import pytest
+
+from algorithims.csp import CSPColorAssigner
+from algorithims.csp_state import CSPState
+from algorithims.objectives import make_objective
+
+COLORS = ["Red", "Yellow", "Blue", "White"]
+
+
+def random_problem(seed):
+    """Ids, areas, a directed adjacency list, colors, budgets and min_colors."""
+    rng = random.Random(seed)
+    count = rng.randint(2, 7)
+    colors = COLORS[:rng.randint(2, 4)]
+    ids = list(range(1, count + 1))
+    rng.shuffle(ids)
+    areas = [rng.randint(1, 4) for _ in ids]
+    density = rng.choice([0.2, 0.4, 0.6])
+    adjacency_list = {surface_id: [other for other in ids if other != surface_id and rng.random() < density]
+                      for surface_id in ids}
+    total = sum(areas)
+    paint = {color: rng.choice([total, total // 2 + 1, total // 3 + 1]) for color in colors}
+    min_colors = rng.randint(1, len(colors))
+    return ids, areas, adjacency_list, colors, paint, min_colors
+
+
+def valid(coloring, ids, areas, adjacency_list, paint, min_colors, directed=False):
+    """Whether `coloring` meets every constraint.
+
+    `directed` checks adjacency the way chronological backtracking does: a surface
+    only has to differ from the neighbours it lists that come before it.
+    """
+    position = {surface_id: i for i, surface_id in enumerate(ids)}
+    for surface_id in ids:
+        for other in adjacency_list[surface_id]:
+            if directed and position[other] > position[surface_id]:
+                continue
+            if coloring[surface_id] == coloring[other]:
+                return False
+    usage = {}
+    for surface_id, area in zip(ids, areas):
+        usage[coloring[surface_id]] = usage.get(coloring[surface_id], 0) + area
+    if any(amount > paint.get(color, float("inf")) for color, amount in usage.items()):
+        return False
+    return len(usage) >= min_colors
+
+
+def all_colorings(ids, areas, adjacency_list, colors, paint, min_colors, directed=False):
+    for combination in product(colors, repeat=len(ids)):
+        coloring = dict(zip(ids, combination))
+        if valid(coloring, ids, areas, adjacency_list, paint, min_colors, directed):
+            yield coloring
+
+
+@pytest.mark.parametrize("search", ["propagation", "backjumping", "backtracking"])
+@pytest.mark.parametrize("seed", range(60))
+def test_complete_searches_match_exhaustive_search(search, seed):
+    ids, areas, adjacency_list, colors, paint, min_colors = random_problem(seed)
+    directed = search == "backtracking"
+    exists = next(all_colorings(ids, areas, adjacency_list, colors, paint, min_colors, directed), None) is not None
+    assigner = CSPColorAssigner(colors, paint, True, min_colors, search=search)
+    coloring, usage = assigner.assign_colors(ids, areas, adjacency_list)
+    assert (coloring is not None) == exists
+    if coloring is not None:
+        assert valid(coloring, ids, areas, adjacency_list, paint, min_colors, directed)
+        assert sum(usage.values()) == sum(areas)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_local_search_finds_valid_colorings_reproducibly(seed):
+    ids, areas, adjacency_list, colors, paint, min_colors = random_problem(seed)
+    exists = next(all_colorings(ids, areas, adjacency_list, colors, paint, min_colors), None) is not None
+    results = []
+    for _ in range(2):
+        assigner = CSPColorAssigner(colors, paint, True, min_colors, search="local_search", seed=seed, max_steps=5000)
+        results.append(assigner.assign_colors(ids, areas, adjacency_list)[0])
+    assert results[0] == results[1]
+    # Incomplete, but on problems this small it should not miss a coloring
+    assert (results[0] is not None) == exists
+    if exists:
+        assert valid(results[0], ids, areas, adjacency_list, paint, min_colors)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_iter_solutions_yields_every_coloring_once(seed):
+    ids, areas, adjacency_list, colors, paint, min_colors = random_problem(seed)
+    assigner = CSPColorAssigner(colors, paint, True, min_colors)
+    surfaces = [{"id": surface_id, "height": area, "width": 1} for surface_id, area in zip(ids, areas)]
+    found = [coloring for coloring, _ in assigner.iter_solutions(surfaces, adjacency_list=adjacency_list)]
+    expected = list(all_colorings(ids, areas, adjacency_list, colors, paint, min_colors))
+    assert sorted(map(sorted, map(dict.items, found))) == sorted(map(sorted, map(dict.items, expected)))
+
+
+def objective_value(objective, coloring, ids, areas, adjacency_list, colors, paint):
+    state = CSPState(ids, areas, adjacency_list, colors, paint)
+    for var, surface_id in enumerate(ids):
+        state.assign(var, colors.index(coloring[surface_id]))
+    return make_objective(objective).bind(state).value(state)
+
+
+@pytest.mark.parametrize("objective", ["colors", "balance", {"type": "paint_cost", "weights": {"Red": 3, "Blue": 0.5}}])
+@pytest.mark.parametrize("seed", range(30))
+def test_optimize_matches_exhaustive_search(objective, seed):
+    ids, areas, adjacency_list, colors, paint, min_colors = random_problem(seed)
+    costs = [objective_value(objective, coloring, ids, areas, adjacency_list, colors, paint)
+             for coloring in all_colorings(ids, areas, adjacency_list, colors, paint, min_colors)]
+    assigner = CSPColorAssigner(colors, paint, True, min_colors)
+    surfaces = [{"id": surface_id, "height": area, "width": 1} for surface_id, area in zip(ids, areas)]
+    coloring, _ = assigner.optimize(surfaces, objective, adjacency_list)
+    if not costs:
+        assert coloring is None
+        return
+    assert valid(coloring, ids, areas, adjacency_list, paint, min_colors)
+    assert assigner.stats["optimal"]
+    assert assigner.stats["cost"] == pytest.approx(min(costs))
+    assert objective_value(objective, coloring, ids, areas, adjacency_list, colors, paint) == pytest.approx(min(costs))
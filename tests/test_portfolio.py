@@ -0,0 +1,26 @@
+import pytest
+
+from algorithims.csp import CSPColorAssigner
+from algorithims.portfolio import DEFAULT_PORTFOLIO, PortfolioSolver
+from test_csp import random_problem, valid
+
+
+@pytest.mark.parametrize("search", ["backtracking", "propagation"])
+@pytest.mark.parametrize("seed", range(12))
+def test_portfolio_finds_a_coloring_exactly_when_the_plain_search_does(search, seed):
+    ids, areas, adjacency_list, colors, paint, min_colors = random_problem(seed)
+    assigner = CSPColorAssigner(colors, paint, True, min_colors, search=search)
+    plain, _ = assigner.assign_colors(ids, areas, adjacency_list)
+    surfaces = [{"id": surface_id, "height": area, "width": 1} for surface_id, area in zip(ids, areas)]
+    raced, usage = PortfolioSolver(assigner, poll_interval=0.01).color_assign(surfaces, adjacency_list)
+    assert (raced is None) == (plain is None)
+    if raced is not None:
+        assert valid(raced, ids, areas, adjacency_list, paint, min_colors, directed=search == "backtracking")
+
+
+def test_unknown_settings_are_rejected():
+    assigner = CSPColorAssigner(["Red"], {}, True, 1)
+    with pytest.raises(ValueError):
+        PortfolioSolver(assigner, [{"search": "guess"}])
+    with pytest.raises(ValueError):
+        PortfolioSolver(assigner, [dict(DEFAULT_PORTFOLIO[0], budget=3)])
@@ -0,0 +1,67 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.scenes import scene
+from processing.batch import collect_jobs, is_job_list, load_job, solve_job
+from processing.scene_io import convert, iter_surfaces, load_scene, save_scene
+
+
+@pytest.fixture
+def data():
+    data = scene("grid", 60, 3)
+    # Unknown and differently cased orientations must survive
+    data["surfaces"][0] = dict(data["surfaces"][0], orientation="Slanted")
+    data["surfaces"][1] = dict(data["surfaces"][1], orientation="vertical-X")
+    return data
+
+
+def assert_same_scene(loaded, data):
+    table = loaded.pop("surfaces")
+    assert loaded == {key: value for key, value in data.items() if key != "surfaces"}
+    assert table.ids.tolist() == [surface["id"] for surface in data["surfaces"]]
+    assert np.array_equal(table.width, [surface["width"] for surface in data["surfaces"]])
+    assert np.array_equal(table.position, [surface["position"] for surface in data["surfaces"]])
+    assert [surface["orientation"] for surface in table][:2] == ["Slanted", "Vertical-x"]
+
+
+@pytest.mark.parametrize("extension", [".json", ".jsonl", ".npz"])
+def test_round_trip(data, tmp_path, extension):
+    path = str(tmp_path / ("scene" + extension))
+    save_scene(path, data)
+    assert_same_scene(load_scene(path), data)
+
+
+def test_streaming_json_reads_any_key_order(data, tmp_path):
+    path = tmp_path / "scene.json"
+    settings = {key: value for key, value in data.items() if key != "surfaces"}
+    path.write_text(json.dumps(dict(settings, surfaces=data["surfaces"])))
+    streamed = {}
+    assert list(iter_surfaces(str(path), streamed)) == data["surfaces"]
+    assert streamed == settings
+
+
+def test_convert_between_formats(data, tmp_path):
+    save_scene(str(tmp_path / "a.json"), data)
+    convert(str(tmp_path / "a.json"), str(tmp_path / "b.npz"))
+    convert(str(tmp_path / "b.npz"), str(tmp_path / "c.jsonl"))
+    assert_same_scene(load_scene(str(tmp_path / "c.jsonl")), data)
+
+
+def test_batch_tells_scenes_from_job_lists(data, tmp_path):
+    data = dict(data, tour="greedy", search="propagation")
+    save_scene(str(tmp_path / "scene.jsonl"), data)
+    save_scene(str(tmp_path / "scene.npz"), data)
+    with open(tmp_path / "jobs.jsonl", "w") as file:
+        for _ in range(2):
+            file.write(json.dumps(data) + "\n")
+
+    assert is_job_list(str(tmp_path / "jobs.jsonl"))
+    assert not is_job_list(str(tmp_path / "scene.jsonl"))
+    jobs = collect_jobs([str(tmp_path)])
+    assert [name.split("/")[-1] for name, _, _ in jobs] == ["jobs.jsonl:1", "jobs.jsonl:2", "scene.jsonl", "scene.npz"]
+    assert load_job(str(tmp_path / "jobs.jsonl"), 2)["surfaces"] == data["surfaces"]
+    assert [solve_job(path, line)["status"] for _, path, line in jobs] == ["solved"] * 4
+    with pytest.raises(ValueError):
+        load_scene(str(tmp_path / "jobs.jsonl"))
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.scenes import scene
+from processing.server import SolverServer, SolverService
+
+EASY = dict(scene("grid", 30, 1), tour="greedy", search="propagation")
+# Chronological backtracking takes far longer than any timeout here on this scene
+STUCK = dict(scene("grid", 300, 1), tour="greedy", search="backtracking")
+
+
+async def request(port, method, target, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"" if body is None else body if isinstance(body, bytes) else json.dumps(body).encode()
+    writer.write(f"{method} {target} HTTP/1.1\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 30)
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def serve(test, **settings):
+    async def run():
+        server = SolverServer(SolverService(**settings), port=0)
+        await server.start()
+        try:
+            await test(server.port, server.service)
+        finally:
+            server.server.close()
+            await server.service.close()
+    asyncio.run(run())
+
+
+def test_solve_and_status():
+    async def test(port, service):
+        code, record = await request(port, "POST", "/solve", EASY)
+        assert code == 200 and record["status"] == "solved"
+        assert len(record["solution"]["colors"]) == len(EASY["surfaces"])
+        code, status = await request(port, "GET", "/status")
+        assert code == 200
+        assert status["requests"] == {"solved": 1} and status["workers"] == 1
+    serve(test, workers=1)
+
+
+@pytest.mark.parametrize("target, body", [
+    ("/solve", b"{not json"),
+    ("/solve", b"[1, 2]"),
+    ("/solve?timeout=nan", EASY),
+    ("/solve?timeout=inf", EASY),
+    ("/solve?timeout=-1", EASY),
+    ("/solve?timeout=soon", EASY),
+])
+def test_bad_requests(target, body):
+    async def test(port, service):
+        code, record = await request(port, "POST", target, body)
+        assert code == 400 and record["status"] == "error"
+        assert (await request(port, "GET", "/missing"))[0] == 404
+        assert (await request(port, "GET", "/solve"))[0] == 405
+    serve(test, workers=1)
+
+
+def test_timeout_replaces_the_worker_and_a_full_queue_is_busy():
+    async def test(port, service):
+        stuck = asyncio.ensure_future(request(port, "POST", "/solve?timeout=2", STUCK))
+        await asyncio.sleep(0.5)
+        queued = asyncio.ensure_future(request(port, "POST", "/solve", EASY))
+        await asyncio.sleep(0.2)
+        code, record = await request(port, "POST", "/solve", EASY)
+        assert code == 503 and record["status"] == "busy"
+
+        code, record = await stuck
+        assert code == 504 and record["status"] == "timeout"
+        # The replacement worker answers the request that waited in the queue
+        code, record = await queued
+        assert code == 200 and record["status"] == "solved"
+        assert service.status()["requests"] == {"busy": 1, "timeout": 1, "solved": 1}
+    serve(test, workers=1, queue_size=1)
+
+
+def test_disconnected_client_is_not_solved():
+    async def test(port, service):
+        stuck = asyncio.ensure_future(request(port, "POST", "/solve?timeout=2", STUCK))
+        await asyncio.sleep(0.5)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(EASY).encode()
+        writer.write(f"POST /solve HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        await asyncio.sleep(0.2)
+        writer.close()
+        assert (await stuck)[0] == 504
+        await asyncio.sleep(1.0)  # time for the replacement worker to take a request, were one left
+        assert service.status()["requests"] == {"timeout": 1}
+        assert service.status()["queued"] == 0
+    serve(test, workers=1)
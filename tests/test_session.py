@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from benchmarks.scenes import scene
+from processing.WallE import WallE
+from processing.session import SolverSession
+
+
+def check(solution, data, complete=True):
+    """The session's solution must obey every constraint of a fresh solve of `data`.
+
+    With a `complete` search it must also exist exactly when a fresh solve finds one.
+    """
+    fresh = WallE(dict(data, search="propagation"))
+    if complete:
+        assert (solution is None) == (fresh.solve() is None)
+    if solution is None:
+        return
+    colors = solution["colors"]
+    assert set(colors) == {surface["id"] for surface in data["surfaces"]}
+    adjacency_list = fresh.csp_solver._calculate_adjacency_list(data["surfaces"])
+    for surface_id, neighbours in adjacency_list.items():
+        assert all(colors[surface_id] != colors[neighbour] for neighbour in neighbours)
+    usage = {}
+    for surface in data["surfaces"]:
+        usage[colors[surface["id"]]] = usage.get(colors[surface["id"]], 0) + surface["height"] * surface["width"]
+    assert all(amount <= data["paint_availability"][color] + 1e-6 for color, amount in usage.items())
+    reported = {color: amount for color, amount in solution["paint_usage"].items() if amount}
+    assert usage == pytest.approx(reported)
+    assert len(usage) >= data["min_colors"]
+    assert len(solution["path"]) == len(data["surfaces"]) + 1
+
+
+@pytest.mark.parametrize("options", [{"search": "propagation"}, {"search": "backjumping"},
+                                     {"search": "local_search", "node_limit": 20000}])
+@pytest.mark.parametrize("seed", range(4))
+def test_edits_match_a_fresh_solve(options, seed):
+    rng = random.Random(seed)
+    complete = options["search"] != "local_search"
+    data = dict(scene("grid", 60, seed, 8), tour="greedy", min_colors=3, **options)
+    total = sum(surface["height"] * surface["width"] for surface in data["surfaces"])
+    # Tight enough that repairs have to respect the paint left; any tighter and
+    # proving that an edit has no solution takes far too long for a test
+    data["paint_availability"] = {color: total * rng.uniform(0.15, 0.25) for color in data["colors"]}
+    session = SolverSession()
+    check(session.update(data), data, complete)
+    next_id = max(surface["id"] for surface in data["surfaces"]) + 1
+    for _ in range(16):
+        surfaces = list(data["surfaces"])
+        edit = rng.random()
+        if edit < 0.3:
+            surfaces.pop(rng.randrange(len(surfaces)))
+        elif edit < 0.6:
+            model = rng.choice(surfaces)
+            surfaces.append(dict(model, id=next_id, width=rng.randint(2, 8)))
+            next_id += 1
+        else:
+            index = rng.randrange(len(surfaces))
+            surfaces[index] = dict(surfaces[index], width=rng.randint(2, 8))
+        data = dict(data, surfaces=surfaces)
+        check(session.update(data), data, complete)
+
+
+def test_multiple_robots_are_refused():
+    data = dict(scene("grid", 20, 0), start_positions=[[0, 0, 0], [10, 0, 0]])
+    with pytest.raises(ValueError):
+        SolverSession().update(data)
@@ -0,0 +1,46 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from algorithims.tour import TOUR_METHODS, TourMetric, held_karp, nearest_neighbour, plan_tour
+
+
+def random_metric(seed, goals, matrix=False):
+    rng = np.random.default_rng(seed)
+    points = rng.integers(0, 20, size=(goals + 1, 3)).astype(float)
+    if not matrix:
+        return TourMetric(points)
+    # An asymmetric cost matrix, as travel around obstacles can give
+    costs = rng.uniform(1, 10, size=(goals + 1, goals + 1))
+    np.fill_diagonal(costs, 0)
+    return TourMetric(points, matrix=costs)
+
+
+def shortest_length(metric):
+    return min(metric.length([0, *order]) for order in permutations(range(1, metric.count)))
+
+
+@pytest.mark.parametrize("matrix", [False, True])
+@pytest.mark.parametrize("seed", range(8))
+def test_held_karp_is_exact(seed, matrix):
+    metric = random_metric(seed, 2 + seed % 6, matrix)
+    route = held_karp(metric)
+    assert sorted(route) == list(range(metric.count)) and route[0] == 0
+    assert metric.length(route) == pytest.approx(shortest_length(metric))
+
+
+@pytest.mark.parametrize("method", TOUR_METHODS)
+def test_every_method_visits_every_goal_once(method):
+    metric = random_metric(1, 40)
+    route = plan_tour(metric, method, time_budget=1.0)
+    assert route[0] == 0
+    assert sorted(route) == list(range(metric.count))
+
+
+@pytest.mark.parametrize("goals", [30, 300])
+def test_local_search_is_never_longer_than_greedy(goals):
+    metric = random_metric(2, goals)
+    greedy = metric.length(nearest_neighbour(metric))
+    assert metric.length(plan_tour(metric, "local_search", time_budget=1.0)) <= greedy + 1e-9
+    assert metric.length(plan_tour(metric, "auto", time_budget=1.0)) <= greedy + 1e-9